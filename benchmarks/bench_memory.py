@@ -0,0 +1,63 @@
+import random
+import sys
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from ics_parser import KIND_RESERVED, CalendarEvent
+from reservation_index import ReservationIndex
+
+# (apartments, days) of each synthetic portfolio
+PORTFOLIO_SIZES = [(10, 600), (100, 600), (500, 600)]
+
+
+def generate_events(apartments, days, seed=0):
+    """
+    Generates back-to-back stays of 1 to 7 nights for every apartment.
+
+    Returns:
+        dict: A dictionary mapping apartment numbers to lists of CalendarEvent records.
+    """
+    rng = random.Random(seed)
+    start = date.today()
+    events_by_apartment = {}
+    for apt in range(1, apartments + 1):
+        events = []
+        begin = start + timedelta(days=rng.randint(0, 3))
+        while begin < start + timedelta(days=days):
+            end = begin + timedelta(days=rng.randint(1, 7))
+            events.append(CalendarEvent(None, begin, end, KIND_RESERVED))
+            begin = end + timedelta(days=rng.randint(0, 2))
+        events_by_apartment[str(apt)] = events
+    return events_by_apartment
+
+
+def measure(build):
+    """Returns the memory in bytes retained by the object returned from build()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+if __name__ == "__main__":
+    print(
+        f"{'apts':>6} {'days':>6} {'movements':>10} {'dict (KB)':>10} {'table (KB)':>11}"
+    )
+    for apartments, days in PORTFOLIO_SIZES:
+        index = ReservationIndex(generate_events(apartments, days))
+        start = date.today()
+        end = start + timedelta(days=days)
+        table = index.table_between(start, end)
+        table_bytes = measure(lambda: index.table_between(start, end))
+        dict_bytes = measure(lambda: table.to_dict())
+        print(
+            f"{apartments:>6} {days:>6} {table.movement_count():>10} "
+            f"{dict_bytes / 1024:>10.0f} {table_bytes / 1024:>11.0f}"
+        )
@@ -0,0 +1,75 @@
+import os
+import random
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+from ics_parser import iter_vevents, parse_with_ics
+from mock_data import generate_mock_ics
+
+# (days_forward, num_events) for each generated calendar
+CALENDAR_SIZES = [(365, 500), (730, 2000), (1095, 5000)]
+REPEAT = 3
+
+
+def generate_calendar(days_forward, num_events, seed=0):
+    """
+    Generates a mock calendar with generate_mock_ics and returns its content.
+
+    Args:
+        days_forward (int): Number of days covered by the calendar.
+        num_events (int): Number of events to generate.
+        seed (int): Seed for the random generator, for reproducible calendars.
+
+    Returns:
+        str: The generated calendar in ICS format.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calendar.ics")
+        generate_mock_ics(
+            path,
+            days_forward=days_forward,
+            num_events=num_events,
+            rng=random.Random(seed),
+        )
+        with open(path, "r") as f:
+            return f.read()
+
+
+def benchmark(calendar_data):
+    """
+    Times the full ics parse against the fast path on the same calendar.
+
+    Returns:
+        tuple: Best time in seconds for the ics path and for the fast path.
+    """
+    ics_time = min(
+        timeit.repeat(lambda: parse_with_ics(calendar_data), number=1, repeat=REPEAT)
+    )
+    fast_time = min(
+        timeit.repeat(
+            lambda: list(iter_vevents(calendar_data.splitlines())),
+            number=1,
+            repeat=REPEAT,
+        )
+    )
+    return ics_time, fast_time
+
+
+if __name__ == "__main__":
+    print(
+        f"{'events':>8} {'bytes':>10} {'ics (s)':>10} {'fast (s)':>10} {'speedup':>8}"
+    )
+    for days_forward, num_events in CALENDAR_SIZES:
+        calendar_data = generate_calendar(days_forward, num_events)
+        ics_time, fast_time = benchmark(calendar_data)
+        print(
+            f"{num_events:>8} {len(calendar_data):>10} {ics_time:>10.4f} "
+            f"{fast_time:>10.4f} {ics_time / fast_time:>7.1f}x"
+        )
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+from airbnb_data import fetch_all_calendars, parse_calendar_events
+from mailbox_allocator import assign_mailboxes
+from message_format import ALL_FORMATS, render_messages
+from mock_data import generate_mock_ics
+from reservation_index import ReservationIndex
+
+# Portfolio sizes as (apartments, years) pairs
+DEFAULT_SIZES = [(10, 1), (10, 3), (100, 1), (100, 3), (1000, 1), (1000, 3)]
+DEFAULT_SEED = 42
+EVENTS_PER_YEAR = 90  # Roughly one stay every four days, as in a busy listing
+STAGES = ("fetch", "parse", "aggregate", "mailboxes", "render")
+
+
+def generate_portfolio(directory, apartments, years, seed):
+    """
+    Writes one reproducible mock calendar per apartment with generate_mock_ics.
+
+    Args:
+        directory (str): Directory where the .ics files are written.
+        apartments (int): Number of apartments.
+        years (int): Number of years covered by every calendar.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dict: A dictionary mapping apartment numbers to calendar file paths.
+    """
+    rng = random.Random(seed)
+    urls = {}
+    for apt in range(1, apartments + 1):
+        path = os.path.join(directory, f"apartment_{apt}.ics")
+        generate_mock_ics(
+            path,
+            days_forward=365 * years,
+            num_events=EVENTS_PER_YEAR * years,
+            rng=rng,
+        )
+        urls[str(apt)] = path
+    return urls
+
+
+def run_pipeline(urls, days, mailboxes, special_mailboxes, measure):
+    """
+    Runs every stage of the pipeline once, wrapping each of them with measure().
+
+    Args:
+        urls (dict): A dictionary mapping apartment numbers to calendar file paths.
+        days (int): Size of the reservation window, from today.
+        mailboxes (list): General mailboxes.
+        special_mailboxes (dict): Special mailboxes by apartment.
+        measure (callable): Called as measure(stage, function) and returns its result.
+
+    Returns:
+        dict: Counts describing the workload.
+    """
+    calendars = measure("fetch", lambda: fetch_all_calendars(urls))
+    events = measure(
+        "parse",
+        lambda: {
+            apt: parse_calendar_events(data) for apt, data in calendars.items() if data
+        },
+    )
+    start = date.today()
+    reservations = measure(
+        "aggregate",
+        lambda: ReservationIndex(events).table_between(
+            start, start + timedelta(days=days)
+        ),
+    )
+    measure(
+        "mailboxes",
+        lambda: assign_mailboxes(reservations, mailboxes, special_mailboxes),
+    )
+    measure(
+        "render",
+        lambda: render_messages(
+            reservations, ALL_FORMATS, mailboxes, special_mailboxes
+        ),
+    )
+    return {
+        "bytes": sum(len(data) for data in calendars.values() if data),
+        "events": sum(len(apt_events) for apt_events in events.values()),
+        "movements": reservations.movement_count(),
+    }
+
+
+def benchmark(apartments, years, seed, repeat):
+    """
+    Benchmarks one portfolio size.
+
+    Returns:
+        dict: Workload counts, the best time of every stage over `repeat` runs and the peak
+              traced memory of every stage.
+    """
+    mailboxes = [str(i) for i in range(1, max(2, apartments // 2) + 1)]
+    special_mailboxes = {"1": mailboxes[-1]}
+    days = 365 * years
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = generate_portfolio(directory, apartments, years, seed)
+
+        seconds = {stage: float("inf") for stage in STAGES}
+
+        def timed(stage, function):
+            started = time.perf_counter()
+            result = function()
+            seconds[stage] = min(seconds[stage], time.perf_counter() - started)
+            return result
+
+        for _ in range(repeat):
+            counts = run_pipeline(urls, days, mailboxes, special_mailboxes, timed)
+
+        # Memory is measured in a separate run, as tracing slows everything down
+        peak_bytes = {}
+
+        def traced(stage, function):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = function()
+            peak_bytes[stage] = tracemalloc.get_traced_memory()[1] - before
+            return result
+
+        tracemalloc.start()
+        run_pipeline(urls, days, mailboxes, special_mailboxes, traced)
+        tracemalloc.stop()
+
+    return {
+        "apartments": apartments,
+        "years": years,
+        **counts,
+        "stages": {
+            stage: {"seconds": seconds[stage], "peak_bytes": peak_bytes[stage]}
+            for stage in STAGES
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Prints the time ratio of every stage against a previous results file."""
+    with open(baseline_path, "r") as f:
+        baseline = {
+            (run["apartments"], run["years"]): run for run in json.load(f)["runs"]
+        }
+    print(f"Compared with {baseline_path} (ratio > 1 is slower):")
+    for run in results["runs"]:
+        previous = baseline.get((run["apartments"], run["years"]))
+        if previous is None:
+            continue
+        ratios = " ".join(
+            f"{stage}={run['stages'][stage]['seconds'] / max(previous['stages'][stage]['seconds'], 1e-9):.2f}"
+            for stage in STAGES
+        )
+        print(f"  {run['apartments']:>5} apts x {run['years']}y: {ratios}")
+
+
+def parse_size(value):
+    apartments, years = value.lower().split("x")
+    return int(apartments), int(years)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the reservation pipeline on synthetic portfolios."
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=parse_size,
+        default=DEFAULT_SIZES,
+        help="Portfolio sizes as APARTMENTSxYEARS, e.g. 10x1 100x3.",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results file to compare with.")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "runs": [],
+    }
+    print(
+        f"{'apts':>6} {'years':>5} {'events':>8} "
+        + " ".join(f"{s:>10}" for s in STAGES)
+    )
+    for apartments, years in args.sizes:
+        run = benchmark(apartments, years, args.seed, args.repeat)
+        results["runs"].append(run)
+        print(
+            f"{apartments:>6} {years:>5} {run['events']:>8} "
+            + " ".join(f"{run['stages'][s]['seconds']:>10.4f}" for s in STAGES)
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
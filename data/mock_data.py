@@ -10,7 +10,7 @@ logging.basicConfig(
 )
 
 
-def generate_mock_ics(file_path, days_forward=30, num_events=10):
+def generate_mock_ics(file_path, days_forward=30, num_events=10, rng=None):
     """
     Generates a mock ICS file with random reservation and availability events.
     All events are set as all-day events.
@@ -19,13 +19,16 @@ def generate_mock_ics(file_path, days_forward=30, num_events=10):
         file_path (str): The path where the .ics file will be saved.
         days_forward (int): Number of days forward from today for which to generate events.
         num_events (int): Number of events to generate.
+        rng (random.Random, optional): Random generator to use, e.g. a seeded one for
+                                       reproducible files. Defaults to the global generator.
     """
+    rng = rng or random
     today = datetime.datetime.now().date()
     cal = Calendar()
 
     for _ in range(num_events):
-        start_date = today + datetime.timedelta(days=random.randint(0, days_forward))
-        end_date = start_date + datetime.timedelta(days=random.randint(1, 4))
+        start_date = today + datetime.timedelta(days=rng.randint(0, days_forward))
+        end_date = start_date + datetime.timedelta(days=rng.randint(1, 4))
         event = Event()
 
         # Marking the event as all-day to ensure DATE format in DTSTART and DTEND
@@ -33,10 +36,10 @@ def generate_mock_ics(file_path, days_forward=30, num_events=10):
         event.end = end_date
         event.make_all_day()
 
-        event.uid = f"{random.randint(100000000, 999999999)}@airbnb.com"
+        event.uid = f"{rng.randint(100000000, 999999999)}@airbnb.com"
 
         # More likely to have reserved events than not available
-        if random.choice([True] * 3 + [False]):
+        if rng.choice([True] * 3 + [False]):
             event.name = "Reserved"
             event.description = (
                 "Reservation details: https://www.airbnb.com/reservation/itinerary"
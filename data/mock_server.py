@@ -0,0 +1,356 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Set up basic configuration for logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Limits enforced by the fake Telegram endpoint, as documented for the Bot API
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096  # In UTF-16 code units
+DEFAULT_PER_CHAT_INTERVAL = 1.0  # Seconds between two messages to the same chat
+DEFAULT_GLOBAL_RATE = 30  # Messages per second across all chats
+
+CALENDAR_PATH = re.compile(r"^/calendars/(?P<apt>[^/]+)\.ics$")
+SEND_MESSAGE_PATH = re.compile(r"^/bot(?P<token>[^/]+)/sendMessage$")
+GET_UPDATES_PATH = re.compile(r"^/bot(?P<token>[^/]+)/getUpdates$")
+
+
+def generate_calendar(rng, days_forward=365, num_events=50):
+    """
+    Generates an Airbnb-like iCal feed with all-day reservation and blocked events.
+
+    Args:
+        rng (random.Random): Random generator, seeded for reproducible feeds.
+        days_forward (int): Number of days forward from today in which events start.
+        num_events (int): Number of events to generate.
+
+    Returns:
+        str: The calendar in ICS format.
+    """
+    today = date.today()
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//AirbnbAutomation//Mock//EN"]
+    for _ in range(num_events):
+        start = today + timedelta(days=rng.randint(0, days_forward))
+        end = start + timedelta(days=rng.randint(1, 4))
+        summary = "Reserved" if rng.random() < 0.8 else "Airbnb (Not available)"
+        lines += [
+            "BEGIN:VEVENT",
+            f"DTSTART;VALUE=DATE:{start:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{end:%Y%m%d}",
+            f"UID:{rng.randint(100000000, 999999999)}@airbnb.com",
+            f"SUMMARY:{summary}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    server_state = None  # The MockServer, set on the subclass built for each server
+
+    def _reply(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self._reply(status, body, [("Content-Type", "application/json")])
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if GET_UPDATES_PATH.match(path) is not None:
+            params = parse_qs(query)
+            self.server_state.get_updates(
+                self,
+                int(params.get("offset", ["0"])[0]),
+                float(params.get("timeout", ["0"])[0]),
+            )
+            return
+        match = CALENDAR_PATH.match(path)
+        if match is None:
+            self._reply(404, b"not found")
+            return
+        self.server_state.serve_calendar(self, match["apt"])
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        if SEND_MESSAGE_PATH.match(self.path) is None:
+            self._reply_json(
+                404, {"ok": False, "error_code": 404, "description": "Not Found"}
+            )
+            return
+        self.server_state.send_message(
+            self, form.get("chat_id", [""])[0], form.get("text", [""])[0]
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer:
+    """
+    Local stand-in for the Airbnb calendar feeds and the Telegram Bot API, for offline tests.
+
+    Calendars are served at /calendars/<apartment>.ics with an optional latency, a rate of 503
+    errors and ETag revalidation. /bot<token>/sendMessage accepts the same form fields as
+    Telegram, records the messages and answers 429 with retry_after when the per-chat or global
+    rate limit is exceeded, and 400 when a message is too long. /bot<token>/getUpdates long-polls
+    the messages queued with post_update().
+    """
+
+    def __init__(
+        self,
+        apartments=5,
+        events=50,
+        latency=0.0,
+        latency_jitter=0.0,
+        error_rate=0.0,
+        etags=True,
+        per_chat_interval=DEFAULT_PER_CHAT_INTERVAL,
+        global_rate=DEFAULT_GLOBAL_RATE,
+        seed=0,
+        host="127.0.0.1",
+        port=0,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.etags = etags
+        self.per_chat_interval = per_chat_interval
+        self.global_rate = global_rate
+        self.rng = random.Random(seed)
+        self.calendars = {
+            str(apt_number): generate_calendar(self.rng, num_events=events)
+            for apt_number in range(1, apartments + 1)
+        }
+        self.messages = []  # (chat_id, text) of every accepted message
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._last_message_at = {}
+        self._recent_messages = deque()
+        self._updates = []
+        self._updates_changed = threading.Condition(self._lock)
+
+        handler = type("Handler", (_Handler,), {"server_state": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the server, also usable as the Telegram "api_base"."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def calendar_urls(self):
+        """Returns the "airbnb_urls" configuration pointing at the served calendars."""
+        return {apt: f"{self.url}/calendars/{apt}.ics" for apt in self.calendars}
+
+    def _random(self):
+        with self._lock:
+            return self.rng.random()
+
+    def serve_calendar(self, handler, apt_number):
+        with self._lock:
+            self.stats["calendar_requests"] += 1
+        delay = self.latency + self.latency_jitter * self._random()
+        if delay:
+            time.sleep(delay)
+
+        calendar = self.calendars.get(apt_number)
+        if calendar is None:
+            handler._reply(404, b"not found")
+            return
+        if self.error_rate and self._random() < self.error_rate:
+            with self._lock:
+                self.stats["calendar_errors"] += 1
+            handler._reply(503, b"unavailable")
+            return
+
+        body = calendar.encode()
+        headers = [("Content-Type", "text/calendar; charset=utf-8")]
+        if self.etags:
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if handler.headers.get("If-None-Match") == etag:
+                with self._lock:
+                    self.stats["not_modified"] += 1
+                handler._reply(304, b"", [("ETag", etag)])
+                return
+            headers.append(("ETag", etag))
+        handler._reply(200, body, headers)
+
+    def _retry_after(self, chat_id, now):
+        """Returns the seconds a message must wait, or 0 if it can be sent now."""
+        while self._recent_messages and now - self._recent_messages[0] >= 1.0:
+            self._recent_messages.popleft()
+        wait = 0.0
+        if len(self._recent_messages) >= self.global_rate:
+            wait = 1.0 - (now - self._recent_messages[0])
+        last = self._last_message_at.get(chat_id)
+        if last is not None:
+            wait = max(wait, self.per_chat_interval - (now - last))
+        return wait
+
+    def send_message(self, handler, chat_id, text):
+        if len(text.encode("utf-16-le")) // 2 > TELEGRAM_MAX_MESSAGE_LENGTH:
+            with self._lock:
+                self.stats["too_long"] += 1
+            handler._reply_json(
+                400,
+                {
+                    "ok": False,
+                    "error_code": 400,
+                    "description": "Bad Request: message is too long",
+                },
+            )
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            wait = self._retry_after(chat_id, now)
+            if wait > 0:
+                self.stats["rate_limited"] += 1
+            else:
+                self._last_message_at[chat_id] = now
+                self._recent_messages.append(now)
+                self.messages.append((chat_id, text))
+                self.stats["messages"] += 1
+                message_id = len(self.messages)
+
+        if wait > 0:
+            # Telegram reports whole seconds
+            retry_after = max(1, math.ceil(wait))
+            handler._reply_json(
+                429,
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                },
+            )
+            return
+        handler._reply_json(
+            200,
+            {
+                "ok": True,
+                "result": {
+                    "message_id": message_id,
+                    "chat": {"id": chat_id},
+                    "text": text,
+                },
+            },
+        )
+
+    def post_update(self, chat_id, text):
+        """Queues a message from a user to the bot, returned by the next getUpdates."""
+        with self._lock:
+            update_id = len(self._updates) + 1
+            self._updates.append(
+                {
+                    "update_id": update_id,
+                    "message": {
+                        "message_id": update_id,
+                        "chat": {"id": chat_id},
+                        "text": text,
+                    },
+                }
+            )
+            self._updates_changed.notify_all()
+
+    def get_updates(self, handler, offset, timeout):
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self.stats["get_updates"] += 1
+            while True:
+                updates = [u for u in self._updates if u["update_id"] >= offset]
+                remaining = deadline - time.monotonic()
+                if updates or remaining <= 0:
+                    break
+                self._updates_changed.wait(remaining)
+        handler._reply_json(200, {"ok": True, "result": updates})
+
+    def start(self):
+        """Serves requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and closes its socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve mock Airbnb calendars and a fake Telegram Bot API."
+    )
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--apartments", type=int, default=5)
+    parser.add_argument("--events", type=int, default=50, help="Events per calendar")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 503s")
+    parser.add_argument("--no-etags", action="store_true", help="Disable ETags")
+    parser.add_argument(
+        "--per-chat-interval", type=float, default=DEFAULT_PER_CHAT_INTERVAL
+    )
+    parser.add_argument("--global-rate", type=int, default=DEFAULT_GLOBAL_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockServer(
+        apartments=args.apartments,
+        events=args.events,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        etags=not args.no_etags,
+        per_chat_interval=args.per_chat_interval,
+        global_rate=args.global_rate,
+        seed=args.seed,
+        port=args.port,
+    )
+    print("Point config.json at the mock server with:")
+    print(
+        json.dumps(
+            {
+                "airbnb_urls": server.calendar_urls(),
+                "telegram": {"api_base": server.url},
+            },
+            indent=4,
+        )
+    )
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logging.info(f"Mock server stopped: {dict(server.stats)}")
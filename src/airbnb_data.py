@@ -1,104 +1,532 @@
-import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from ics import Calendar
 import logging
-from config_utils import find_config_path, load_configuration, print_pretty_json
+from threading import BoundedSemaphore
+from calendar_stream import DEFAULT_CHUNK_SIZE, calendar_lines
+from config_utils import load_default_config, print_pretty_json, url_host
+from event_cache import ParsedEventCache
+from http_cache import HTTPCache
+import http_transport
+from ics_parser import (
+    KIND_RESERVED,
+    SKIPPED_KIND,
+    SKIPPED_WINDOW,
+    EventFilter,
+    UnsupportedCalendarError,
+    iter_vevents,
+    parse_events,
+    parse_with_ics,
+)
+from metrics import METRICS
+from reservation_cache import reservations_path_from_config, save_reservations
+from reservation_index import ReservationIndex
+from reservation_store import ReservationStore
+from reservation_table import ReservationTable
 import os
 
+# Defaults for the concurrent fetch engine, overridable via config["fetch"]
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_EVENT_KINDS = (
+    KIND_RESERVED,
+)  # Blocked dates are neither check-ins nor check-outs
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
 
-def fetch_calendar_data(url_or_path):
+def fetch_calendar_data(url_or_path, cache=None):
     """
     Fetch calendar data from a specified URL or file path.
 
     Args:
         url_or_path (str): The URL or file path from which to fetch calendar data.
+        cache (HTTPCache, optional): Cache used to revalidate URLs with a conditional GET
+                                     and to serve the stored body on a 304 response.
 
     Returns:
         str: The calendar data as a string if successful, or None if an error occurs.
     """
-    try:
-        if os.path.isfile(url_or_path):
+    if os.path.isfile(url_or_path):
+        try:
             with open(url_or_path, "r") as file:
                 return file.read()
+        except OSError as e:
+            logging.error(f"Error getting data from {url_or_path}: {e}")
+            return None
+
+    # Deferred so that runs on local calendars never import the HTTP stack
+    import requests
+
+    try:
+        if cache is None:
+            response = http_transport.get(url_or_path)
+            response.raise_for_status()  # Throw an error for 4xx/5xx responses
+            return response.text
         else:
-            response = requests.get(url_or_path)
+            response = http_transport.get(
+                url_or_path, headers=cache.conditional_headers(url_or_path)
+            )
+            if response.status_code == 304:
+                body = cache.get(url_or_path, revalidated=True)
+                if body is not None:
+                    return body
+                # The cached copy vanished, so download the full body again
+                response = http_transport.get(url_or_path)
             response.raise_for_status()  # Throw an error for 4xx/5xx responses
+            cache.store(
+                url_or_path,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
             return response.text
-    except (requests.RequestException, FileNotFoundError) as e:
+    except requests.RequestException as e:
         logging.error(f"Error getting data from {url_or_path}: {e}")
         return None
 
 
-def parse_calendar_events(calendar_data):
+def fetch_all_calendars(
+    urls,
+    max_workers=DEFAULT_MAX_WORKERS,
+    per_host_limit=DEFAULT_PER_HOST_LIMIT,
+    cache=None,
+):
+    """
+    Fetch calendar data for several apartments concurrently using a thread pool.
+
+    Args:
+        urls (dict): A dictionary mapping apartment numbers to calendar URLs or file paths.
+        max_workers (int): Maximum number of calendars fetched at the same time.
+        per_host_limit (int): Maximum number of simultaneous requests against a single host.
+        cache (HTTPCache, optional): Cache shared by all downloads for conditional GET requests.
+
+    Returns:
+        dict: A dictionary mapping each apartment number to its calendar data (or None on error),
+              in the same order as the given URLs regardless of completion order.
+    """
+
+    def fetch(apt_number, url_or_path):
+        with METRICS.timer("fetch", apartment=apt_number):
+            calendar_data = fetch_calendar_data(url_or_path, cache=cache)
+        if METRICS.enabled:
+            if calendar_data is None:
+                METRICS.incr("fetch_errors", apartment=apt_number)
+            else:
+                size = len(calendar_data.encode())
+                METRICS.incr("bytes_fetched", size, apartment=apt_number)
+        return calendar_data
+
+    return _map_calendars(urls, fetch, max_workers, per_host_limit)
+
+
+def _map_calendars(urls, work, max_workers, per_host_limit):
+    """
+    Runs work(apt_number, url_or_path) for every calendar in a thread pool, with at most
+    per_host_limit calls against a single host at a time, and returns the results in the
+    order of the given URLs.
+    """
+    if not urls:
+        return {}
+
+    host_slots = {
+        host: BoundedSemaphore(max(1, per_host_limit))
+        for host in {url_host(url_or_path) for url_or_path in urls.values()}
+    }
+
+    def run(apt_number, url_or_path):
+        with host_slots[url_host(url_or_path)]:
+            return work(apt_number, url_or_path)
+
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            apt_number: executor.submit(run, apt_number, url_or_path)
+            for apt_number, url_or_path in urls.items()
+        }
+        return {apt_number: future.result() for apt_number, future in futures.items()}
+
+
+def stream_calendar_events(
+    url_or_path,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    apt_number=None,
+    event_filter=None,
+    skipped=None,
+):
+    """
+    Parses a calendar while it is being read, without holding its whole body in memory.
+
+    Local files are memory-mapped and URLs are downloaded in chunks; the lines feed the fast-path
+    parser directly. Calendars the fast path does not support are downloaded again as a whole
+    and parsed with the ics library.
+
+    Args:
+        url_or_path (str): The URL or file path of the calendar.
+        chunk_size (int): Size of the pieces read at a time, in bytes.
+        apt_number (str, optional): The apartment, used as metrics label.
+        event_filter (EventFilter, optional): Only events it accepts are returned.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    Returns:
+        list: A list of CalendarEvent records, or None if the calendar could not be read.
+    """
+    try:
+        counts = Counter()
+        with calendar_lines(url_or_path, chunk_size, apt_number) as lines:
+            events = list(iter_vevents(lines, event_filter, counts))
+    except UnsupportedCalendarError as e:
+        logging.info(f"Falling back to the ics parser: {e}")
+        calendar_data = fetch_calendar_data(url_or_path)
+        if calendar_data is None:
+            return None
+        counts = Counter()
+        events = parse_with_ics(calendar_data)
+        if event_filter is not None:
+            events = event_filter.select(events, counts)
+    except OSError as e:  # Also covers requests.RequestException
+        logging.error(f"Error getting data from {url_or_path}: {e}")
+        return None
+    if skipped is not None:
+        skipped.update(counts)
+    return events
+
+
+def stream_all_calendars(
+    urls,
+    max_workers=DEFAULT_MAX_WORKERS,
+    per_host_limit=DEFAULT_PER_HOST_LIMIT,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    event_filter=None,
+    skipped=None,
+):
+    """
+    Fetches and parses the calendars of several apartments concurrently in streaming mode.
+
+    Args:
+        urls (dict): A dictionary mapping apartment numbers to calendar URLs or file paths.
+        max_workers (int): Maximum number of calendars read at the same time.
+        per_host_limit (int): Maximum number of simultaneous requests against a single host.
+        chunk_size (int): Size of the pieces read at a time, in bytes.
+        event_filter (EventFilter, optional): Only events it accepts are returned.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    Returns:
+        dict: A dictionary mapping each apartment number to its CalendarEvent list (or None on
+              error), in the same order as the given URLs.
+    """
+    # One counter per apartment, so that the worker threads never update the same one
+    counts = {apt_number: Counter() for apt_number in urls}
+
+    def stream(apt_number, url_or_path):
+        with METRICS.timer("fetch", apartment=apt_number):
+            events = stream_calendar_events(
+                url_or_path, chunk_size, apt_number, event_filter, counts[apt_number]
+            )
+        if events is None:
+            METRICS.incr("fetch_errors", apartment=apt_number)
+        else:
+            METRICS.incr("events_parsed", len(events), apartment=apt_number)
+        return events
+
+    events_by_apartment = _map_calendars(urls, stream, max_workers, per_host_limit)
+    for apt_number, apartment_counts in counts.items():
+        _record_skipped(apt_number, apartment_counts, skipped)
+    return events_by_apartment
+
+
+def parse_calendar_events(calendar_data, cache=None, event_filter=None, skipped=None):
     """
     Parse calendar events from ICS format data.
 
+    Uses the streaming fast-path parser and falls back to the full ics library only for
+    calendars using features the fast path does not support (e.g. recurrence rules).
+
     Args:
         calendar_data (str): Calendar data in ICS format to parse.
+        cache (ParsedEventCache, optional): Cache of previously parsed calendar bodies; only
+                                            bodies missing from it are parsed.
+        event_filter (EventFilter, optional): Only events it accepts are returned. The cache
+                                              keeps every event, so cached calendars are
+                                              filtered after being read.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
 
     Returns:
-        list: A list of Event objects parsed from the calendar data, or None if parsing fails.
+        list: A list of CalendarEvent records whose begin and end are date objects.
     """
-    calendar = Calendar(calendar_data)
-    return calendar.events if calendar else None
+    if cache is None:
+        return parse_events(calendar_data, event_filter, skipped)
 
+    events = cache.get(calendar_data)
+    if events is None:
+        events = parse_events(calendar_data)
+        cache.put(calendar_data, events)
+    if event_filter is not None:
+        events = event_filter.select(events, skipped)
+    return events
 
-def get_airbnb_reservations(config, days):
+
+def _record_skipped(apt_number, counts, skipped):
+    for reason, count in counts.items():
+        METRICS.incr("events_skipped", count, apartment=apt_number, reason=reason)
+    if skipped is not None:
+        skipped.update(counts)
+
+
+def parse_apartment_events(
+    apt_number, calendar_data, cache=None, event_filter=None, skipped=None
+):
     """
-    Fetches reservations from Airbnb URLs specified in the configuration for the next given days.
+    Parses the calendar of one apartment, recording its parse time and event count.
+
+    Args:
+        apt_number (str): The apartment number, used as metrics label.
+        calendar_data (str): Calendar data in ICS format to parse.
+        cache (ParsedEventCache, optional): Cache of previously parsed calendar bodies.
+        event_filter (EventFilter, optional): Only events it accepts are returned.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    Returns:
+        list: A list of CalendarEvent records.
+    """
+    counts = Counter()
+    with METRICS.timer("parse", apartment=apt_number):
+        events = parse_calendar_events(calendar_data, cache, event_filter, counts)
+    METRICS.incr("events_parsed", len(events), apartment=apt_number)
+    _record_skipped(apt_number, counts, skipped)
+    return events
+
+
+def event_filter_from_config(config, start=None, end=None):
+    """
+    Builds the filter of the events that count as check-ins and check-outs.
+
+    Args:
+        config (dict): Configuration dictionary with the optional config["fetch"]["kinds"].
+        start (date, optional): First day of the window.
+        end (date, optional): Last day of the window.
+
+    Returns:
+        EventFilter: A filter accepting the configured kinds (by default DEFAULT_EVENT_KINDS)
+                     within the window, if any.
+    """
+    kinds = config.get("fetch", {}).get("kinds", DEFAULT_EVENT_KINDS)
+    return EventFilter(start, end, kinds)
+
+
+def _fetch_configured_calendars(config):
+    fetch_config = config.get("fetch", {})
+    http_transport.configure_transport(config)
+    return fetch_all_calendars(
+        config.get("airbnb_urls", {}),
+        max_workers=fetch_config.get("max_workers", DEFAULT_MAX_WORKERS),
+        per_host_limit=fetch_config.get("per_host_limit", DEFAULT_PER_HOST_LIMIT),
+        cache=HTTPCache.from_config(config),
+    )
+
+
+def load_apartment_events(config, event_filter=None, skipped=None):
+    """
+    Fetches and parses the calendar of every apartment in the configuration.
+
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs and the optional
+                       "fetch", "http", "http_cache" and "event_cache" sections.
+        event_filter (EventFilter, optional): Only events it accepts are returned. It is
+                                              checked while parsing, so the events it skips are
+                                              never built.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    With "streaming" set in the "fetch" section, calendars are parsed while they are read (see
+    stream_all_calendars) and the HTTP and parsed event caches, which need whole bodies, are
+    not used.
+
+    The events are also stored for cache-only runs (see reservation_cache), filtered by kind
+    only, so that a short window does not shrink them. With a window, the stored events come
+    from a separate parse of the same bodies; when streaming, the bodies are not kept and the
+    stored events are left as they are.
+
+    Returns:
+        dict: A dictionary mapping apartment numbers to lists of CalendarEvent records, in
+              configuration order. Apartments whose calendar could not be fetched are omitted.
+    """
+    fetch_config = config.get("fetch", {})
+    windowed = event_filter is not None and event_filter.has_window
+    if fetch_config.get("streaming"):
+        http_transport.configure_transport(config)
+        streamed = stream_all_calendars(
+            config.get("airbnb_urls", {}),
+            max_workers=fetch_config.get("max_workers", DEFAULT_MAX_WORKERS),
+            per_host_limit=fetch_config.get("per_host_limit", DEFAULT_PER_HOST_LIMIT),
+            chunk_size=fetch_config.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            event_filter=event_filter,
+            skipped=skipped,
+        )
+        events_by_apartment = {
+            apt_number: events
+            for apt_number, events in streamed.items()
+            if events is not None
+        }
+        stored = None if windowed else events_by_apartment
+    else:
+        calendars = _fetch_configured_calendars(config)
+        event_cache = ParsedEventCache.from_config(config)
+
+        events_by_apartment = {}
+        stored = {}
+        for apt_number, calendar_data in calendars.items():
+            if not calendar_data:
+                continue
+            events_by_apartment[apt_number] = parse_apartment_events(
+                apt_number, calendar_data, event_cache, event_filter, skipped
+            )
+            stored[apt_number] = (
+                parse_calendar_events(
+                    calendar_data, event_cache, event_filter.kinds_only()
+                )
+                if windowed
+                else events_by_apartment[apt_number]
+            )
+
+    if stored is not None:
+        # Keep the latest events for cache-only runs
+        save_reservations(
+            reservations_path_from_config(config),
+            stored,
+            config.get("airbnb_urls", {}),
+        )
+    return events_by_apartment
+
+
+def build_reservation_index(config):
+    """
+    Builds a ReservationIndex over the calendars of every apartment in the configuration,
+    so that many date windows can be queried without fetching or scanning events again. Only
+    the event kinds counted by get_airbnb_reservations are indexed.
 
     Args:
         config (dict): Configuration dictionary containing Airbnb URLs.
-        days (int): Number of days from today to fetch reservations.
 
     Returns:
-        dict: A dictionary containing check-ins and check-outs categorized by date.
+        ReservationIndex: The index, or None if the configuration is missing.
     """
     if not config:
         logging.error("Configuration is missing.")
-        return {}
+        return None
+    return ReservationIndex(
+        load_apartment_events(config, event_filter_from_config(config))
+    )
 
-    start_date = datetime.now().date()
-    end_date = start_date + timedelta(days=days)
-    urls = config.get("airbnb_urls", {})
-    reservations = {}
 
-    for apt_number, url_or_path in urls.items():
-        calendar_data = fetch_calendar_data(url_or_path)
-        if calendar_data:
-            events = parse_calendar_events(calendar_data)
-            for event in events:
-                checkin_date = event.begin.date()
-                checkout_date = event.end.date()
+def refresh_reservation_store(config, store):
+    """
+    Fetches the calendar of every apartment and writes those whose content changed to the store.
 
-                if start_date <= checkin_date <= end_date:
-                    reservations.setdefault(
-                        checkin_date, {"checkins": [], "checkouts": []}
-                    )["checkins"].append({"apt_number": apt_number})
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs.
+        store (ReservationStore): The store to refresh.
+
+    Returns:
+        int: The number of calendars that changed.
+    """
+    event_cache = ParsedEventCache.from_config(config)
+    changed = 0
+    for apt_number, calendar_data in _fetch_configured_calendars(config).items():
+        if calendar_data and store.sync(
+            apt_number,
+            calendar_data,
+            parse=lambda data: parse_apartment_events(apt_number, data, event_cache),
+        ):
+            changed += 1
+    METRICS.incr("calendars_changed", changed)
+    return changed
+
+
+def get_airbnb_reservations(config, days):
+    """
+    Fetches reservations from Airbnb URLs specified in the configuration for the next given days.
+
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs, optional "fetch" settings
+                       ("max_workers", "per_host_limit") for the concurrent fetch, an optional
+                       "http_cache" section enabling conditional GET downloads and an optional
+                       "event_cache" section enabling the parsed event cache. With a
+                       "reservation_store" section the calendars are written to the SQLite
+                       store and the window is read back from it.
+        days (int): Number of days from today to fetch reservations.
 
-                if start_date <= checkout_date <= end_date:
-                    reservations.setdefault(
-                        checkout_date, {"checkins": [], "checkouts": []}
-                    )["checkouts"].append({"apt_number": apt_number})
+    Only events of the kinds listed in config["fetch"]["kinds"] (by default reservations, not
+    blocked dates) are counted. The window and kinds are checked while parsing, so other events
+    are skipped before any record is built for them; the skip counts are logged.
 
-    return reservations
+    Returns:
+        ReservationTable: A compact table of check-ins and check-outs. It also behaves as a
+                          read-only dictionary containing check-ins and check-outs categorized
+                          by date.
+    """
+    return get_airbnb_reservations_for_horizons(config, [days])[days]
+
+
+def get_airbnb_reservations_for_horizons(config, horizons):
+    """
+    Fetches reservations for several horizons at once, e.g. 1, 7 and 600 days from today.
+
+    Every calendar is fetched and parsed once, for the longest horizon. The shorter horizons are
+    views of the longest one that share its columns, so no movement is copied.
+
+    Args:
+        config (dict): Configuration dictionary, as for get_airbnb_reservations.
+        horizons (Iterable[int]): Numbers of days from today.
+
+    Returns:
+        dict: A dictionary mapping every horizon to its ReservationTable, the same table
+              get_airbnb_reservations returns for that number of days.
+    """
+    horizons = sorted(set(horizons))
+    if not config:
+        logging.error("Configuration is missing.")
+        return {days: ReservationTable([], []) for days in horizons}
+    if not horizons:
+        return {}
+
+    start_date = datetime.now().date()
+    end_date = start_date + timedelta(days=horizons[-1])
+    event_filter = event_filter_from_config(config, start_date, end_date)
+    store = ReservationStore.from_config(config)
+    if store is not None:
+        with store:
+            refresh_reservation_store(config, store)
+            with METRICS.timer("aggregate"):
+                reservations = store.table_between(
+                    start_date, end_date, config["airbnb_urls"], event_filter.kinds
+                )
+    else:
+        skipped = Counter()
+        events_by_apartment = load_apartment_events(config, event_filter, skipped)
+        if skipped:
+            logging.info(
+                f"Skipped {skipped[SKIPPED_WINDOW]} events outside the window and "
+                f"{skipped[SKIPPED_KIND]} events of other kinds"
+            )
+        index = ReservationIndex(events_by_apartment)
+        with METRICS.timer("aggregate"):
+            reservations = index.table_between(start_date, end_date)
+    METRICS.incr("events_in_window", reservations.movement_count())
+    return {
+        days: reservations.until(start_date + timedelta(days=days)) for days in horizons
+    }
 
 
 if __name__ == "__main__":
-    config_path = find_config_path()
-    if not config_path:
-        print("Configuration file not found.")
+    config = load_default_config()
+    if not config:
         exit(1)
 
-    config = load_configuration(config_path)
-    if config:
-        reservations = get_airbnb_reservations(config, 600)  # Fetch for next 600 days
-        print(f"Reservations from {config_path}:")
+    # Fetch once for the next 600 days; the shorter horizons are views of it
+    horizons = get_airbnb_reservations_for_horizons(config, (1, 7, 600))
+    for days, reservations in horizons.items():
+        print(f"Reservations for the next {days} days from {config.path}:")
         print_pretty_json(reservations)
-    else:
-        print(f"Failed to load configuration from {config_path}.")
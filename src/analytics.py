@@ -0,0 +1,248 @@
+import csv
+import logging
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from airbnb_data import event_filter_from_config, load_apartment_events
+from config_utils import ConfigError, find_config_path, load_app_config
+
+DAILY_COLUMNS = (
+    "date",
+    "occupied",
+    "occupancy_rate",
+    "checkins",
+    "checkouts",
+    "turnovers",
+)
+APARTMENT_COLUMNS = ("apartment", "nights", "occupancy_rate", "checkins", "turnovers")
+
+
+class OccupancyReport:
+    """
+    Occupancy of every apartment over a window of days, computed with vectorized operations.
+
+    The matrix has one row per apartment and one column per day of the window. A cell is True
+    when a stay covers the night of that day, i.e. from its check-in day up to, but not
+    including, its check-out day. Check-ins and check-outs are counted on the days they happen
+    within the window, both ends inclusive, as in get_airbnb_reservations. A turnover is a
+    check-out and a check-in of the same apartment on the same day.
+    """
+
+    def __init__(self, events_by_apartment, start, end):
+        """
+        Args:
+            events_by_apartment (dict): A dictionary mapping apartment numbers to lists of
+                                        CalendarEvent records.
+            start (date): First day of the window.
+            end (date): Last day of the window.
+        """
+        self.start = start
+        self.apartments = list(events_by_apartment)
+        n_apartments = len(self.apartments)
+        n_days = max(0, (end - start).days + 1)
+
+        counts = [len(events) for events in events_by_apartment.values()]
+        rows = np.repeat(np.arange(n_apartments), counts)
+        stays = np.array(
+            [
+                (event.begin.toordinal(), event.end.toordinal())
+                for events in events_by_apartment.values()
+                for event in events
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        begins = stays[:, 0] - start.toordinal()
+        ends = stays[:, 1] - start.toordinal()
+
+        # Each stay adds +1 from its (clipped) check-in and -1 from its check-out; a running
+        # sum along the days then counts the stays covering every night
+        coverage = np.zeros((n_apartments, n_days + 1), dtype=np.int32)
+        np.add.at(coverage, (rows, np.clip(begins, 0, n_days)), 1)
+        np.add.at(coverage, (rows, np.clip(ends, 0, n_days)), -1)
+        self.matrix = np.cumsum(coverage[:, :n_days], axis=1) > 0
+
+        self.checkin_matrix = self._movements(rows, begins, n_apartments, n_days)
+        self.checkout_matrix = self._movements(rows, ends, n_apartments, n_days)
+
+    @staticmethod
+    def _movements(rows, days, n_apartments, n_days):
+        inside = (days >= 0) & (days < n_days)
+        counts = np.zeros((n_apartments, n_days), dtype=np.int32)
+        np.add.at(counts, (rows[inside], days[inside]), 1)
+        return counts
+
+    @property
+    def days(self):
+        """The days of the window, in order."""
+        return [self.start + timedelta(days=i) for i in range(self.matrix.shape[1])]
+
+    @property
+    def occupied(self):
+        """Number of occupied apartments on the night of every day."""
+        return self.matrix.sum(axis=0)
+
+    @property
+    def occupancy_rate(self):
+        """Share of apartments occupied on the night of every day."""
+        if not self.apartments:
+            return np.zeros(self.matrix.shape[1])
+        return self.matrix.mean(axis=0)
+
+    @property
+    def checkins(self):
+        """Number of check-ins on every day."""
+        return self.checkin_matrix.sum(axis=0)
+
+    @property
+    def checkouts(self):
+        """Number of check-outs on every day."""
+        return self.checkout_matrix.sum(axis=0)
+
+    @property
+    def turnover_matrix(self):
+        """True where an apartment has a check-out and a check-in on the same day."""
+        return (self.checkin_matrix > 0) & (self.checkout_matrix > 0)
+
+    @property
+    def turnovers(self):
+        """Number of back-to-back turnovers on every day."""
+        return self.turnover_matrix.sum(axis=0)
+
+    def summary(self):
+        """
+        Summarizes the window.
+
+        Returns:
+            dict: Overall occupancy rate, total turnovers, and the day with the most check-ins
+                  (the peak cleaning load) with its number of check-ins.
+        """
+        checkins = self.checkins
+        peak = int(checkins.argmax()) if checkins.size else None
+        return {
+            "occupancy_rate": float(self.matrix.mean()) if self.matrix.size else 0.0,
+            "turnovers": int(self.turnovers.sum()),
+            "peak_checkins": int(checkins[peak]) if peak is not None else 0,
+            "peak_checkins_date": (
+                self.days[peak].isoformat() if peak is not None else None
+            ),
+        }
+
+    def daily_rows(self):
+        """Returns one row per day, with the values of DAILY_COLUMNS."""
+        return list(
+            zip(
+                (day.isoformat() for day in self.days),
+                self.occupied.tolist(),
+                self.occupancy_rate.round(4).tolist(),
+                self.checkins.tolist(),
+                self.checkouts.tolist(),
+                self.turnovers.tolist(),
+            )
+        )
+
+    def apartment_rows(self):
+        """Returns one row per apartment, with the values of APARTMENT_COLUMNS."""
+        nights = self.matrix.sum(axis=1)
+        n_days = max(1, self.matrix.shape[1])
+        return list(
+            zip(
+                self.apartments,
+                nights.tolist(),
+                (nights / n_days).round(4).tolist(),
+                self.checkin_matrix.sum(axis=1).tolist(),
+                self.turnover_matrix.sum(axis=1).tolist(),
+            )
+        )
+
+
+def build_occupancy_report(config, days):
+    """
+    Fetches the calendars and builds the occupancy report for the next given days, using the
+    same window and event kinds as get_airbnb_reservations.
+
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs.
+        days (int): Number of days from today covered by the report.
+
+    Returns:
+        OccupancyReport: The report.
+    """
+    start_date = datetime.now().date()
+    # Only the kinds counted by the digest: blocked dates are not occupancy
+    events = load_apartment_events(config, event_filter_from_config(config))
+    return OccupancyReport(events, start_date, start_date + timedelta(days=days))
+
+
+def _write_csv(path, columns, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def _write_parquet(path, columns, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(columns)})
+    pq.write_table(table, path)
+
+
+def export_report(report, directory):
+    """
+    Writes the daily and per-apartment tables of a report as CSV, and as Parquet when pyarrow
+    is installed.
+
+    Args:
+        report (OccupancyReport): The report to export.
+        directory (str): Output directory, created if needed.
+
+    Returns:
+        list: The paths of the written files.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tables = (
+        ("daily", DAILY_COLUMNS, report.daily_rows()),
+        ("apartments", APARTMENT_COLUMNS, report.apartment_rows()),
+    )
+
+    written = []
+    for name, columns, rows in tables:
+        path = directory / f"{name}.csv"
+        _write_csv(path, columns, rows)
+        written.append(path)
+
+    try:
+        for name, columns, rows in tables:
+            path = directory / f"{name}.parquet"
+            _write_parquet(path, columns, rows)
+            written.append(path)
+    except ImportError:
+        logging.info("pyarrow is not installed, skipping the Parquet export.")
+    return written
+
+
+if __name__ == "__main__":
+    # Usage: analytics.py [config.json] [days] [--mock]; files go to ./analytics
+    config_filename = sys.argv[1] if len(sys.argv) > 1 else "config.json"
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    config_path = find_config_path(config_filename)
+    if not config_path:
+        print("Configuration file not found.")
+        exit(1)
+    try:
+        config = load_app_config(config_path)
+        if "--mock" in sys.argv:
+            config = config.with_mock_urls()
+    except ConfigError as e:
+        print(f"Failed to load configuration: {e}")
+        exit(1)
+
+    report = build_occupancy_report(config, days)
+    for path in export_report(report, "analytics"):
+        print(f"Written {path}")
+    print(report.summary())
@@ -0,0 +1,86 @@
+import codecs
+import mmap
+import os
+from contextlib import contextmanager
+
+import http_transport
+from metrics import METRICS
+
+# Size of the pieces read from the network or from a mapped file, in bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_text_lines(chunks, encoding="utf-8"):
+    """
+    Decodes a stream of byte chunks and splits it into lines, holding at most one partial line.
+
+    Lines are split as str.splitlines() splits a whole body, including CRLF pairs cut in two
+    by a chunk boundary, so streamed and downloaded calendars are tokenized identically.
+
+    Args:
+        chunks (Iterable[bytes]): The body, in pieces of any size.
+        encoding (str): The character encoding of the body.
+
+    Yields:
+        str: Lines with their line breaks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).splitlines(keepends=True)
+        # The last piece is incomplete unless it ends with "\n"; a lone "\r" may still be
+        # followed by its "\n" in the next chunk
+        pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        yield from lines
+    yield from (pending + decoder.decode(b"", final=True)).splitlines(keepends=True)
+
+
+def _counted(chunks, apt_number):
+    for chunk in chunks:
+        METRICS.incr("bytes_fetched", len(chunk), apartment=apt_number)
+        yield chunk
+
+
+def _file_chunks(mapped, chunk_size):
+    for offset in range(0, len(mapped), chunk_size):
+        yield mapped[offset : offset + chunk_size]
+
+
+@contextmanager
+def calendar_lines(url_or_path, chunk_size=DEFAULT_CHUNK_SIZE, apt_number=None):
+    """
+    Opens a calendar as a stream of lines without reading the whole body into memory.
+
+    Local files are memory-mapped and URLs are downloaded in chunks, so only one chunk and one
+    partial line are held at a time.
+
+    Args:
+        url_or_path (str): The URL or file path of the calendar.
+        chunk_size (int): Size of the pieces read at a time, in bytes.
+        apt_number (str, optional): The apartment, used as metrics label.
+
+    Yields:
+        Iterator[str]: The lines of the calendar.
+
+    Raises:
+        OSError: If a local file cannot be read.
+        requests.RequestException: If the download fails.
+    """
+    if os.path.isfile(url_or_path):
+        with open(url_or_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                yield iter(())
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                chunks = _counted(_file_chunks(mapped, chunk_size), apt_number)
+                yield iter_text_lines(chunks)
+        return
+
+    response = http_transport.get(url_or_path, stream=True)
+    try:
+        response.raise_for_status()  # Throw an error for 4xx/5xx responses
+        chunks = _counted(response.iter_content(chunk_size), apt_number)
+        yield iter_text_lines(chunks, response.encoding or "utf-8")
+    finally:
+        response.close()
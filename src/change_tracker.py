@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+from collections import namedtuple
+from datetime import date, datetime
+from pathlib import Path
+
+# Default location of the last-seen reservations, overridable via config["changes"]
+DEFAULT_SNAPSHOT_PATH = ".cache/snapshot.json"
+
+StayChange = namedtuple(
+    "StayChange",
+    ["apt_number", "uid", "begin", "end", "previous_begin", "previous_end"],
+    defaults=(None, None),
+)
+ReservationChanges = namedtuple("ReservationChanges", ["new", "cancelled", "moved"])
+
+
+def snapshot_path_from_config(config):
+    """
+    Returns the snapshot path from the "changes" section of the configuration.
+
+    Args:
+        config (dict): Configuration dictionary.
+
+    Returns:
+        str: The configured snapshot path, or DEFAULT_SNAPSHOT_PATH.
+    """
+    return config.get("changes", {}).get("snapshot", DEFAULT_SNAPSHOT_PATH)
+
+
+def _event_key(event):
+    # Events without a UID are identified by their dates, so moving them shows as new + cancelled
+    return event.uid or f"{event.begin.isoformat()}/{event.end.isoformat()}"
+
+
+def build_snapshot(events_by_apartment, previous=None, apartments=None):
+    """
+    Builds a snapshot of stays keyed by apartment and event UID.
+
+    Args:
+        events_by_apartment (dict): A dictionary mapping apartment numbers to CalendarEvent lists.
+        previous (dict, optional): The previous snapshot. Apartments listed in `apartments` but
+                                   missing from `events_by_apartment` (e.g. because their
+                                   calendar could not be fetched) keep their previous stays.
+        apartments (Iterable, optional): The apartments currently configured.
+
+    Returns:
+        dict: {apt_number: {uid: [begin ordinal, end ordinal]}}.
+    """
+    snapshot = {}
+    if previous:
+        for apt_number in apartments or ():
+            if apt_number not in events_by_apartment and apt_number in previous:
+                snapshot[apt_number] = previous[apt_number]
+    for apt_number, events in events_by_apartment.items():
+        snapshot[apt_number] = {
+            _event_key(event): [event.begin.toordinal(), event.end.toordinal()]
+            for event in events
+        }
+    return snapshot
+
+
+def load_snapshot(path):
+    """
+    Loads the snapshot written by the previous run.
+
+    Args:
+        path (str): The snapshot file path.
+
+    Returns:
+        dict: The previous snapshot, or None if there is none yet or it cannot be read.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logging.error(f"Error reading reservation snapshot {path}: {e}")
+        return None
+
+
+def save_snapshot(path, snapshot):
+    """
+    Atomically writes a snapshot for the next run.
+
+    Args:
+        path (str): The snapshot file path.
+        snapshot (dict): The snapshot to store.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def diff_snapshots(previous, current, today=None):
+    """
+    Computes new, cancelled and moved stays between two snapshots in a single pass over UIDs.
+    Stays that ended before today are ignored, so stays leaving the calendar as they age out
+    are not reported as cancellations.
+
+    Args:
+        previous (dict): The snapshot of the previous run.
+        current (dict): The snapshot of the current run.
+        today (date, optional): Reference day, defaults to the current date.
+
+    Returns:
+        ReservationChanges: Lists of StayChange records sorted by check-in date.
+    """
+    today = (today or datetime.now().date()).toordinal()
+    new, cancelled, moved = [], [], []
+
+    for apt_number, stays in current.items():
+        previous_stays = previous.get(apt_number, {})
+        for uid, (begin, end) in stays.items():
+            if end < today:
+                continue
+            old = previous_stays.get(uid)
+            if old is None or old[1] < today:
+                new.append(
+                    StayChange(
+                        apt_number, uid, date.fromordinal(begin), date.fromordinal(end)
+                    )
+                )
+            elif old[0] != begin or old[1] != end:
+                moved.append(
+                    StayChange(
+                        apt_number,
+                        uid,
+                        date.fromordinal(begin),
+                        date.fromordinal(end),
+                        date.fromordinal(old[0]),
+                        date.fromordinal(old[1]),
+                    )
+                )
+
+    for apt_number, previous_stays in previous.items():
+        stays = current.get(apt_number, {})
+        for uid, (begin, end) in previous_stays.items():
+            if end >= today and uid not in stays:
+                cancelled.append(
+                    StayChange(
+                        apt_number, uid, date.fromordinal(begin), date.fromordinal(end)
+                    )
+                )
+
+    def by_checkin(change):
+        return change.begin
+
+    return ReservationChanges(
+        sorted(new, key=by_checkin),
+        sorted(cancelled, key=by_checkin),
+        sorted(moved, key=by_checkin),
+    )
+
+
+def has_changes(changes):
+    """Returns True if a ReservationChanges contains at least one change."""
+    return bool(changes.new or changes.cancelled or changes.moved)
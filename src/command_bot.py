@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+
+from airbnb_data import event_filter_from_config, load_apartment_events
+from config_utils import ConfigError, load_default_config
+from fragment_cache import FragmentCache
+from http_transport import configure_transport
+from message_format import FORMAT_DETAILED, FORMAT_MAILBOXES, render_messages
+from reservation_index import ReservationIndex
+from telegram_bot import LONG_POLL_TIMEOUT, get_telegram_updates
+from telegram_delivery import deliver_message, telegram_api_base, telegram_chat_ids
+
+# Defaults for the command bot, overridable via config["bot"]
+DEFAULT_REFRESH_INTERVAL = 5 * 60  # Seconds between two refreshes of the index
+DEFAULT_APARTMENT_DAYS = 30  # Days ahead listed by /apt
+POLL_ERROR_DELAY = 5  # Seconds to wait after a failed getUpdates
+REFRESH_RETRY_DELAY = 30  # Seconds before retrying a refresh while no index is loaded
+
+HELP_TEXT = (
+    "Commands:\n"
+    "/today - check-ins and check-outs today\n"
+    "/tomorrow - check-ins and check-outs tomorrow\n"
+    "/week - the next 7 days\n"
+    "/apt <number> - upcoming stays of an apartment\n"
+    "/mailboxes - mailbox assignments for the next 7 days\n"
+)
+LOADING_TEXT = "Reservations are still loading, try again in a moment."
+REFRESH_FAILED_TEXT = "Reservations could not be loaded ({error}); retrying shortly."
+NO_RESERVATIONS_TEXT = "No reservations found."
+
+
+def parse_command(text):
+    """
+    Splits a message into its command and arguments.
+
+    Args:
+        text (str): The message text, e.g. '/apt 4' or '/today@MyBot'.
+
+    Returns:
+        tuple: (command, arguments), with the command lower-cased and without the bot name,
+               or (None, []) if the message is not a command.
+    """
+    words = (text or "").split()
+    if not words or not words[0].startswith("/"):
+        return None, []
+    return words[0].split("@", 1)[0].lower(), words[1:]
+
+
+def answer_command(text, index, config, today, fragment_cache=None):
+    """
+    Answers a command from the reservation index, without fetching anything.
+
+    Args:
+        text (str): The message text.
+        index (ReservationIndex): The warm index of every apartment's stays.
+        config (dict): Configuration dictionary, for the mailboxes and the message format.
+        today (date): The current day.
+        fragment_cache (FragmentCache, optional): Cache of the rendered mailbox days.
+
+    Returns:
+        str: The reply.
+    """
+    command, args = parse_command(text)
+
+    def render(start, end, message_format):
+        reservations = index.table_between(start, end)
+        if not reservations:
+            return NO_RESERVATIONS_TEXT
+        return render_messages(
+            reservations,
+            (message_format,),
+            config["mailboxes"],
+            config["special_mailboxes"],
+            fragment_cache,
+        )[message_format]
+
+    if command == "/today":
+        return render(today, today, FORMAT_DETAILED)
+    if command == "/tomorrow":
+        tomorrow = today + timedelta(days=1)
+        return render(tomorrow, tomorrow, FORMAT_DETAILED)
+    if command == "/week":
+        return render(
+            today,
+            today + timedelta(days=6),
+            config.get("message_format", FORMAT_MAILBOXES),
+        )
+    if command == "/mailboxes":
+        return render(today, today + timedelta(days=6), FORMAT_MAILBOXES)
+    if command == "/apt":
+        if len(args) != 1:
+            return "Usage: /apt <number>"
+        return _apartment_summary(index, args[0], config, today)
+    return HELP_TEXT
+
+
+def _apartment_summary(index, apt_number, config, today):
+    if apt_number not in index.apartments:
+        return f"Unknown apartment {apt_number}."
+    days = config.get("bot", {}).get("apartment_days", DEFAULT_APARTMENT_DAYS)
+    end = today + timedelta(days=days)
+    occupied = "occupied" if index.is_in_house(apt_number, today) else "free"
+    lines = [f"Apt {apt_number} is {occupied} tonight.\n"]
+    movements = sorted(
+        [
+            (day, "🔑 Check-in")
+            for day, _ in index.checkins_between(today, end, apt_number)
+        ]
+        + [
+            (day, "🚪 Check-out")
+            for day, _ in index.checkouts_between(today, end, apt_number)
+        ]
+    )
+    if not movements:
+        lines.append(f"No check-ins or check-outs in the next {days} days.\n")
+    lines.extend(f"{label}: {day:%Y-%m-%d}\n" for day, label in movements)
+    return "".join(lines)
+
+
+class CommandBot:
+    """
+    Telegram bot answering commands such as /today or /apt 4 from a warm in-memory index.
+
+    Calendars are fetched and parsed in the background every refresh_interval seconds, and the
+    index is swapped once a refresh completes, so commands are answered from memory while the
+    downloads run. Polling starts right away: until the first refresh completes, commands are
+    answered that the reservations are loading, or why they could not be loaded. Messages are received by long polling and only chats listed in the
+    configuration are answered.
+    """
+
+    def __init__(self, config, poll_timeout=LONG_POLL_TIMEOUT):
+        """
+        Args:
+            config (dict): Configuration dictionary with a "telegram" section and the optional
+                           "bot" section ("refresh_interval", "apartment_days").
+            poll_timeout (int): Seconds a getUpdates request waits for new messages.
+        """
+        self.config = config
+        self.poll_timeout = poll_timeout
+        self.refresh_interval = config.get("bot", {}).get(
+            "refresh_interval", DEFAULT_REFRESH_INTERVAL
+        )
+        self.api_token = config["telegram"]["api_token"]
+        self.api_base = telegram_api_base(config)
+        self.allowed_chats = {str(chat_id) for chat_id in telegram_chat_ids(config)}
+        self.index = None
+        self.refreshed_at = None
+        self.refresh_error = None
+        self.fragment_cache = FragmentCache.from_config(config)
+        self._offset = None
+        self._replies = set()
+        self._stopped = asyncio.Event()
+
+    async def refresh(self):
+        """Fetches and parses every calendar in a worker thread, then swaps the index."""
+        try:
+            events = await asyncio.to_thread(
+                load_apartment_events,
+                self.config,
+                event_filter_from_config(self.config),
+            )
+        except Exception as e:
+            logging.error(f"Error refreshing reservations: {e}")
+            self.refresh_error = str(e)
+            return
+        self.index = ReservationIndex(events)
+        self.refreshed_at = datetime.now()
+        self.refresh_error = None
+        logging.info(f"Reservation index refreshed ({len(events)} apartments)")
+
+    def answer(self, text):
+        """
+        Answers a command from the current index.
+
+        Args:
+            text (str): The message text.
+
+        Returns:
+            str: The reply.
+        """
+        if self.index is None:
+            if self.refresh_error is not None:
+                return REFRESH_FAILED_TEXT.format(error=self.refresh_error)
+            return LOADING_TEXT
+        return answer_command(
+            text, self.index, self.config, datetime.now().date(), self.fragment_cache
+        )
+
+    async def _reply(self, chat_id, text):
+        results = await asyncio.to_thread(
+            deliver_message, text, self.api_token, [chat_id], self.api_base
+        )
+        for result in results:
+            if not result.ok:
+                logging.error(f"Failed to answer chat {chat_id}: {result.error}")
+
+    def handle_update(self, update):
+        """
+        Answers a message if it is a command from an allowed chat. The reply is sent in the
+        background so that slow deliveries do not hold up the polling.
+
+        Args:
+            update (dict): An update returned by getUpdates.
+        """
+        message = update.get("message") or {}
+        chat_id = str(message.get("chat", {}).get("id"))
+        text = message.get("text")
+        if chat_id not in self.allowed_chats or parse_command(text)[0] is None:
+            return
+        task = asyncio.create_task(self._reply(chat_id, self.answer(text)))
+        self._replies.add(task)
+        task.add_done_callback(self._replies.discard)
+
+    async def refresh_forever(self):
+        """
+        Loads the index, then refreshes it every refresh_interval seconds until the bot stops.
+        While no index could be loaded, the refresh is retried every REFRESH_RETRY_DELAY seconds.
+        """
+        while not self._stopped.is_set():
+            await self.refresh()
+            delay = (
+                self.refresh_interval
+                if self.index is not None
+                else min(self.refresh_interval, REFRESH_RETRY_DELAY)
+            )
+            try:
+                await asyncio.wait_for(self._stopped.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll_forever(self):
+        """Long-polls for messages and answers them until the bot stops."""
+        while not self._stopped.is_set():
+            try:
+                response = await asyncio.to_thread(
+                    get_telegram_updates,
+                    self.api_token,
+                    self._offset,
+                    self.poll_timeout,
+                    self.api_base,
+                )
+            except Exception as e:
+                logging.error(f"Error getting Telegram updates: {e}")
+                await asyncio.sleep(POLL_ERROR_DELAY)
+                continue
+            if not response.get("ok"):
+                # E.g. 401 for a revoked token or 409 while a webhook is set
+                logging.error(
+                    f"Telegram refused getUpdates: {response.get('description')}"
+                )
+                await asyncio.sleep(POLL_ERROR_DELAY)
+                continue
+            for update in response.get("result", []):
+                self._offset = update["update_id"] + 1
+                self.handle_update(update)
+
+    async def run(self):
+        """Polls for commands while the index loads and refreshes, until stop() is called."""
+        configure_transport(self.config)
+        await asyncio.gather(self.refresh_forever(), self.poll_forever())
+        await asyncio.gather(*self._replies)
+
+    def stop(self):
+        """Asks the loops to finish; a pending getUpdates completes first."""
+        self._stopped.set()
+
+
+if __name__ == "__main__":
+    # Usage: command_bot.py [config.json] [--mock]
+    config_filename = next(
+        (arg for arg in sys.argv[1:] if not arg.startswith("--")), "config.json"
+    )
+    config = load_default_config(config_filename)
+    if not config:
+        exit(1)
+    if "--mock" in sys.argv:
+        try:
+            config = config.with_mock_urls()
+        except ConfigError as e:
+            print(f"Failed to load configuration: {e}")
+            exit(1)
+
+    try:
+        asyncio.run(CommandBot(config).run())
+    except KeyboardInterrupt:
+        pass
@@ -1,7 +1,32 @@
 import json
 import logging
+import os
+import sys
+from collections.abc import Mapping
 from pathlib import Path
 from datetime import date, datetime
+from urllib.parse import urlparse
+
+# Message formats accepted in config["message_format"], see message_format.ALL_FORMATS
+MESSAGE_FORMATS = ("basic", "detailed", "mailboxes")
+
+# Optional sections, which must be JSON objects when present
+OPTIONAL_SECTIONS = (
+    "bot",
+    "fetch",
+    "http",
+    "http_cache",
+    "event_cache",
+    "fragment_cache",
+    "changes",
+    "daemon",
+    "metrics",
+    "reservation_cache",
+    "reservation_store",
+)
+
+# Validated configurations by resolved path, reused while the file is unchanged
+_app_configs = {}
 
 
 def find_config_path(config_filename="config.json"):
@@ -51,6 +76,208 @@ def load_configuration(path):
         return None
 
 
+class ConfigError(ValueError):
+    """Raised when a configuration file is missing, unreadable or invalid."""
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = problems
+        super().__init__(f"Invalid configuration {path}: " + "; ".join(problems))
+
+    def __reduce__(self):
+        # Rebuilt from its arguments, so it can be raised in a worker process
+        return ConfigError, (self.path, self.problems)
+
+
+def url_host(url_or_path):
+    """
+    Returns the network location of a calendar URL, used to group calendars by host.
+    Local file paths have no network location and share the empty host.
+    """
+    return urlparse(url_or_path).netloc.lower()
+
+
+def _check_mapping(data, key, problems, prefix, required=True, value_type=None):
+    if key not in data:
+        if required:
+            problems.append(f"missing '{prefix}{key}'")
+        return
+    value = data[key]
+    if not isinstance(value, dict):
+        problems.append(f"'{prefix}{key}' must be an object")
+    elif value_type is not None:
+        for name, item in value.items():
+            if not isinstance(item, value_type):
+                problems.append(f"'{prefix}{key}.{name}' must be a string")
+
+
+def validate_config(data, prefix=""):
+    """
+    Checks a configuration for missing keys and wrong types.
+
+    Args:
+        data (dict): The configuration, as loaded from JSON.
+        prefix (str, optional): Prefix of the reported key names, e.g. 'tenants.alice.'.
+
+    Returns:
+        list: Human-readable problems; empty if the configuration is valid.
+    """
+    if not isinstance(data, dict):
+        return [f"'{prefix or 'configuration'}' must be an object"]
+
+    problems = []
+    if "tenants" in data and not prefix:
+        _check_mapping(data, "tenants", problems, prefix)
+        if not problems:
+            shared = {key: value for key, value in data.items() if key != "tenants"}
+            for name, section in data["tenants"].items():
+                if not isinstance(section, dict):
+                    problems.append(f"'tenants.{name}' must be an object")
+                    continue
+                problems.extend(
+                    validate_config({**shared, **section}, f"tenants.{name}.")
+                )
+        return problems
+
+    _check_mapping(data, "telegram", problems, prefix)
+    telegram = data.get("telegram")
+    if isinstance(telegram, dict):
+        if not isinstance(telegram.get("api_token"), str):
+            problems.append(f"missing '{prefix}telegram.api_token'")
+        chat_id = telegram.get("chat_id")
+        chat_ids = chat_id if isinstance(chat_id, list) else [chat_id]
+        if not chat_ids or not all(isinstance(c, (str, int)) for c in chat_ids):
+            problems.append(
+                f"'{prefix}telegram.chat_id' must be a chat ID or a list of chat IDs"
+            )
+    _check_mapping(data, "airbnb_urls", problems, prefix, value_type=str)
+    _check_mapping(
+        data, "mock_airbnb_urls", problems, prefix, required=False, value_type=str
+    )
+    if not isinstance(data.get("mailboxes"), list):
+        problems.append(f"missing '{prefix}mailboxes' (a list of mailboxes)")
+    _check_mapping(data, "special_mailboxes", problems, prefix, value_type=str)
+    if data.get("message_format", MESSAGE_FORMATS[-1]) not in MESSAGE_FORMATS:
+        problems.append(
+            f"'{prefix}message_format' must be one of {', '.join(MESSAGE_FORMATS)}"
+        )
+    for section in OPTIONAL_SECTIONS:
+        _check_mapping(data, section, problems, prefix, required=False)
+    return problems
+
+
+class AppConfig(Mapping):
+    """
+    Validated, read-only configuration with precomputed lookups.
+
+    It behaves as the configuration dictionary, so it can be passed wherever a config dict is
+    expected. Apartment IDs are interned, and the special-mailbox lookup and the grouping of
+    calendar URLs by host are computed once.
+
+    Raises:
+        ConfigError: If the configuration is invalid.
+    """
+
+    def __init__(self, data, path=None):
+        problems = validate_config(data)
+        if problems:
+            raise ConfigError(path, problems)
+        data = dict(data)
+        for key in ("airbnb_urls", "mock_airbnb_urls", "special_mailboxes"):
+            if key in data:
+                data[key] = {sys.intern(k): v for k, v in data[key].items()}
+        self._data = data
+        self.path = path
+
+        self.apartments = tuple(data.get("airbnb_urls", {}))
+        self.mailboxes = tuple(data.get("mailboxes", ()))
+        self.special_mailboxes = data.get("special_mailboxes", {})
+        self.message_format = data.get("message_format", MESSAGE_FORMATS[-1])
+        self.hosts = {}
+        for apt_number, url_or_path in data.get("airbnb_urls", {}).items():
+            self.hosts.setdefault(url_host(url_or_path), []).append(apt_number)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def with_mock_urls(self):
+        """
+        Returns the configuration with the mock calendars in place of the Airbnb URLs.
+
+        Raises:
+            ConfigError: If the configuration has no "mock_airbnb_urls".
+        """
+        if "mock_airbnb_urls" not in self._data:
+            raise ConfigError(self.path, ["missing 'mock_airbnb_urls'"])
+        return AppConfig(
+            {**self._data, "airbnb_urls": self._data["mock_airbnb_urls"]}, self.path
+        )
+
+
+def load_app_config(path):
+    """
+    Loads and validates a configuration file. The result is cached by path and reused until
+    the file's modification time or size changes, so repeated calls cost a single stat().
+
+    Args:
+        path (str | Path): The file path to the JSON configuration file.
+
+    Returns:
+        AppConfig: The validated configuration.
+
+    Raises:
+        ConfigError: If the file cannot be read, is not valid JSON or fails validation.
+    """
+    key = os.path.abspath(path)
+    try:
+        stat = os.stat(key)
+    except OSError as e:
+        raise ConfigError(path, [str(e)]) from e
+
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _app_configs.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    try:
+        with open(key, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ConfigError(path, [str(e)]) from e
+
+    config = AppConfig(data, path)
+    _app_configs[key] = (version, config)
+    return config
+
+
+def load_default_config(config_filename="config.json"):
+    """
+    Finds and loads the configuration used by the scripts' command-line entry points.
+
+    Args:
+        config_filename (str): The name of the configuration file to search for.
+
+    Returns:
+        AppConfig: The validated configuration, or None if it is missing or invalid (the
+                   reason is logged).
+    """
+    config_path = find_config_path(config_filename)
+    if not config_path:
+        logging.error("Configuration file not found.")
+        return None
+    try:
+        return load_app_config(config_path)
+    except ConfigError as e:
+        logging.error(str(e))
+        return None
+
+
 def json_serial(obj):
     """
     JSON serializer for objects not serializable by default json code. Handles conversion of date and datetime objects to string.
@@ -73,12 +300,12 @@ def print_pretty_json(data):
     Modifies dictionary keys to ensure they are serializable to JSON format by converting date and datetime objects to strings.
 
     Args:
-        data (dict | Any): The data to print, typically a dictionary. If data is a dictionary, its keys are processed to ensure they are strings.
+        data (dict | Mapping | Any): The data to print, typically a dictionary. If data is a mapping, its keys are processed to ensure they are strings.
 
     Returns:
         None: This function does not return anything; it directly prints to the console. Logs an error if serialization fails.
     """
-    if isinstance(data, dict):
+    if isinstance(data, Mapping):
         # Ensure all dict keys are strings, convert if necessary
         new_data = {
             json_serial(k) if not isinstance(k, str) else k: v for k, v in data.items()
@@ -93,14 +320,8 @@ def print_pretty_json(data):
 
 
 if __name__ == "__main__":
-    config_path = find_config_path()
-    if config_path:
-        print(f"Configuration file found at: {config_path}")
-        config = load_configuration(config_path)
-        if config is not None:
-            print("Configuration loaded successfully:")
-            print_pretty_json(config)
-        else:
-            print(f"Failed to load configuration from {config_path}.")
-    else:
-        print("Configuration file not found.")
+    config = load_default_config()
+    if config is not None:
+        print(f"Configuration file found at: {config.path}")
+        print("Configuration loaded successfully:")
+        print_pretty_json(config)
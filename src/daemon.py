@@ -0,0 +1,415 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+from airbnb_data import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PER_HOST_LIMIT,
+    event_filter_from_config,
+    fetch_all_calendars,
+    parse_apartment_events,
+)
+from change_tracker import (
+    build_snapshot,
+    diff_snapshots,
+    has_changes,
+    load_snapshot,
+    save_snapshot,
+    snapshot_path_from_config,
+)
+from config_utils import ConfigError, load_app_config
+from event_cache import ParsedEventCache
+from fragment_cache import FragmentCache
+from http_cache import HTTPCache
+from http_transport import configure_transport
+from message_format import (
+    FORMAT_MAILBOXES,
+    format_changes_message,
+    format_missing_calendars,
+    render_messages,
+)
+from metrics import configure_metrics, export_metrics
+from reservation_cache import reservations_path_from_config, save_reservations
+from reservation_index import ReservationIndex
+from telegram_delivery import deliver_message, telegram_api_base, telegram_chat_ids
+
+# Defaults for daemon mode, overridable via config["daemon"]
+DEFAULT_POLL_INTERVAL = 15 * 60  # Seconds between two polls of the same calendar
+DEFAULT_JITTER = 60  # Maximum random shift of every poll, in seconds
+DEFAULT_DIGEST_TIME = "08:00"  # Local time of the daily digest
+DEFAULT_CONFIG_CHECK_INTERVAL = 30  # Seconds between two checks of the config file
+DIGEST_RETRY_DELAY = 60  # Delay of the digest while calendars are still being polled
+DEFAULT_DIGEST_MAX_DELAY = (
+    15 * 60
+)  # Seconds after which the digest is sent without them
+
+
+class Scheduler:
+    """
+    Minimal time-ordered task queue backed by a heap.
+    """
+
+    def __init__(self):
+        self._queue = []
+        # Tie-breaker keeping FIFO order for tasks due at the same time
+        self._counter = itertools.count()
+
+    def schedule(self, when, task, *args):
+        """
+        Schedules a task.
+
+        Args:
+            when (float): Epoch time at which the task is due.
+            task (str): Name of the task.
+            *args: Arguments passed along with the task.
+        """
+        heapq.heappush(self._queue, (when, next(self._counter), task, args))
+
+    def next_due(self):
+        """Returns the epoch time of the next task, or None if the queue is empty."""
+        return self._queue[0][0] if self._queue else None
+
+    def pop_due(self, now):
+        """
+        Removes and returns every task due at the given time.
+
+        Args:
+            now (float): The current epoch time.
+
+        Returns:
+            list: (task, args) tuples in due order.
+        """
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, _, task, args = heapq.heappop(self._queue)
+            due.append((task, args))
+        return due
+
+
+def next_digest_time(digest_time, now=None):
+    """
+    Computes the next occurrence of a local time of day.
+
+    Args:
+        digest_time (str): Time of day as 'HH:MM'.
+        now (datetime, optional): Reference time, defaults to the current local time.
+
+    Returns:
+        float: The epoch time of the next occurrence, strictly after now.
+    """
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in digest_time.split(":"))
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+class PollingDaemon:
+    """
+    Long-running process that polls every calendar on its own schedule and sends the digest once
+    a day, keeping caches, imports and connections warm between runs.
+
+    The configuration file is re-read only when its modification time changes. SIGTERM and
+    SIGINT stop the loop after the task currently running.
+    """
+
+    def __init__(self, config_path, days, use_mock=False, changes_only=False):
+        self.config_path = config_path
+        self.days = days
+        self.use_mock = use_mock
+        self.changes_only = changes_only
+        self.config = None
+        self.scheduler = Scheduler()
+        self.stop_event = threading.Event()
+        self.events_by_apartment = {}
+        self._config_mtime = None
+        self._poll_tokens = {}  # Latest poll token per apartment; older tasks are stale
+        self._token_counter = itertools.count()
+        self._http_cache = None
+        self._event_cache = None
+        self._fragment_cache = None
+        self._digest_postponed_at = None  # When the pending digest was first postponed
+
+    def _daemon_config(self, key, default):
+        return self.config.get("daemon", {}).get(key, default)
+
+    def _poll_delay(self, apt_number):
+        interval = self._daemon_config("poll_intervals", {}).get(
+            apt_number, self._daemon_config("poll_interval", DEFAULT_POLL_INTERVAL)
+        )
+        jitter = self._daemon_config("jitter", DEFAULT_JITTER)
+        return max(1, interval + random.uniform(-jitter, jitter))
+
+    def reload_config(self):
+        """
+        Reloads the configuration if the file changed since it was last read, and schedules an
+        immediate poll for apartments that are new or whose calendar URL changed.
+
+        Returns:
+            bool: True if a new configuration was loaded.
+        """
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+        except OSError as e:
+            logging.error(f"Cannot access configuration {self.config_path}: {e}")
+            return False
+        if mtime == self._config_mtime:
+            return False
+
+        self._config_mtime = mtime
+        try:
+            config = load_app_config(self.config_path)
+            if self.use_mock:
+                config = config.with_mock_urls()
+        except ConfigError as e:
+            logging.error(f"{e}. Keeping the previous configuration.")
+            return False
+
+        old_urls = self.config.get("airbnb_urls", {}) if self.config else {}
+        self.config = config
+        configure_transport(config)
+        configure_metrics(config)
+        self._http_cache = HTTPCache.from_config(config)
+        self._event_cache = ParsedEventCache.from_config(config)
+        self._fragment_cache = FragmentCache.from_config(config)
+
+        urls = config.get("airbnb_urls", {})
+        jitter = self._daemon_config("jitter", DEFAULT_JITTER)
+        now = time.time()
+        for apt_number in list(self._poll_tokens):
+            if apt_number not in urls:
+                del self._poll_tokens[apt_number]
+                self.events_by_apartment.pop(apt_number, None)
+        for apt_number, url_or_path in urls.items():
+            if old_urls.get(apt_number) != url_or_path:
+                token = next(self._token_counter)
+                self._poll_tokens[apt_number] = token
+                # Spread the first polls so calendars are not all requested at once
+                when = now + random.uniform(0, min(jitter, 5))
+                self.scheduler.schedule(when, "poll", apt_number, token)
+
+        logging.info(f"Configuration loaded from {self.config_path}")
+        return True
+
+    def poll(self, due_polls):
+        """
+        Fetches and parses the calendars of the given apartments concurrently, then schedules
+        their next polls.
+
+        Args:
+            due_polls (list): (apt_number, token) tuples of the polls that are due.
+        """
+        urls = self.config.get("airbnb_urls", {})
+        current = [
+            apt_number
+            for apt_number, token in due_polls
+            if self._poll_tokens.get(apt_number) == token
+        ]
+        if not current:
+            return
+
+        fetch_config = self.config.get("fetch", {})
+        calendars = fetch_all_calendars(
+            {apt_number: urls[apt_number] for apt_number in current},
+            max_workers=fetch_config.get("max_workers", DEFAULT_MAX_WORKERS),
+            per_host_limit=fetch_config.get("per_host_limit", DEFAULT_PER_HOST_LIMIT),
+            cache=self._http_cache,
+        )
+        polled = {}
+        for apt_number in current:
+            calendar_data = calendars.get(apt_number)
+            try:
+                if calendar_data:
+                    polled[apt_number] = parse_apartment_events(
+                        apt_number, calendar_data, cache=self._event_cache
+                    )
+            except Exception as e:
+                # E.g. an HTML error page served with a 200 status
+                logging.error(f"Error parsing calendar for apartment {apt_number}: {e}")
+            finally:
+                self.scheduler.schedule(
+                    time.time() + self._poll_delay(apt_number),
+                    "poll",
+                    apt_number,
+                    self._poll_tokens[apt_number],
+                )
+        self.events_by_apartment.update(polled)
+        if polled:
+            save_reservations(
+                reservations_path_from_config(self.config),
+                self.events_by_apartment,
+                urls,
+            )
+
+        if self.changes_only and polled:
+            self.send_changes()
+
+    def _counted_events(self, apartments):
+        # The polled events are kept whole for the reservations file; only the configured
+        # kinds count as stays, as in a one-shot run
+        event_filter = event_filter_from_config(self.config)
+        return {
+            apt_number: event_filter.select(self.events_by_apartment[apt_number])
+            for apt_number in apartments
+            if apt_number in self.events_by_apartment
+        }
+
+    def send_changes(self):
+        """Sends the reservation changes since the last saved snapshot, if any."""
+        snapshot_path = snapshot_path_from_config(self.config)
+        previous = load_snapshot(snapshot_path)
+        urls = self.config.get("airbnb_urls", {})
+        current = build_snapshot(self._counted_events(urls), previous, urls)
+        if previous is not None:
+            changes = diff_snapshots(previous, current)
+            if has_changes(changes):
+                self._send(format_changes_message(changes))
+        save_snapshot(snapshot_path, current)
+
+    def send_digest(self, partial=False):
+        """
+        Sends the digest built from the calendars polled so far.
+
+        Args:
+            partial (bool, optional): Whether to send the digest even if some calendars have
+                                      not been polled successfully yet. The missing apartments
+                                      are then logged and listed at the top of the message.
+
+        Returns:
+            bool: False if some calendars have not been polled yet and the digest was postponed.
+        """
+        urls = self.config.get("airbnb_urls", {})
+        missing = [
+            apt_number
+            for apt_number in urls
+            if apt_number not in self.events_by_apartment
+        ]
+        if missing and not partial:
+            return False
+
+        events = self._counted_events(urls)
+        start_date = datetime.now().date()
+        reservations = ReservationIndex(events).table_between(
+            start_date, start_date + timedelta(days=self.days)
+        )
+        text = ""
+        if missing:
+            logging.error(f"Sending the digest without the calendars of {missing}")
+            text = format_missing_calendars(missing)
+        if reservations:
+            message_format = self.config.get("message_format", FORMAT_MAILBOXES)
+            text += render_messages(
+                reservations,
+                (message_format,),
+                self.config["mailboxes"],
+                self.config["special_mailboxes"],
+                self._fragment_cache,
+            )[message_format]
+        else:
+            logging.info("No reservations found.")
+        if text:
+            self._send(text)
+        return True
+
+    def _send(self, text):
+        results = deliver_message(
+            text,
+            self.config["telegram"]["api_token"],
+            telegram_chat_ids(self.config),
+            telegram_api_base(self.config),
+        )
+        for result in results:
+            if not result.ok:
+                logging.error(
+                    f"Failed to send part {result.part}/{result.parts} to chat {result.chat_id}: {result.error}"
+                )
+
+    def stop(self, signum=None, frame=None):
+        """Requests the daemon loop to stop; used as the SIGTERM/SIGINT handler."""
+        logging.info("Stopping daemon.")
+        self.stop_event.set()
+
+    def run_task(self, task, args):
+        """
+        Runs a non-poll task and schedules its next occurrence.
+
+        Args:
+            task (str): Either 'config' or 'digest'.
+            args (tuple): The arguments scheduled with the task.
+        """
+        if task == "config":
+            self.reload_config()
+            interval = self._daemon_config(
+                "config_check_interval", DEFAULT_CONFIG_CHECK_INTERVAL
+            )
+            self.scheduler.schedule(time.time() + interval, "config")
+        elif task == "digest":
+            now = time.time()
+            if self._digest_postponed_at is None:
+                self._digest_postponed_at = now
+            max_delay = self._daemon_config(
+                "digest_max_delay", DEFAULT_DIGEST_MAX_DELAY
+            )
+            # A calendar that keeps failing must not hold the digest back forever
+            if self.send_digest(partial=now - self._digest_postponed_at >= max_delay):
+                self._digest_postponed_at = None
+                digest_time = self._daemon_config("digest_time", DEFAULT_DIGEST_TIME)
+                self.scheduler.schedule(next_digest_time(digest_time), "digest")
+            else:
+                self.scheduler.schedule(now + DIGEST_RETRY_DELAY, "digest")
+
+    def run(self):
+        """
+        Runs the scheduler loop until stop() is called.
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if not self.reload_config() and self.config is None:
+            logging.error("Failed to load configuration.")
+            return
+
+        self.scheduler.schedule(time.time(), "config")
+        if not self.changes_only:
+            digest_time = self._daemon_config("digest_time", DEFAULT_DIGEST_TIME)
+            self.scheduler.schedule(next_digest_time(digest_time), "digest")
+
+        while not self.stop_event.is_set():
+            due = self.scheduler.pop_due(time.time())
+            # Due polls are batched so they are fetched concurrently
+            due_polls = [args for task, args in due if task == "poll"]
+            try:
+                if due_polls:
+                    self.poll(due_polls)
+                for task, args in due:
+                    if task != "poll":
+                        self.run_task(task, args)
+            except Exception:
+                logging.exception("Daemon task failed")
+            if due:
+                export_metrics(self.config)
+
+            next_due = self.scheduler.next_due()
+            timeout = None if next_due is None else max(0, next_due - time.time())
+            self.stop_event.wait(timeout)
+
+
+def run_daemon(config_path, days, use_mock=False, changes_only=False):
+    """
+    Runs the application as a long-lived polling daemon until SIGTERM or SIGINT.
+
+    Args:
+        config_path (Path): Path of the configuration file, re-read whenever it changes.
+        days (int): The number of days covered by the daily digest.
+        use_mock (bool, optional): Whether to poll the mock calendars. Defaults to False.
+        changes_only (bool, optional): Whether to send reservation changes after every poll
+                                       instead of the daily digest. Defaults to False.
+    """
+    PollingDaemon(config_path, days, use_mock, changes_only).run()
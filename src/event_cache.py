@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+from datetime import date
+from pathlib import Path
+
+from http_cache import content_hash
+from ics_parser import CalendarEvent
+
+# Defaults for the parsed event cache, overridable via config["event_cache"]
+DEFAULT_CACHE_DIR = ".cache/events"
+DEFAULT_MAX_ENTRIES = 1000
+
+
+class ParsedEventCache:
+    """
+    Content-addressed on-disk cache of parsed calendar events.
+
+    Entries are keyed by the hash of the calendar body, so identical calendars are parsed once
+    no matter where they come from. Each event is stored as a compact
+    (uid, begin ordinal, end ordinal, kind, summary) tuple, so cached events equal freshly
+    parsed ones. The file modification time records the last
+    use, and the least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a cache from the "event_cache" section of the configuration.
+
+        Args:
+            config (dict): Configuration dictionary.
+
+        Returns:
+            ParsedEventCache: The configured cache, or None if the section is missing.
+        """
+        cache_config = config.get("event_cache")
+        if cache_config is None:
+            return None
+        return cls(
+            directory=cache_config.get("directory", DEFAULT_CACHE_DIR),
+            max_entries=cache_config.get("max_entries", DEFAULT_MAX_ENTRIES),
+        )
+
+    def _entry_path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, calendar_data):
+        """
+        Returns the cached events of a calendar body and marks the entry as recently used.
+
+        Args:
+            calendar_data (str): The calendar body.
+
+        Returns:
+            list: The cached CalendarEvent records, or None if the body has not been parsed yet.
+        """
+        path = self._entry_path(content_hash(calendar_data))
+        try:
+            with open(path, "r") as f:
+                rows = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Ignoring unreadable event cache entry {path}: {e}")
+            return None
+        try:
+            return [
+                CalendarEvent(
+                    uid, date.fromordinal(begin), date.fromordinal(end), kind, summary
+                )
+                for uid, begin, end, kind, summary in rows
+            ]
+        except ValueError:
+            # Entries written before summaries were stored are parsed again
+            return None
+
+    def put(self, calendar_data, events):
+        """
+        Stores the parsed events of a calendar body.
+
+        Args:
+            calendar_data (str): The calendar body.
+            events (list): The CalendarEvent records parsed from it.
+        """
+        rows = [
+            (
+                event.uid,
+                event.begin.toordinal(),
+                event.end.toordinal(),
+                event.kind,
+                event.summary,
+            )
+            for event in events
+        ]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(content_hash(calendar_data))
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(rows, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Removes least recently used entries until at most max_entries remain."""
+        entries = list(self.directory.glob("*.json"))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[: len(entries) - self.max_entries]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
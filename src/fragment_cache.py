@@ -0,0 +1,119 @@
+import hashlib
+from collections import OrderedDict
+
+from mailbox_allocator import MailboxAllocator
+from message_format import render_mailbox_day
+from reservation_table import iter_reservation_days
+
+# Default number of rendered days kept, overridable via config["fragment_cache"]
+DEFAULT_MAX_FRAGMENTS = 4096
+
+
+def _token(value):
+    return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=16).digest()
+
+
+class FragmentCache:
+    """
+    In-memory cache of the days of the mailboxes message, so that a new digest only renders the
+    days that changed since a previous one.
+
+    A day's block depends on its check-ins and check-outs and on the mailboxes held when the day
+    starts, which all earlier days determine. Every entry is therefore keyed by the day, its
+    movements and a hash of the allocator state before it, and stores the block together with
+    the state after it. On a run of cache hits the states are chained from entry to entry
+    without running the allocator; the allocator is only restored from the last state before a
+    day has to be rendered again. A change on one day thus re-renders that day and the following
+    days only until the assignments are the same as before.
+
+    The cache is reset when the mailbox configuration changes. Entries for days before the
+    first day of the latest digest are dropped, and the least recently used entries are evicted
+    beyond max_entries.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._config_token = None
+        self._first_day = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a cache from the "fragment_cache" section of the configuration.
+
+        Args:
+            config (dict): Configuration dictionary.
+
+        Returns:
+            FragmentCache: The configured cache, or None if the section is missing.
+        """
+        cache_config = config.get("fragment_cache")
+        if cache_config is None:
+            return None
+        return cls(cache_config.get("max_entries", DEFAULT_MAX_FRAGMENTS))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, reservations, mailboxes, special_mailboxes):
+        """
+        Renders the mailboxes message, reusing the days rendered by previous calls.
+
+        Args:
+            reservations (ReservationTable | dict): Check-ins and check-outs by date.
+            mailboxes (list): General mailboxes, in order of preference.
+            special_mailboxes (dict): A dictionary mapping apartments to their dedicated mailbox.
+
+        Returns:
+            str: The same message as render_messages renders for FORMAT_MAILBOXES.
+        """
+        config_token = _token((list(mailboxes), sorted(special_mailboxes.items())))
+        if config_token != self._config_token:
+            self._entries.clear()
+            self._config_token = config_token
+
+        allocator = MailboxAllocator(mailboxes, special_mailboxes)
+        state = allocator.state()
+        state_token = _token(state)
+        # Whether the allocator is in the state identified by state_token
+        restored = True
+        parts = []
+        first_day = None
+
+        for day, checkins, checkouts in iter_reservation_days(reservations):
+            ordinal = day.toordinal()
+            if first_day is None:
+                first_day = ordinal
+            key = (state_token, ordinal, tuple(checkins), tuple(checkouts))
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                block, state_token, state = entry
+                restored = False
+            else:
+                self.misses += 1
+                if not restored:
+                    allocator.restore(state)
+                    restored = True
+                assigned = allocator.allocate_day(checkins, checkouts)
+                block = render_mailbox_day(day, checkins, checkouts, assigned)
+                state = allocator.state()
+                state_token = _token(state)
+                self._entries[key] = (block, state_token, state)
+            parts.append(block)
+
+        self._evict(first_day)
+        return "".join(parts)
+
+    def _evict(self, first_day):
+        if first_day is not None and first_day != self._first_day:
+            # The window moved forward: days before its start will not be rendered again
+            for key in [key for key in self._entries if key[1] < first_day]:
+                del self._entries[key]
+            self._first_day = first_day
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
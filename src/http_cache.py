@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+# Defaults for the on-disk HTTP cache, overridable via config["http_cache"]
+DEFAULT_CACHE_DIR = ".cache/http"
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # One week, in seconds
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB of cached bodies
+
+INDEX_FILENAME = "index.json"
+
+
+def content_hash(body):
+    """
+    Computes the hash used to identify a calendar body.
+
+    Args:
+        body (str): The body to hash.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the UTF-8 encoded body.
+    """
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class HTTPCache:
+    """
+    Persistent cache of downloaded calendar bodies supporting conditional GET requests.
+
+    Each URL is stored together with its ETag, Last-Modified header and a content hash. Entries
+    older than max_age are discarded, and the least recently used entries are evicted whenever
+    the total size of the cached bodies exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_CACHE_DIR,
+        max_age=DEFAULT_MAX_AGE,
+        max_bytes=DEFAULT_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a cache from the "http_cache" section of the configuration.
+
+        Args:
+            config (dict): Configuration dictionary.
+
+        Returns:
+            HTTPCache: The configured cache, or None if the section is missing.
+        """
+        cache_config = config.get("http_cache")
+        if cache_config is None:
+            return None
+        return cls(
+            directory=cache_config.get("directory", DEFAULT_CACHE_DIR),
+            max_age=cache_config.get("max_age", DEFAULT_MAX_AGE),
+            max_bytes=cache_config.get("max_bytes", DEFAULT_MAX_BYTES),
+        )
+
+    def _index_path(self):
+        return self.directory / INDEX_FILENAME
+
+    def _body_path(self, url):
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{url_hash}.ics"
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Ignoring unreadable HTTP cache index: {e}")
+            return {}
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._index_path().with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _drop(self, url):
+        self._index.pop(url, None)
+        try:
+            self._body_path(url).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _is_expired(self, entry, now):
+        return self.max_age is not None and now - entry["stored_at"] > self.max_age
+
+    def conditional_headers(self, url):
+        """
+        Builds the validator headers to send for a URL that may already be cached.
+
+        Args:
+            url (str): The URL about to be requested.
+
+        Returns:
+            dict: The If-None-Match / If-Modified-Since headers, empty if nothing usable is cached.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry or self._is_expired(entry, time.time()):
+                return {}
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def get(self, url, revalidated=False):
+        """
+        Returns the cached body of a URL and marks it as recently used, typically after a 304.
+
+        Args:
+            url (str): The URL whose body to read.
+            revalidated (bool): Whether the server just confirmed the entry is current, which
+                                restarts its max_age countdown.
+
+        Returns:
+            str: The cached body, or None if it is missing, expired or corrupted.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            now = time.time()
+            if not entry:
+                return None
+            if self._is_expired(entry, now):
+                self._drop(url)
+                self._save_index()
+                return None
+            try:
+                with open(self._body_path(url), "r", encoding="utf-8", newline="") as f:
+                    body = f.read()
+            except OSError:
+                self._drop(url)
+                self._save_index()
+                return None
+            if content_hash(body) != entry["content_hash"]:
+                logging.warning(f"Discarding corrupted cache entry for {url}")
+                self._drop(url)
+                self._save_index()
+                return None
+            entry["last_used"] = now
+            if revalidated:
+                entry["stored_at"] = now
+            self._save_index()
+            return body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Stores a freshly downloaded body together with its validators.
+
+        Args:
+            url (str): The requested URL.
+            body (str): The response body.
+            etag (str, optional): The ETag response header.
+            last_modified (str, optional): The Last-Modified response header.
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._body_path(url), "w", encoding="utf-8", newline="") as f:
+                f.write(body)
+            now = time.time()
+            self._index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash(body),
+                "size": len(body.encode("utf-8")),
+                "stored_at": now,
+                "last_used": now,
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits within max_bytes."""
+        if self.max_bytes is None:
+            return
+        total = sum(entry["size"] for entry in self._index.values())
+        for url, entry in sorted(self._index.items(), key=lambda x: x[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            self._drop(url)
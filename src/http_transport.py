@@ -0,0 +1,118 @@
+import threading
+
+from metrics import METRICS
+
+# Defaults for the shared HTTP transport, overridable via config["http"]
+DEFAULT_SETTINGS = {
+    "connect_timeout": 5,  # Seconds to establish a connection
+    "read_timeout": 30,  # Seconds to wait for data once connected
+    "retries": 3,  # Retries on connection errors, and on read errors and 5xx for GET
+    "backoff_factor": 0.5,  # Exponential backoff base, in seconds
+    "backoff_jitter": 0.5,  # Maximum random seconds added to every backoff
+    "pool_size": 10,  # Keep-alive connections kept per host
+}
+
+# Server errors worth retrying; 429 is left to the callers, which honor retry_after
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_settings = dict(DEFAULT_SETTINGS)
+
+
+def _build_session(settings):
+    # Deferred so that runs that never touch the network do not pay for importing requests
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=settings["retries"],
+        connect=settings["retries"],
+        read=settings["retries"],
+        status=settings["retries"],
+        backoff_factor=settings["backoff_factor"],
+        backoff_jitter=settings["backoff_jitter"],
+        status_forcelist=RETRY_STATUSES,
+        # Read errors and 5xx responses are only retried for idempotent methods: Telegram may
+        # already have accepted a sendMessage POST, which would then be delivered twice.
+        # Connect errors are retried for every method, since nothing was sent yet.
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=settings["pool_size"],
+        pool_maxsize=settings["pool_size"],
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def configure_transport(config):
+    """
+    Applies the "http" section of the configuration to the shared transport. The pooled session
+    is only rebuilt when the settings actually change, so open connections are kept otherwise.
+
+    Args:
+        config (dict): Configuration dictionary.
+    """
+    global _session, _settings
+    settings = {**DEFAULT_SETTINGS, **config.get("http", {})}
+    with _lock:
+        if settings != _settings:
+            if _session is not None:
+                _session.close()
+            _session = None
+            _settings = settings
+
+
+def get_session():
+    """
+    Returns the shared keep-alive session, creating it on first use.
+
+    Returns:
+        requests.Session: A session with pooled connections and retries with backoff.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session(_settings)
+        return _session
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the shared session with the configured connect/read timeouts.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The URL to request.
+        **kwargs: Extra arguments for requests.Session.request; an explicit timeout wins.
+
+    Returns:
+        requests.Response: The response, after retries on connection errors and, for
+                           idempotent methods, on read errors and 5xx statuses.
+    """
+    kwargs.setdefault(
+        "timeout", (_settings["connect_timeout"], _settings["read_timeout"])
+    )
+    response = get_session().request(method, url, **kwargs)
+    if METRICS.enabled:
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            METRICS.incr("http_retries", len(retries.history))
+    return response
+
+
+def get(url, **kwargs):
+    """Sends a GET request through the shared transport. See request()."""
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Sends a POST request through the shared transport. See request()."""
+    return request("POST", url, **kwargs)
@@ -0,0 +1,306 @@
+import logging
+from collections import Counter, namedtuple
+from datetime import date
+
+# Event kinds derived from the SUMMARY of each VEVENT
+KIND_RESERVED = "reserved"
+KIND_BLOCKED = "blocked"
+
+# Properties whose semantics the fast path does not implement
+UNSUPPORTED_PROPERTIES = frozenset(
+    {"RRULE", "RDATE", "EXRULE", "EXDATE", "RECURRENCE-ID", "DURATION"}
+)
+
+# Lightweight replacement for ics.Event holding only what the bot needs
+CalendarEvent = namedtuple(
+    "CalendarEvent", ["uid", "begin", "end", "kind", "summary"], defaults=(None,)
+)
+
+
+class UnsupportedCalendarError(ValueError):
+    """Raised when a calendar uses features the fast path cannot parse."""
+
+
+# Reasons recorded in the skip counts of an EventFilter
+SKIPPED_KIND = "kind"
+SKIPPED_WINDOW = "window"
+
+
+class EventFilter:
+    """
+    The date window and event kinds a caller needs, checked while parsing so that other events
+    are discarded before any date object or record is built for them.
+
+    An event is kept when its kind is wanted and its stay overlaps the window, i.e. it checks
+    in, checks out or is in-house on at least one day of it, both ends inclusive.
+    """
+
+    __slots__ = ("start", "end", "kinds", "_start_key", "_end_key")
+
+    def __init__(self, start=None, end=None, kinds=None):
+        """
+        Args:
+            start (date, optional): First day of the window; unbounded if None.
+            end (date, optional): Last day of the window; unbounded if None.
+            kinds (Iterable, optional): The wanted kinds, e.g. (KIND_RESERVED,); all if None.
+        """
+        self.start = start
+        self.end = end
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        # Dates as the YYYYMMDD prefix of DATE and DATE-TIME values, compared as strings
+        self._start_key = f"{start:%Y%m%d}" if start is not None else None
+        self._end_key = f"{end:%Y%m%d}" if end is not None else None
+
+    def skip_reason(self, begin_value, end_value, kind):
+        """
+        Checks an event from its raw DTSTART and DTEND values.
+
+        Returns:
+            str: SKIPPED_KIND or SKIPPED_WINDOW if the event is not wanted, otherwise None.
+        """
+        if self.kinds is not None and kind not in self.kinds:
+            return SKIPPED_KIND
+        begin_key, end_key = begin_value[:8], end_value[:8]
+        if not (begin_key.isdigit() and end_key.isdigit()):
+            return None  # Left to the parser, which rejects malformed dates
+        if self._end_key is not None and begin_key > self._end_key:
+            return SKIPPED_WINDOW
+        if self._start_key is not None and end_key < self._start_key:
+            return SKIPPED_WINDOW
+        return None
+
+    @property
+    def has_window(self):
+        """Whether the filter drops events outside a date window."""
+        return self.start is not None or self.end is not None
+
+    def kinds_only(self):
+        """Returns a filter with the same kinds and no date window."""
+        return EventFilter(kinds=self.kinds)
+
+    def select(self, events, skipped=None):
+        """
+        Filters events that are already parsed, e.g. read from a cache.
+
+        Args:
+            events (list): CalendarEvent records.
+            skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+        Returns:
+            list: The wanted events, in order.
+        """
+        selected = []
+        for event in events:
+            reason = self.skip_reason(
+                f"{event.begin:%Y%m%d}", f"{event.end:%Y%m%d}", event.kind
+            )
+            if reason is None:
+                selected.append(event)
+            elif skipped is not None:
+                skipped[reason] += 1
+        return selected
+
+
+def event_kind(summary):
+    """
+    Classifies an event from its SUMMARY.
+
+    Args:
+        summary (str): The event summary, e.g. 'Reserved' or 'Airbnb (Not available)'.
+
+    Returns:
+        str: KIND_BLOCKED for blocked or unavailable dates, otherwise KIND_RESERVED.
+    """
+    if summary and "not available" in summary.lower():
+        return KIND_BLOCKED
+    return KIND_RESERVED
+
+
+def unfold_lines(lines):
+    """
+    Joins folded content lines (RFC 5545 section 3.1) into logical lines.
+
+    Args:
+        lines (Iterable[str]): Physical lines, with or without trailing line breaks.
+
+    Yields:
+        str: Logical content lines with continuation lines appended.
+    """
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def _split_property(line):
+    """
+    Splits a content line into its upper-cased name, parameter string and value.
+    Colons inside quoted parameter values do not end the parameter section.
+    """
+    if '"' in line:
+        in_quotes = False
+        for i, char in enumerate(line):
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ":" and not in_quotes:
+                head, value = line[:i], line[i + 1 :]
+                break
+        else:
+            raise UnsupportedCalendarError(f"Malformed content line: {line!r}")
+    else:
+        head, sep, value = line.partition(":")
+        if not sep:
+            raise UnsupportedCalendarError(f"Malformed content line: {line!r}")
+    name, _, params = head.partition(";")
+    return name.upper(), params, value
+
+
+def _parse_date(value):
+    """
+    Returns the calendar date of a DATE or DATE-TIME value.
+
+    The date part of a DATE-TIME is the date in its own time zone (UTC for a trailing 'Z',
+    the TZID zone or floating time otherwise), which matches event.begin.date() in ics.
+    """
+    try:
+        return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        raise UnsupportedCalendarError(f"Unsupported date value: {value!r}")
+
+
+def _unescape_text(value):
+    if "\\" not in value:
+        return value
+    return (
+        value.replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\\\", "\\")
+    )
+
+
+def iter_vevents(lines, event_filter=None, skipped=None):
+    """
+    Streams the VEVENTs of a calendar, extracting only DTSTART, DTEND, UID and SUMMARY.
+
+    Args:
+        lines (Iterable[str]): The physical lines of an ICS calendar.
+        event_filter (EventFilter, optional): Only events it accepts are yielded.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    Yields:
+        CalendarEvent: One record per VEVENT, with begin and end as date objects.
+
+    Raises:
+        UnsupportedCalendarError: If the calendar uses features the fast path does not handle,
+                                  such as recurrence rules or DURATION instead of DTEND.
+    """
+    properties = None
+    depth = 0  # Nesting level of sub-components (e.g. VALARM) inside the current VEVENT
+
+    for line in unfold_lines(lines):
+        name, params, value = _split_property(line)
+
+        if name == "BEGIN":
+            if properties is not None:
+                depth += 1
+            elif value.upper() == "VEVENT":
+                properties = {}
+            continue
+
+        if name == "END":
+            if properties is None:
+                continue
+            if depth:
+                depth -= 1
+                continue
+            if "DTSTART" not in properties or "DTEND" not in properties:
+                raise UnsupportedCalendarError("VEVENT without DTSTART/DTEND")
+            summary = _unescape_text(properties.get("SUMMARY", ""))
+            kind = event_kind(summary)
+            if event_filter is not None:
+                reason = event_filter.skip_reason(
+                    properties["DTSTART"], properties["DTEND"], kind
+                )
+                if reason is not None:
+                    if skipped is not None:
+                        skipped[reason] += 1
+                    properties = None
+                    continue
+            yield CalendarEvent(
+                uid=properties.get("UID"),
+                begin=_parse_date(properties["DTSTART"]),
+                end=_parse_date(properties["DTEND"]),
+                kind=kind,
+                summary=summary,
+            )
+            properties = None
+            continue
+
+        if properties is None or depth:
+            continue
+        if name in UNSUPPORTED_PROPERTIES:
+            raise UnsupportedCalendarError(f"Unsupported property {name}")
+        if name in ("DTSTART", "DTEND", "UID", "SUMMARY"):
+            properties[name] = value
+
+
+def parse_with_ics(calendar_data):
+    """
+    Parses a calendar with the full ics library, for calendars the fast path rejects.
+
+    Args:
+        calendar_data (str): Calendar data in ICS format.
+
+    Returns:
+        list: A list of CalendarEvent records.
+    """
+    from ics import Calendar
+
+    return [
+        CalendarEvent(
+            uid=event.uid,
+            begin=event.begin.date(),
+            end=event.end.date(),
+            kind=event_kind(event.name),
+            summary=event.name,
+        )
+        for event in Calendar(calendar_data).events
+    ]
+
+
+def parse_events(calendar_data, event_filter=None, skipped=None):
+    """
+    Parses calendar data with the fast path, falling back to ics for unsupported calendars.
+
+    Args:
+        calendar_data (str): Calendar data in ICS format.
+        event_filter (EventFilter, optional): Only events it accepts are returned.
+        skipped (Counter, optional): Incremented with the number of events skipped per reason.
+
+    Returns:
+        list: A list of CalendarEvent records in calendar order.
+    """
+    # Counted apart so that a fast parse abandoned halfway does not count twice
+    try:
+        counts = Counter()
+        events = list(iter_vevents(calendar_data.splitlines(), event_filter, counts))
+    except UnsupportedCalendarError as e:
+        logging.info(f"Falling back to the ics parser: {e}")
+        events = parse_with_ics(calendar_data)
+        if event_filter is None:
+            return events
+        counts = Counter()
+        events = event_filter.select(events, counts)
+    if skipped is not None:
+        skipped.update(counts)
+    return events
@@ -0,0 +1,155 @@
+import heapq
+from collections import namedtuple
+
+from reservation_table import iter_reservation_days
+
+# Placeholder shown when every mailbox is busy
+UNASSIGNED_MAILBOX = "???"
+
+MailboxAssignment = namedtuple("MailboxAssignment", ["date", "apt_number", "mailbox"])
+
+
+class MailboxAllocator:
+    """
+    Assigns key mailboxes to check-ins, keeping each mailbox busy from the guest's check-in until
+    their check-out.
+
+    Free general mailboxes are kept in a set plus a heap ordered by their position in the
+    configuration, so every assignment and release is O(log m). Mailboxes taken out of order
+    (special mailboxes) leave stale heap entries that are skipped lazily.
+    """
+
+    def __init__(self, mailboxes, special_mailboxes):
+        """
+        Args:
+            mailboxes (list): General mailboxes, in order of preference.
+            special_mailboxes (dict): A dictionary mapping apartments to their dedicated mailbox.
+        """
+        self.special_mailboxes = special_mailboxes
+        self._rank = {mailbox: i for i, mailbox in enumerate(mailboxes)}
+        self._free = set(mailboxes) | set(special_mailboxes.values())
+        self._heap = [(rank, mailbox) for mailbox, rank in self._rank.items()]
+        heapq.heapify(self._heap)
+        self._held = {}  # apt_number -> mailbox currently holding its keys
+
+    def state(self):
+        """
+        Returns a snapshot of the assignments, which together with the configuration determines
+        every later assignment.
+
+        Returns:
+            tuple: Sorted (apt_number, mailbox) pairs of the apartments holding a mailbox.
+        """
+        return tuple(sorted(self._held.items()))
+
+    def restore(self, state):
+        """
+        Resumes from a snapshot returned by state() on an allocator with the same mailboxes.
+
+        Args:
+            state (tuple): (apt_number, mailbox) pairs of the apartments holding a mailbox.
+        """
+        self._held = dict(state)
+        busy = set(self._held.values())
+        self._free = {
+            mailbox
+            for mailbox in (*self._rank, *self.special_mailboxes.values())
+            if mailbox not in busy
+        }
+        self._heap = [
+            (rank, mailbox)
+            for mailbox, rank in self._rank.items()
+            if mailbox in self._free
+        ]
+        heapq.heapify(self._heap)
+
+    def release(self, apt_number):
+        """
+        Frees the mailbox held by an apartment, typically when its guest checks out.
+
+        Args:
+            apt_number (str): The apartment checking out.
+        """
+        mailbox = self._held.pop(apt_number, None)
+        if mailbox is None or mailbox == UNASSIGNED_MAILBOX:
+            return
+        self._free.add(mailbox)
+        if mailbox in self._rank:
+            heapq.heappush(self._heap, (self._rank[mailbox], mailbox))
+
+    def _take(self, apt_number, mailbox):
+        self._free.discard(mailbox)
+        self._held[apt_number] = mailbox
+        return mailbox
+
+    def assign_special(self, apt_number):
+        """
+        Assigns an apartment its dedicated mailbox if it has one and it is free.
+
+        Returns:
+            str: The assigned mailbox, or None if the special mailbox cannot be used.
+        """
+        if apt_number in self._held:
+            return self._held[apt_number]
+        mailbox = self.special_mailboxes.get(apt_number)
+        if mailbox is not None and mailbox in self._free:
+            return self._take(apt_number, mailbox)
+        return None
+
+    def assign(self, apt_number):
+        """
+        Assigns a mailbox to an apartment: its current one, else its special mailbox if free,
+        else the first free general mailbox.
+
+        Returns:
+            str: The assigned mailbox, or UNASSIGNED_MAILBOX if every mailbox is busy.
+        """
+        mailbox = self.assign_special(apt_number)
+        if mailbox is not None:
+            return mailbox
+        while self._heap:
+            _, mailbox = heapq.heappop(self._heap)
+            if mailbox in self._free:
+                return self._take(apt_number, mailbox)
+        self._held[apt_number] = UNASSIGNED_MAILBOX
+        return UNASSIGNED_MAILBOX
+
+    def allocate_day(self, checkins, checkouts):
+        """
+        Processes one day: check-outs free their mailboxes first, then apartments with a special
+        mailbox are served before the others.
+
+        Args:
+            checkins (list): Apartment numbers checking in, in order.
+            checkouts (list): Apartment numbers checking out.
+
+        Returns:
+            list: The mailbox assigned to each check-in, in the same order.
+        """
+        for apt_number in checkouts:
+            self.release(apt_number)
+        for apt_number in checkins:
+            self.assign_special(apt_number)
+        return [self.assign(apt_number) for apt_number in checkins]
+
+
+def assign_mailboxes(reservations, mailboxes, special_mailboxes):
+    """
+    Assigns mailboxes to every check-in of the given reservations.
+
+    Args:
+        reservations (ReservationTable | dict): Check-ins and check-outs by date.
+        mailboxes (list): A list of general mailboxes.
+        special_mailboxes (dict): A dictionary mapping specific apartments to special mailboxes.
+
+    Returns:
+        list: MailboxAssignment records in date order, then check-in order.
+    """
+    allocator = MailboxAllocator(mailboxes, special_mailboxes)
+    assignments = []
+    for day, checkins, checkouts in iter_reservation_days(reservations):
+        for apt_number, mailbox in zip(
+            checkins, allocator.allocate_day(checkins, checkouts)
+        ):
+            assignments.append(MailboxAssignment(day, apt_number, mailbox))
+    return assignments
@@ -1,16 +1,241 @@
 from datetime import datetime, timedelta
-from config_utils import load_configuration, find_config_path
-from airbnb_data import get_airbnb_reservations
-from message_format import (
-    format_basic_message,
-    format_detailed_message,
-    format_detailed_message_assign_mailboxes,
+from config_utils import AppConfig, ConfigError, find_config_path, load_app_config
+from airbnb_data import (
+    event_filter_from_config,
+    get_airbnb_reservations,
+    load_apartment_events,
 )
-from telegram_bot import send_telegram_message
+from change_tracker import (
+    build_snapshot,
+    diff_snapshots,
+    has_changes,
+    load_snapshot,
+    save_snapshot,
+    snapshot_path_from_config,
+)
+from message_format import FORMAT_MAILBOXES, format_changes_message, render_messages
+from http_transport import configure_transport
+from metrics import METRICS, configure_metrics, export_metrics
+from reservation_cache import load_reservations, reservations_path_from_config
+from reservation_index import ReservationIndex
+from reservation_store import ReservationStore
+from telegram_delivery import deliver_message, telegram_api_base, telegram_chat_ids
 import sys
 
 
-def main(config_filename=None, days=7, use_mock=False):
+def report_delivery(results, success_message):
+    """
+    Prints the outcome of a Telegram delivery.
+
+    Args:
+        results (list): DeliveryResult records returned by deliver_message.
+        success_message (str): Message printed when every part was delivered.
+    """
+    failures = [result for result in results if not result.ok]
+    if not failures:
+        print(success_message)
+    for result in failures:
+        print(
+            f"Failed to send part {result.part}/{result.parts} to chat {result.chat_id}: {result.error}"
+        )
+
+
+def build_changes_message(config):
+    """
+    Compares the current calendars with the snapshot of the previous run, saves the new
+    snapshot and builds a compact message with the new, cancelled and moved stays.
+
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs.
+
+    Returns:
+        str: The message, or None on the first run or if there are no changes.
+    """
+    snapshot_path = snapshot_path_from_config(config)
+    previous = load_snapshot(snapshot_path)
+    current = build_snapshot(
+        load_apartment_events(config, event_filter_from_config(config)),
+        previous,
+        config.get("airbnb_urls", {}),
+    )
+    save_snapshot(snapshot_path, current)
+
+    if previous is None:
+        # Nothing to compare with yet, so only the baseline is recorded
+        print(f"Reservation snapshot created at {snapshot_path}.")
+        return None
+
+    changes = diff_snapshots(previous, current)
+    if not has_changes(changes):
+        print("No reservation changes.")
+        return None
+    return format_changes_message(changes)
+
+
+def build_digest(config, days):
+    """
+    Fetches the reservations for the next days and renders the configured message format.
+
+    Args:
+        config (dict): Configuration dictionary.
+        days (int): The number of days to fetch reservations for.
+
+    Returns:
+        str: The digest, or None if there are no reservations.
+    """
+    reservations = get_airbnb_reservations(config, days)
+    if not reservations:
+        print("No reservations found.")
+        return None
+
+    # Render only the format that is sent; one of "basic", "detailed" or "mailboxes"
+    message_format = config.get("message_format", FORMAT_MAILBOXES)
+    return render_messages(
+        reservations,
+        (message_format,),
+        config["mailboxes"],
+        config["special_mailboxes"],
+    )[message_format]
+
+
+def send_changes(config, api_token, chat_ids):
+    """
+    Sends the new, cancelled and moved stays since the previous run, or nothing if there are
+    no changes.
+
+    Args:
+        config (dict): Configuration dictionary containing Airbnb URLs.
+        api_token (str): Telegram bot API token.
+        chat_ids (list): Telegram chat IDs.
+    """
+    message = build_changes_message(config)
+    if message is not None:
+        results = deliver_message(
+            message, api_token, chat_ids, telegram_api_base(config)
+        )
+        report_delivery(results, "Changes sent successfully!")
+
+
+def show_cached_reservations(config, days):
+    """
+    Prints the digest built from the reservations stored by the last live run, or read from the
+    reservation store when one is configured, without fetching any calendar or sending
+    anything, so neither the HTTP nor the iCal stack is loaded.
+
+    Args:
+        config (dict): Configuration dictionary.
+        days (int): The number of days to show reservations for.
+    """
+    start_date = datetime.now().date()
+    end_date = start_date + timedelta(days=days)
+    # Only the kinds counted by a live digest, e.g. no "Airbnb (Not available)" blocks
+    event_filter = event_filter_from_config(config)
+    store = ReservationStore.from_config(config)
+    if store is not None:
+        with store:
+            saved_at = store.checked_at()
+            reservations = store.table_between(
+                start_date, end_date, config["airbnb_urls"], event_filter.kinds
+            )
+        path = store.path
+    else:
+        path = reservations_path_from_config(config)
+        stored = load_reservations(path)
+        if stored is not None:
+            events_by_apartment, saved_at = stored
+            reservations = ReservationIndex(
+                {
+                    apt_number: event_filter.select(events)
+                    for apt_number, events in events_by_apartment.items()
+                }
+            ).table_between(start_date, end_date)
+        else:
+            saved_at = None
+    if saved_at is None:
+        print(f"No stored reservations in {path}; run once without --cached first.")
+        return
+
+    print(f"Reservations as of {saved_at:%Y-%m-%d %H:%M}:")
+    if not reservations:
+        print("No reservations found.")
+        return
+    message_format = config.get("message_format", FORMAT_MAILBOXES)
+    print(
+        render_messages(
+            reservations,
+            (message_format,),
+            config["mailboxes"],
+            config["special_mailboxes"],
+        )[message_format]
+    )
+
+
+def run_once(config, days, changes_only=False):
+    """
+    Fetches the calendars once and sends either the digest or the reservation changes.
+
+    Args:
+        config (dict): Configuration dictionary.
+        days (int): The number of days to fetch reservations for.
+        changes_only (bool, optional): Whether to only send the reservation changes since the previous run. Defaults to False.
+    """
+    # Extract Telegram configuration details
+    api_token = config["telegram"]["api_token"]
+    chat_ids = telegram_chat_ids(config)
+
+    if changes_only:
+        send_changes(config, api_token, chat_ids)
+        return
+
+    # Fetch reservations for the specified number of days from today
+    message = build_digest(config, days)
+    if message is not None:
+        results = deliver_message(
+            message, api_token, chat_ids, telegram_api_base(config)
+        )
+        report_delivery(results, "Messages sent successfully!")
+
+
+def show_cached_digests(config, config_path, days, use_mock=False):
+    """
+    Prints the stored digest of every tenant of a configuration, or of the configuration
+    itself when it has no "tenants" section.
+
+    Args:
+        config (AppConfig): The loaded configuration.
+        config_path (Path): Its file path, which names a single tenant.
+        days (int): The number of days to show reservations for.
+        use_mock (bool, optional): Whether the stored runs used the mock calendars.
+    """
+    if "tenants" in config:
+        from tenants import expand_tenants
+
+        tenants = expand_tenants(config, config_path.stem)
+    else:
+        tenants = [(None, config)]
+
+    for name, tenant_config in tenants:
+        if name is not None:
+            print(f"Tenant {name}:")
+        try:
+            # Tenant sections are validated on their own, with the shared keys merged in
+            tenant_config = AppConfig(tenant_config, config_path)
+            if use_mock:
+                tenant_config = tenant_config.with_mock_urls()
+        except ConfigError as e:
+            print(f"Failed to load configuration: {e}")
+            continue
+        show_cached_reservations(tenant_config, days)
+
+
+def main(
+    config_filename=None,
+    days=7,
+    use_mock=False,
+    changes_only=False,
+    daemon=False,
+    cached=False,
+):
     """
     Main function to run the application with a specified or default configuration file.
 
@@ -18,6 +243,9 @@ def main(config_filename=None, days=7, use_mock=False):
         config_filename (str, optional): The configuration file to use. If None, defaults to 'config.json'.
         days (int, optional): The number of days to fetch reservations for. Defaults to 600.
         use_mock (bool, optional): Whether to use mock data or not. Defaults to False.
+        changes_only (bool, optional): Whether to only send the reservation changes since the previous run. Defaults to False.
+        daemon (bool, optional): Whether to keep running and poll the calendars on a schedule instead of running once. Defaults to False.
+        cached (bool, optional): Whether to only print the digest from the reservations stored by the last run. Defaults to False.
     """
     config_path = find_config_path(
         config_filename if config_filename else "config.json"
@@ -27,37 +255,45 @@ def main(config_filename=None, days=7, use_mock=False):
         print("Configuration file not found.")
         return
 
-    config = load_configuration(config_path)
-    if not config:
-        print("Failed to load configuration.")
+    if daemon:
+        from daemon import run_daemon
+
+        run_daemon(config_path, days, use_mock, changes_only)
         return
 
-    if use_mock:
-        print("Using mock data")
-        config["airbnb_urls"] = config["mock_airbnb_urls"]
+    try:
+        config = load_app_config(config_path)
+    except ConfigError as e:
+        print(f"Failed to load configuration: {e}")
+        return
 
-    # Extract Telegram configuration details
-    api_token = config["telegram"]["api_token"]
-    chat_id = config["telegram"]["chat_id"]
+    if cached:
+        show_cached_digests(config, config_path, days, use_mock)
+        return
 
-    # Fetch reservations for the specified number of days from today
-    reservations = get_airbnb_reservations(config, days)
+    if "tenants" in config:
+        from tenants import expand_tenants, run_tenants
 
-    # Format messages to summarize the reservations
-    basic_message = format_basic_message(reservations)
-    detailed_message = format_detailed_message(reservations)
-    detailed_message_with_mailboxes = format_detailed_message_assign_mailboxes(
-        reservations, config["mailboxes"], config["special_mailboxes"]
-    )
+        run_tenants(
+            expand_tenants(config, config_path.stem), days, use_mock, changes_only
+        )
+        return
 
-    if not reservations:
-        print("No reservations found.")
-    else:
-        # Send the formatted messages to the Telegram bot; only one should be active to avoid spam
-        # send_telegram_message(basic_message, api_token, chat_id)
-        # send_telegram_message(detailed_message, api_token, chat_id)
-        send_telegram_message(detailed_message_with_mailboxes, api_token, chat_id)
-        print("Messages sent successfully!")
+    if use_mock:
+        print("Using mock data")
+        try:
+            config = config.with_mock_urls()
+        except ConfigError as e:
+            print(f"Failed to load configuration: {e}")
+            return
+
+    configure_transport(config)
+    configure_metrics(config)
+    try:
+        with METRICS.timer("run"):
+            run_once(config, days, changes_only)
+    finally:
+        export_metrics(config)
 
 
 if __name__ == "__main__":
@@ -65,4 +301,7 @@ if __name__ == "__main__":
     config_filename = sys.argv[1] if len(sys.argv) > 1 else None
     days = int(sys.argv[2]) if len(sys.argv) > 2 else 600
     use_mock = "--mock" in sys.argv  # Check if '--mock' is in the arguments
-    main(config_filename, days, use_mock)
+    changes_only = "--changes" in sys.argv  # Only notify about reservation changes
+    daemon = "--daemon" in sys.argv  # Keep running and poll on a schedule
+    cached = "--cached" in sys.argv  # Print the digest from the last stored run
+    main(config_filename, days, use_mock, changes_only, daemon, cached)
@@ -1,5 +1,127 @@
-from airbnb_data import get_airbnb_reservations
-from config_utils import find_config_path, load_configuration, print_pretty_json
+from functools import lru_cache
+
+from config_utils import load_default_config
+from mailbox_allocator import MailboxAllocator
+from metrics import timed
+from reservation_table import iter_reservation_days
+
+# Message formats produced by render_messages
+FORMAT_BASIC = "basic"
+FORMAT_DETAILED = "detailed"
+FORMAT_MAILBOXES = "mailboxes"
+ALL_FORMATS = (FORMAT_BASIC, FORMAT_DETAILED, FORMAT_MAILBOXES)
+
+DAY_SEPARATOR = "----------\n"
+
+
+@lru_cache(maxsize=2048)
+def _basic_date(date):
+    return date.strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=2048)
+def _date_header(date):
+    return f"📅 {date.strftime('%A, %d de %B %Y')}\n"
+
+
+def render_mailbox_day(date, checkins, checkouts, assigned):
+    """
+    Renders one day of the FORMAT_MAILBOXES message.
+
+    Args:
+        date (date): The day.
+        checkins (list): Apartment numbers checking in.
+        checkouts (list): Apartment numbers checking out.
+        assigned (list): The mailbox assigned to each check-in.
+
+    Returns:
+        str: The block of the day, ending with the day separator.
+    """
+    return "".join(
+        [
+            f"{_date_header(date)}🔑 Check-ins: {len(checkins)}\n",
+            *[
+                f"  - Apt {apt_number} - 📫 {mailbox}\n"
+                for apt_number, mailbox in zip(checkins, assigned)
+            ],
+            f"🚪 Check-outs: {len(checkouts)}\n",
+            *[f"  - Apt {apt_number}\n" for apt_number in checkouts],
+            DAY_SEPARATOR,
+        ]
+    )
+
+
+@timed("render")
+def render_messages(
+    reservations,
+    formats=ALL_FORMATS,
+    mailboxes=None,
+    special_mailboxes=None,
+    fragment_cache=None,
+):
+    """
+    Renders any subset of the message formats in a single pass over the reservations.
+
+    Date headers are cached across calls and every message is assembled with a single join, so
+    rendering is linear in the size of the reservations. With a fragment cache, the days of
+    FORMAT_MAILBOXES that did not change since a previous call are reused instead.
+
+    Args:
+        reservations (dict): A dictionary with dates as keys. Each key contains a dictionary
+                             with lists of 'checkins' and 'checkouts'.
+        formats (Iterable[str]): The formats to render among FORMAT_BASIC, FORMAT_DETAILED and
+                                 FORMAT_MAILBOXES.
+        mailboxes (list, optional): General mailboxes, required for FORMAT_MAILBOXES.
+        special_mailboxes (dict, optional): A dictionary mapping specific apartments to special
+                                            mailboxes, used by FORMAT_MAILBOXES.
+        fragment_cache (FragmentCache, optional): Cache of the days of FORMAT_MAILBOXES rendered
+                                                  by previous calls; only changed days are
+                                                  rendered again.
+
+    Returns:
+        dict: A dictionary mapping every requested format to its message.
+    """
+    formats = set(formats)
+    rendered = {}
+    if fragment_cache is not None and FORMAT_MAILBOXES in formats:
+        formats.discard(FORMAT_MAILBOXES)
+        rendered[FORMAT_MAILBOXES] = fragment_cache.render(
+            reservations, mailboxes or [], special_mailboxes or {}
+        )
+    basic = ["Reservations Summary:\n"] if FORMAT_BASIC in formats else None
+    detailed = [] if FORMAT_DETAILED in formats else None
+    with_mailboxes = [] if FORMAT_MAILBOXES in formats else None
+    allocator = (
+        MailboxAllocator(mailboxes or [], special_mailboxes or {})
+        if with_mailboxes is not None
+        else None
+    )
+
+    for date, checkins, checkouts in iter_reservation_days(reservations):
+        if basic is not None:
+            basic.append(
+                f"Fecha: {_basic_date(date)} - Check-ins: {len(checkins)}, Check-outs: {len(checkouts)}\n"
+            )
+        if with_mailboxes is not None:
+            assigned = allocator.allocate_day(checkins, checkouts)
+            with_mailboxes.append(
+                render_mailbox_day(date, checkins, checkouts, assigned)
+            )
+        if detailed is not None:
+            detailed.append(f"{_date_header(date)}🔑 Check-ins: {len(checkins)}\n")
+            detailed.extend(f"  - Apt {apt_number}\n" for apt_number in checkins)
+            detailed.append(f"🚪 Check-outs: {len(checkouts)}\n")
+            detailed.extend(f"  - Apt {apt_number}\n" for apt_number in checkouts)
+            detailed.append(DAY_SEPARATOR)
+
+    for format_name, parts in (
+        (FORMAT_BASIC, basic),
+        (FORMAT_DETAILED, detailed),
+        (FORMAT_MAILBOXES, with_mailboxes),
+    ):
+        if parts is not None:
+            rendered[format_name] = "".join(parts)
+    return rendered
 
 
 def format_basic_message(reservations):
@@ -14,10 +136,7 @@ def format_basic_message(reservations):
         str: A string that summarizes the number of check-ins and check-outs per date,
              formatted as 'Fecha: YYYY-MM-DD - Check-ins: X, Check-outs: Y' for each date.
     """
-    result = "Reservations Summary:\n"
-    for date, res in sorted(reservations.items()):
-        result += f"Fecha: {date.strftime('%Y-%m-%d')} - Check-ins: {len(res['checkins'])}, Check-outs: {len(res['checkouts'])}\n"
-    return result
+    return render_messages(reservations, (FORMAT_BASIC,))[FORMAT_BASIC]
 
 
 def format_detailed_message(reservations):
@@ -32,17 +151,7 @@ def format_detailed_message(reservations):
         str: A string detailing each date's reservations, including the check-in and check-out times for each apartment,
              formatted with icons and timestamps.
     """
-    result = ""
-    for date, res in sorted(reservations.items()):
-        result += f"📅 {date.strftime('%A, %d de %B %Y')}\n"
-        result += f"🔑 Check-ins: {len(res['checkins'])}\n"
-        for checkin in res["checkins"]:
-            result += f"  - Apt {checkin['apt_number']}\n"
-        result += f"🚪 Check-outs: {len(res['checkouts'])}\n"
-        for checkout in res["checkouts"]:
-            result += f"  - Apt {checkout['apt_number']}\n"
-        result += "----------\n"
-    return result
+    return render_messages(reservations, (FORMAT_DETAILED,))[FORMAT_DETAILED]
 
 
 def format_detailed_message_assign_mailboxes(
@@ -50,7 +159,8 @@ def format_detailed_message_assign_mailboxes(
 ):
     """
     Formats a detailed message for each reservation and assigns mailboxes according to specific rules.
-    Special mailboxes are reserved for specific apartments if they are available.
+    Special mailboxes are reserved for specific apartments if they are available, and a mailbox stays
+    busy from a guest's check-in until their check-out.
 
     Args:
         reservations (dict): A dictionary with dates as keys. Each key contains a dictionary
@@ -62,68 +172,75 @@ def format_detailed_message_assign_mailboxes(
         str: A detailed string for each date, showing check-ins and check-outs with assigned mailbox for each apartment,
              ensuring that specific apartments receive dedicated mailboxes when possible.
     """
-    result = ""
-
-    for date, res in sorted(reservations.items(), key=lambda x: x[0]):
-
-        # Reset mailboxes for each day
-        available_mailboxes = mailboxes[:]
-        mailbox_assignments = {}
+    return render_messages(
+        reservations, (FORMAT_MAILBOXES,), mailboxes, special_mailboxes
+    )[FORMAT_MAILBOXES]
 
-        result += f"📅 {date.strftime('%A, %d de %B %Y')}\n"
-        result += f"🔑 Check-ins: {len(res['checkins'])}\n"
 
-        # Assign special mailboxes first if applicable
-        for checkin in res["checkins"]:
-            apt_number = checkin["apt_number"]
-            if (
-                apt_number in special_mailboxes
-                and special_mailboxes[apt_number] not in mailbox_assignments.values()
-            ):
-                mailbox_assignments[apt_number] = special_mailboxes[apt_number]
-                available_mailboxes.remove(special_mailboxes[apt_number])
+def format_changes_message(changes):
+    """
+    Formats a compact message listing the reservation changes since the previous run.
 
-        # Assign general mailboxes
-        for checkin in res["checkins"]:
-            apt_number = checkin["apt_number"]
-            if apt_number not in mailbox_assignments:
-                if available_mailboxes:
-                    mailbox_assignments[apt_number] = available_mailboxes.pop(0)
-                else:
-                    # If no mailboxes left, assign default
-                    mailbox_assignments[apt_number] = "???"
+    Args:
+        changes (ReservationChanges): The new, cancelled and moved stays, as returned by
+                                      change_tracker.diff_snapshots.
 
-            result += f"  - Apt {apt_number} - 📫 {mailbox_assignments[apt_number]}\n"
+    Returns:
+        str: A string with one line per changed stay grouped by type of change, or an empty
+             string if nothing changed.
+    """
+    lines = []
+    sections = (
+        ("🆕 New", changes.new),
+        ("❌ Cancelled", changes.cancelled),
+        ("🔁 Moved", changes.moved),
+    )
+    for title, stays in sections:
+        if not stays:
+            continue
+        lines.append(f"{title}: {len(stays)}")
+        for stay in stays:
+            line = f"  - Apt {stay.apt_number}: {stay.begin.strftime('%d/%m/%Y')} → {stay.end.strftime('%d/%m/%Y')}"
+            if stay.previous_begin is not None:
+                line += f" (was {stay.previous_begin.strftime('%d/%m/%Y')} → {stay.previous_end.strftime('%d/%m/%Y')})"
+            lines.append(line)
+
+    if not lines:
+        return ""
+    return "🔔 Reservation changes\n" + "\n".join(lines) + "\n"
+
+
+def format_missing_calendars(apartments):
+    """
+    Formats the note put at the top of a digest sent without some calendars.
 
-        result += f"🚪 Check-outs: {len(res['checkouts'])}\n"
-        for checkout in res["checkouts"]:
-            result += f"  - Apt {checkout['apt_number']}\n"
-        result += "----------\n"
+    Args:
+        apartments (list): The apartment numbers whose calendar could not be fetched or parsed.
 
-    return result
+    Returns:
+        str: A warning line listing the apartments.
+    """
+    listed = ", ".join(f"Apt {apt_number}" for apt_number in apartments)
+    return f"⚠️ Calendars unavailable, not included below: {listed}\n"
 
 
 if __name__ == "__main__":
-    config_path = find_config_path()
-    if not config_path:
-        print("Configuration file not found.")
+    config = load_default_config()
+    if not config:
         exit(1)
 
-    config = load_configuration(config_path)
-    if config:
-        reservations = get_airbnb_reservations(config, 600)  # Fetch for next 600 days
-        print(f"Messages for reservations from {config_path}:")
+    from airbnb_data import get_airbnb_reservations_for_horizons
+
+    # Fetch once for the next 600 days; the shorter horizons are views of it
+    horizons = get_airbnb_reservations_for_horizons(config, (1, 7, 600))
+    for days, reservations in horizons.items():
+        messages = render_messages(
+            reservations, ALL_FORMATS, config.mailboxes, config.special_mailboxes
+        )
+        print(f"Messages for the next {days} days from {config.path}:")
         print("Basic Message:")
-        print(format_basic_message(reservations))
+        print(messages[FORMAT_BASIC])
         print("Detailed Message:")
-        print(format_detailed_message(reservations))
+        print(messages[FORMAT_DETAILED])
         print("Detailed Message with Mailboxes:")
-        mailboxes = config.get("mailboxes", [])
-        special_mailboxes = config.get("special_mailboxes", {})
-        print(
-            format_detailed_message_assign_mailboxes(
-                reservations, mailboxes, special_mailboxes
-            )
-        )
-    else:
-        print(f"Failed to load configuration from {config_path}.")
+        print(messages[FORMAT_MAILBOXES])
@@ -0,0 +1,228 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+# Prefix of every exported Prometheus metric
+PROMETHEUS_PREFIX = "airbnb_"
+
+_NULL_TIMER = nullcontext()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class _Timer:
+    __slots__ = ("metrics", "key", "started")
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics._observe(self.key, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Registry of run counters and stage timers, optionally labelled (e.g. by apartment).
+
+    Disabled by default: timer() then returns a shared no-op context manager and incr() returns
+    immediately, so instrumented code pays a single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timers = {}  # key -> [count, total seconds, max seconds]
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def incr(self, name, value=1, **labels):
+        """
+        Adds a value to a counter.
+
+        Args:
+            name (str): Counter name, e.g. 'bytes_fetched'.
+            value (int | float): Amount to add.
+            **labels: Optional labels, e.g. apartment='1'.
+        """
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def timer(self, name, **labels):
+        """
+        Returns a context manager timing the enclosed block.
+
+        Args:
+            name (str): Timer name, e.g. 'fetch'.
+            **labels: Optional labels, e.g. apartment='1'.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, _key(name, labels))
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def summary(self):
+        """
+        Returns a snapshot of every counter and timer.
+
+        Returns:
+            dict: {'counters': [...], 'timers': [...]} with one entry per name and label set.
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "timers": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": count,
+                        "total_seconds": total,
+                        "max_seconds": maximum,
+                    }
+                    for (name, labels), (count, total, maximum) in sorted(
+                        self._timers.items()
+                    )
+                ],
+            }
+
+    def to_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Counters as '<name>_total' and timers as '<name>_seconds' summaries.
+        """
+        summary = self.summary()
+        lines = []
+        declared = set()
+        for counter in summary["counters"]:
+            metric = f"{PROMETHEUS_PREFIX}{counter['name']}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_labels(counter['labels'])} {counter['value']}")
+        for timer in summary["timers"]:
+            metric = f"{PROMETHEUS_PREFIX}{timer['name']}_seconds"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} summary")
+                declared.add(metric)
+            labels = _labels(timer["labels"])
+            lines.append(f"{metric}_sum{labels} {timer['total_seconds']:.6f}")
+            lines.append(f"{metric}_count{labels} {timer['count']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path=None, prometheus_path=None):
+        """
+        Writes the run summary as JSON and/or as a Prometheus text file. Files are replaced
+        atomically, as expected by the node_exporter textfile collector.
+
+        Args:
+            json_path (str, optional): Destination of the JSON summary.
+            prometheus_path (str, optional): Destination of the Prometheus text file.
+        """
+        if json_path:
+            _write_atomic(json_path, json.dumps(self.summary(), indent=4))
+        if prometheus_path:
+            _write_atomic(prometheus_path, self.to_prometheus())
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _write_atomic(path, content):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# Process-wide registry used by the instrumented modules
+METRICS = Metrics()
+
+
+def timed(name):
+    """
+    Decorator recording every call of the decorated function under a timer.
+
+    Args:
+        name (str): Timer name.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_metrics(config):
+    """
+    Enables the metrics if the configuration has a "metrics" section.
+
+    Args:
+        config (dict): Configuration dictionary.
+    """
+    if config.get("metrics") is not None:
+        METRICS.enable()
+
+
+def export_metrics(config):
+    """
+    Exports the metrics to the files named in the "metrics" section of the configuration
+    ("json" and/or "prometheus"), if metrics are enabled.
+
+    Args:
+        config (dict): Configuration dictionary.
+    """
+    metrics_config = config.get("metrics")
+    if METRICS.enabled and metrics_config:
+        METRICS.export(metrics_config.get("json"), metrics_config.get("prometheus"))
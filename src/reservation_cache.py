@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from ics_parser import CalendarEvent
+
+# Default location of the reservations stored by the last live run, overridable via
+# config["reservation_cache"]["path"]
+DEFAULT_RESERVATIONS_PATH = ".cache/reservations.json"
+
+
+def reservations_path_from_config(config):
+    """
+    Returns the path of the stored reservations from the "reservation_cache" section.
+
+    Args:
+        config (dict): Configuration dictionary.
+
+    Returns:
+        str: The configured path, or DEFAULT_RESERVATIONS_PATH.
+    """
+    return config.get("reservation_cache", {}).get("path", DEFAULT_RESERVATIONS_PATH)
+
+
+def load_reservations(path):
+    """
+    Loads the reservations stored by the last live run.
+
+    Args:
+        path (str): The reservations file path.
+
+    Returns:
+        tuple: (events_by_apartment, saved_at) where events_by_apartment maps apartment
+               numbers to CalendarEvent lists and saved_at is the datetime of the run, or None
+               if nothing was stored yet or the file cannot be read.
+    """
+    try:
+        with open(path, "r") as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logging.error(f"Error reading stored reservations {path}: {e}")
+        return None
+
+    events_by_apartment = {
+        apt_number: [
+            CalendarEvent(uid, date.fromordinal(begin), date.fromordinal(end), kind)
+            for uid, begin, end, kind in rows
+        ]
+        for apt_number, rows in stored["apartments"].items()
+    }
+    return events_by_apartment, datetime.fromisoformat(stored["saved_at"])
+
+
+def save_reservations(path, events_by_apartment, apartments=None):
+    """
+    Atomically stores the parsed events of every apartment for later cache-only runs.
+
+    Args:
+        path (str): The reservations file path.
+        events_by_apartment (dict): A dictionary mapping apartment numbers to CalendarEvent lists.
+        apartments (Iterable, optional): The apartments currently configured. Those missing from
+                                         `events_by_apartment` (e.g. because their calendar could
+                                         not be fetched) keep their previously stored events.
+    """
+    rows_by_apartment = {}
+    missing = [apt for apt in apartments or () if apt not in events_by_apartment]
+    if missing:
+        previous = load_reservations(path)
+        if previous is not None:
+            for apt_number in missing:
+                if apt_number in previous[0]:
+                    rows_by_apartment[apt_number] = _rows(previous[0][apt_number])
+    for apt_number, events in events_by_apartment.items():
+        rows_by_apartment[apt_number] = _rows(events)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {
+                "saved_at": datetime.now().isoformat(timespec="seconds"),
+                "apartments": rows_by_apartment,
+            },
+            f,
+            separators=(",", ":"),
+        )
+    os.replace(tmp_path, path)
+
+
+def _rows(events):
+    return [
+        (event.uid, event.begin.toordinal(), event.end.toordinal(), event.kind)
+        for event in events
+    ]
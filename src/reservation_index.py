@@ -0,0 +1,170 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+from operator import itemgetter
+
+from reservation_table import CHECKIN, CHECKOUT, ReservationTable
+
+
+def _sorted_columns(movements):
+    """
+    Sorts (day ordinal, apartment id) pairs by day, keeping insertion order for equal days,
+    and splits them into parallel day and apartment id lists.
+    """
+    movements.sort(key=itemgetter(0))
+    return [day for day, _ in movements], [apt for _, apt in movements]
+
+
+class ReservationIndex:
+    """
+    In-memory index of stays supporting logarithmic date-window queries.
+
+    Check-in and check-out days are kept in sorted arrays, both globally and per apartment, so
+    range queries are two bisections plus the size of the answer. Stays are also kept sorted by
+    check-in together with a running maximum of their check-outs, which bounds the backwards
+    scan needed to answer "who is in-house on a given day".
+    """
+
+    def __init__(self, events_by_apartment):
+        """
+        Args:
+            events_by_apartment (dict): A dictionary mapping apartment numbers to lists of
+                                        CalendarEvent records, in configuration order.
+        """
+        self.apartments = list(events_by_apartment)
+        self._stays = {}
+        checkins = []
+        checkouts = []
+
+        for apt_id, (apt_number, events) in enumerate(events_by_apartment.items()):
+            stays = sorted(
+                (event.begin.toordinal(), event.end.toordinal()) for event in events
+            )
+            ends = [end for _, end in stays]
+            self._stays[apt_number] = (
+                [begin for begin, _ in stays],
+                ends,
+                list(accumulate(ends, max)),
+                sorted(ends),
+            )
+            for event in events:
+                checkins.append((event.begin.toordinal(), apt_id))
+                checkouts.append((event.end.toordinal(), apt_id))
+
+        self._checkin_days, self._checkin_apts = _sorted_columns(checkins)
+        self._checkout_days, self._checkout_apts = _sorted_columns(checkouts)
+
+    @staticmethod
+    def _bounds(days, start, end):
+        return bisect_left(days, start.toordinal()), bisect_right(days, end.toordinal())
+
+    def checkins_between(self, start, end, apt_number=None):
+        """
+        Lists the check-ins between two dates, both inclusive.
+
+        Args:
+            start (date): First day of the window.
+            end (date): Last day of the window.
+            apt_number (str, optional): Restrict the query to a single apartment.
+
+        Returns:
+            list: (date, apt_number) tuples sorted by date.
+        """
+        if apt_number is None:
+            lo, hi = self._bounds(self._checkin_days, start, end)
+            return [
+                (
+                    date.fromordinal(self._checkin_days[i]),
+                    self.apartments[self._checkin_apts[i]],
+                )
+                for i in range(lo, hi)
+            ]
+        begins = self._stays.get(apt_number, ([],))[0]
+        lo, hi = self._bounds(begins, start, end)
+        return [(date.fromordinal(begins[i]), apt_number) for i in range(lo, hi)]
+
+    def checkouts_between(self, start, end, apt_number=None):
+        """
+        Lists the check-outs between two dates, both inclusive.
+
+        Args:
+            start (date): First day of the window.
+            end (date): Last day of the window.
+            apt_number (str, optional): Restrict the query to a single apartment.
+
+        Returns:
+            list: (date, apt_number) tuples sorted by date.
+        """
+        if apt_number is None:
+            lo, hi = self._bounds(self._checkout_days, start, end)
+            return [
+                (
+                    date.fromordinal(self._checkout_days[i]),
+                    self.apartments[self._checkout_apts[i]],
+                )
+                for i in range(lo, hi)
+            ]
+        sorted_ends = self._stays.get(apt_number, ([], [], [], []))[3]
+        lo, hi = self._bounds(sorted_ends, start, end)
+        return [(date.fromordinal(sorted_ends[i]), apt_number) for i in range(lo, hi)]
+
+    def is_in_house(self, apt_number, day):
+        """
+        Checks whether an apartment is occupied on the night of a given day.
+
+        Args:
+            apt_number (str): The apartment to check.
+            day (date): The day to check; a stay covers its check-in day up to, but not
+                        including, its check-out day.
+
+        Returns:
+            bool: True if a stay covers the day.
+        """
+        if apt_number not in self._stays:
+            return False
+        begins, ends, max_ends, _ = self._stays[apt_number]
+        ordinal = day.toordinal()
+        i = bisect_right(begins, ordinal) - 1
+        # Earlier stays can only cover the day while their running maximum check-out is later
+        while i >= 0 and max_ends[i] > ordinal:
+            if ends[i] > ordinal:
+                return True
+            i -= 1
+        return False
+
+    def in_house(self, day):
+        """
+        Lists the apartments occupied on the night of a given day.
+
+        Args:
+            day (date): The day to check.
+
+        Returns:
+            list: Apartment numbers in configuration order.
+        """
+        return [apt for apt in self.apartments if self.is_in_house(apt, day)]
+
+    def table_between(self, start, end):
+        """
+        Collects the check-ins and check-outs between two dates, both inclusive.
+
+        Args:
+            start (date): First day of the window.
+            end (date): Last day of the window.
+
+        Returns:
+            ReservationTable: The movements of the window, as returned by get_airbnb_reservations.
+        """
+        lo, hi = self._bounds(self._checkin_days, start, end)
+        rows = [
+            (self._checkin_days[i], CHECKIN, self._checkin_apts[i])
+            for i in range(lo, hi)
+        ]
+        lo, hi = self._bounds(self._checkout_days, start, end)
+        rows.extend(
+            (self._checkout_days[i], CHECKOUT, self._checkout_apts[i])
+            for i in range(lo, hi)
+        )
+        # Stable sort keeps configuration and calendar order within each day and kind
+        rows.sort(key=itemgetter(0, 1))
+        return ReservationTable(rows, self.apartments)
@@ -0,0 +1,329 @@
+import sqlite3
+import sys
+from collections import namedtuple
+from datetime import date, datetime
+from pathlib import Path
+
+from config_utils import load_default_config
+from http_cache import content_hash
+from ics_parser import CalendarEvent, parse_events
+from reservation_table import CHECKIN, CHECKOUT, ReservationTable
+
+# Default location of the database, overridable via config["reservation_store"]["path"]
+DEFAULT_STORE_PATH = ".cache/reservations.db"
+
+StoredStay = namedtuple(
+    "StoredStay",
+    [
+        "apt_number",
+        "uid",
+        "begin",
+        "end",
+        "kind",
+        "first_seen",
+        "last_seen",
+        "removed_at",
+    ],
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stays (
+    apt_number TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    begin TEXT NOT NULL,
+    end TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    summary TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    removed_at TEXT,
+    PRIMARY KEY (apt_number, uid)
+);
+CREATE INDEX IF NOT EXISTS stays_begin ON stays (begin);
+CREATE INDEX IF NOT EXISTS stays_end ON stays (end);
+CREATE TABLE IF NOT EXISTS calendars (
+    apt_number TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    checked_at TEXT NOT NULL
+);
+"""
+
+UPSERT_STAY = """
+INSERT INTO stays
+    (apt_number, uid, position, begin, end, kind, summary, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (apt_number, uid) DO UPDATE SET
+    position = excluded.position,
+    begin = excluded.begin,
+    end = excluded.end,
+    kind = excluded.kind,
+    summary = excluded.summary,
+    last_seen = excluded.last_seen,
+    removed_at = NULL
+"""
+
+
+def stay_key(event):
+    """
+    Returns the key identifying a stay within its calendar: its UID, or its dates for events
+    without a UID (as in change_tracker).
+    """
+    return event.uid or f"{event.begin.isoformat()}/{event.end.isoformat()}"
+
+
+class ReservationStore:
+    """
+    Persistent SQLite store of the stays of every apartment.
+
+    Stays are upserted by (apartment, UID) and keep the time they were first and last seen, so
+    the history survives calendar refreshes. Stays dropped from a calendar before they end are
+    marked as removed instead of being deleted. Dates are stored as ISO strings and indexed, so
+    date-range queries read only the matching rows. The hash of every calendar body is kept, and
+    a calendar whose content has not changed is neither parsed nor written again.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a store from the "reservation_store" section of the configuration.
+
+        Args:
+            config (dict): Configuration dictionary.
+
+        Returns:
+            ReservationStore: The configured store, or None if the section is missing.
+        """
+        store_config = config.get("reservation_store")
+        if store_config is None:
+            return None
+        return cls(store_config.get("path", DEFAULT_STORE_PATH))
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def sync(self, apt_number, calendar_data, parse=parse_events):
+        """
+        Writes the stays of a calendar body, unless the same body was already stored.
+
+        Args:
+            apt_number (str): The apartment the calendar belongs to.
+            calendar_data (str): Calendar data in ICS format.
+            parse (callable, optional): Parses a calendar body into CalendarEvent records.
+
+        Returns:
+            bool: True if the calendar changed and its stays were written.
+        """
+        body_hash = content_hash(calendar_data)
+        now = datetime.now().isoformat(timespec="seconds")
+        row = self._connection.execute(
+            "SELECT content_hash FROM calendars WHERE apt_number = ?", (apt_number,)
+        ).fetchone()
+        if row is not None and row[0] == body_hash:
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE calendars SET checked_at = ? WHERE apt_number = ?",
+                    (now, apt_number),
+                )
+            return False
+
+        events = parse(calendar_data)
+        today = date.today().isoformat()
+        keys = {stay_key(event) for event in events}
+        with self._connection:
+            active = self._connection.execute(
+                "SELECT uid FROM stays "
+                "WHERE apt_number = ? AND removed_at IS NULL AND end >= ?",
+                (apt_number, today),
+            ).fetchall()
+            # Airbnb drops past stays from the calendars, so only upcoming ones are removed
+            self._connection.executemany(
+                "UPDATE stays SET removed_at = ? WHERE apt_number = ? AND uid = ?",
+                [(now, apt_number, uid) for (uid,) in active if uid not in keys],
+            )
+            self._connection.executemany(
+                UPSERT_STAY,
+                [
+                    (
+                        apt_number,
+                        stay_key(event),
+                        position,
+                        event.begin.isoformat(),
+                        event.end.isoformat(),
+                        event.kind,
+                        event.summary,
+                        now,
+                        now,
+                    )
+                    for position, event in enumerate(events)
+                ],
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO calendars VALUES (?, ?, ?)",
+                (apt_number, body_hash, now),
+            )
+        return True
+
+    def checked_at(self):
+        """
+        Returns:
+            datetime: When a calendar was last synced, or None if the store is empty.
+        """
+        (checked_at,) = self._connection.execute(
+            "SELECT MAX(checked_at) FROM calendars"
+        ).fetchone()
+        return datetime.fromisoformat(checked_at) if checked_at else None
+
+    def events_by_apartment(self, apartments):
+        """
+        Reads the current stays of the given apartments.
+
+        Args:
+            apartments (Iterable): Apartment numbers, in configuration order.
+
+        Returns:
+            dict: A dictionary mapping apartment numbers to lists of CalendarEvent records, in
+                  calendar order. Apartments never stored are omitted.
+        """
+        events_by_apartment = {}
+        for apt_number in apartments:
+            rows = self._connection.execute(
+                "SELECT uid, begin, end, kind, summary FROM stays "
+                "WHERE apt_number = ? AND removed_at IS NULL ORDER BY position",
+                (apt_number,),
+            ).fetchall()
+            if rows:
+                events_by_apartment[apt_number] = [
+                    CalendarEvent(
+                        uid,
+                        date.fromisoformat(begin),
+                        date.fromisoformat(end),
+                        kind,
+                        summary,
+                    )
+                    for uid, begin, end, kind, summary in rows
+                ]
+        return events_by_apartment
+
+    def _movements(self, column, start, end, kinds):
+        query = (
+            f"SELECT {column}, apt_number, position FROM stays "
+            f"WHERE {column} BETWEEN ? AND ? AND removed_at IS NULL"
+        )
+        params = [start.isoformat(), end.isoformat()]
+        if kinds is not None:
+            kinds = list(kinds)
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += kinds
+        return self._connection.execute(query, params).fetchall()
+
+    def table_between(self, start, end, apartments, kinds=None):
+        """
+        Collects the check-ins and check-outs between two dates, both inclusive, using the
+        date indexes.
+
+        Args:
+            start (date): First day of the window.
+            end (date): Last day of the window.
+            apartments (Iterable): The configured apartment numbers; stays of other apartments
+                                   are ignored.
+            kinds (Iterable, optional): The event kinds to include; all if None.
+
+        Returns:
+            ReservationTable: The movements of the window, ordered as get_airbnb_reservations
+                              orders them.
+        """
+        apartments = list(apartments)
+        apt_ids = {apt_number: apt_id for apt_id, apt_number in enumerate(apartments)}
+        rows = []
+        for column, kind in (("begin", CHECKIN), ("end", CHECKOUT)):
+            for day, apt_number, position in self._movements(column, start, end, kinds):
+                apt_id = apt_ids.get(apt_number)
+                if apt_id is not None:
+                    rows.append(
+                        (date.fromisoformat(day).toordinal(), kind, apt_id, position)
+                    )
+        rows.sort()
+        return ReservationTable([row[:3] for row in rows], apartments)
+
+    def stays_between(self, start, end, include_removed=False):
+        """
+        Lists the stays overlapping a date range, e.g. what was booked last month.
+
+        Args:
+            start (date): First day of the range.
+            end (date): Last day of the range.
+            include_removed (bool): Also list stays that were dropped from their calendar.
+
+        Returns:
+            list: StoredStay records sorted by check-in, with dates as date objects.
+        """
+        query = "SELECT * FROM stays WHERE begin <= ? AND end >= ?"
+        if not include_removed:
+            query += " AND removed_at IS NULL"
+        rows = self._connection.execute(
+            query + " ORDER BY begin, apt_number, position",
+            (end.isoformat(), start.isoformat()),
+        ).fetchall()
+        return [
+            StoredStay(
+                apt_number,
+                uid,
+                date.fromisoformat(begin),
+                date.fromisoformat(stay_end),
+                kind,
+                datetime.fromisoformat(first_seen),
+                datetime.fromisoformat(last_seen),
+                datetime.fromisoformat(removed_at) if removed_at else None,
+            )
+            for (
+                apt_number,
+                uid,
+                _,
+                begin,
+                stay_end,
+                kind,
+                _,
+                first_seen,
+                last_seen,
+                removed_at,
+            ) in rows
+        ]
+
+
+if __name__ == "__main__":
+    # Usage: reservation_store.py START END, with ISO dates; lists the stored stays in between
+    if len(sys.argv) != 3:
+        print("Usage: reservation_store.py START END")
+        exit(1)
+    config = load_default_config()
+    if not config:
+        exit(1)
+
+    path = config.get("reservation_store", {}).get("path", DEFAULT_STORE_PATH)
+    with ReservationStore(path) as store:
+        stays = store.stays_between(
+            date.fromisoformat(sys.argv[1]),
+            date.fromisoformat(sys.argv[2]),
+            include_removed=True,
+        )
+    for stay in stays:
+        removed = f", removed {stay.removed_at:%Y-%m-%d}" if stay.removed_at else ""
+        print(
+            f"{stay.apt_number}: {stay.begin} - {stay.end} ({stay.kind}), "
+            f"first seen {stay.first_seen:%Y-%m-%d}{removed}"
+        )
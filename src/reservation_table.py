@@ -0,0 +1,159 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from datetime import date
+
+# Movement kinds stored in the kind column
+CHECKIN = 0
+CHECKOUT = 1
+
+
+class ReservationTable(Mapping):
+    """
+    Compact, column-oriented table of check-ins and check-outs.
+
+    Movements are stored in parallel arrays of day ordinals, interned apartment ids and kinds,
+    sorted by day with check-ins before check-outs. The table is also a read-only mapping from
+    dates to {'checkins': [...], 'checkouts': [...]} dictionaries, built on demand, so it can be
+    passed wherever the dict returned by get_airbnb_reservations used to be expected.
+    """
+
+    __slots__ = (
+        "apartments",
+        "_days",
+        "_apt_ids",
+        "_kinds",
+        "_unique_days",
+        "_offsets",
+    )
+
+    def __init__(self, rows, apartments):
+        """
+        Args:
+            rows (list): (day ordinal, kind, apartment id) tuples sorted by day and kind.
+            apartments (list): Apartment numbers indexed by apartment id.
+        """
+        self.apartments = apartments
+        self._days = array("l", (row[0] for row in rows))
+        self._kinds = array("b", (row[1] for row in rows))
+        self._apt_ids = array("H", (row[2] for row in rows))
+
+        # Start offset of every distinct day, followed by a sentinel
+        self._unique_days = array("l")
+        self._offsets = array("l")
+        previous = None
+        for i, day in enumerate(self._days):
+            if day != previous:
+                self._unique_days.append(day)
+                self._offsets.append(i)
+                previous = day
+        self._offsets.append(len(self._days))
+
+    def _position(self, day):
+        if not isinstance(day, date):
+            return None
+        ordinal = day.toordinal()
+        i = bisect_left(self._unique_days, ordinal)
+        if i < len(self._unique_days) and self._unique_days[i] == ordinal:
+            return i
+        return None
+
+    def _split(self, position):
+        """Returns the check-in and check-out apartment numbers of a distinct day."""
+        checkins = []
+        checkouts = []
+        for i in range(self._offsets[position], self._offsets[position + 1]):
+            apt_number = self.apartments[self._apt_ids[i]]
+            if self._kinds[i] == CHECKIN:
+                checkins.append(apt_number)
+            else:
+                checkouts.append(apt_number)
+        return checkins, checkouts
+
+    def __getitem__(self, day):
+        position = self._position(day)
+        if position is None:
+            raise KeyError(day)
+        checkins, checkouts = self._split(position)
+        return {
+            "checkins": [{"apt_number": apt_number} for apt_number in checkins],
+            "checkouts": [{"apt_number": apt_number} for apt_number in checkouts],
+        }
+
+    def __contains__(self, day):
+        return self._position(day) is not None
+
+    def __iter__(self):
+        return (date.fromordinal(day) for day in self._unique_days)
+
+    def __len__(self):
+        return len(self._unique_days)
+
+    def iter_days(self):
+        """
+        Walks the table day by day without building per-movement dictionaries.
+
+        Yields:
+            tuple: (date, check-in apartment numbers, check-out apartment numbers), by date.
+        """
+        for position, day in enumerate(self._unique_days):
+            checkins, checkouts = self._split(position)
+            yield date.fromordinal(day), checkins, checkouts
+
+    def movement_count(self):
+        """Returns the total number of check-ins and check-outs in the table."""
+        return len(self._days)
+
+    def until(self, end):
+        """
+        Returns the movements up to a day as a view of this table. Since movements are sorted
+        by day, they are a prefix of every column, so the view shares the columns through
+        memoryviews instead of copying them.
+
+        Args:
+            end (date): Last day of the view, inclusive.
+
+        Returns:
+            ReservationTable: The movements on or before end.
+        """
+        days = bisect_right(self._unique_days, end.toordinal())
+        movements = self._offsets[days]
+        view = ReservationTable.__new__(ReservationTable)
+        view.apartments = self.apartments
+        view._days = memoryview(self._days)[:movements]
+        view._kinds = memoryview(self._kinds)[:movements]
+        view._apt_ids = memoryview(self._apt_ids)[:movements]
+        view._unique_days = memoryview(self._unique_days)[:days]
+        view._offsets = memoryview(self._offsets)[: days + 1]
+        return view
+
+    def to_dict(self):
+        """
+        Converts the table to the dict-of-lists-of-dicts shape used by the message formatters.
+
+        Returns:
+            dict: A dictionary with dates as keys and 'checkins'/'checkouts' lists as values.
+        """
+        return dict(self.items())
+
+
+def iter_reservation_days(reservations):
+    """
+    Walks reservations day by day, whether they are a ReservationTable or a plain dictionary
+    in the {date: {'checkins': [...], 'checkouts': [...]}} shape.
+
+    Args:
+        reservations (ReservationTable | dict): The reservations to walk.
+
+    Yields:
+        tuple: (date, check-in apartment numbers, check-out apartment numbers), by date.
+    """
+    if isinstance(reservations, ReservationTable):
+        yield from reservations.iter_days()
+        return
+    for day, res in sorted(reservations.items(), key=lambda x: x[0]):
+        yield (
+            day,
+            [checkin["apt_number"] for checkin in res["checkins"]],
+            [checkout["apt_number"] for checkout in res["checkouts"]],
+        )
@@ -1,43 +1,66 @@
-import requests
-from config_utils import find_config_path, load_configuration
+from config_utils import load_default_config
+import http_transport
 
+# Base URL of the Bot API, overridable via config["telegram"]["api_base"]
+TELEGRAM_API_BASE = "https://api.telegram.org"
+LONG_POLL_TIMEOUT = 25  # Seconds a getUpdates request waits for new messages
 
-def send_telegram_message(text, api_token, chat_id):
+
+def send_telegram_message(text, api_token, chat_id, api_base=TELEGRAM_API_BASE):
     """
     Sends a message to a specified Telegram chat using the provided API token and chat ID.
     Args:
         text (str): The message content to be sent.
         api_token (str): Telegram bot API token.
         chat_id (str): Telegram chat ID.
+        api_base (str, optional): Base URL of the Bot API, e.g. a local stand-in server.
     Returns:
         dict: The response from the Telegram API as a dictionary.
     """
-    url = f"https://api.telegram.org/bot{api_token}/sendMessage"
+    url = f"{api_base}/bot{api_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": "Markdown",
         "disable_web_page_preview": True,
     }
-    response = requests.post(url, data=payload)
+    response = http_transport.post(url, data=payload)
+    return response.json()
+
+
+def get_telegram_updates(
+    api_token, offset=None, timeout=LONG_POLL_TIMEOUT, api_base=TELEGRAM_API_BASE
+):
+    """
+    Long-polls the Telegram API for the messages sent to the bot.
+    Args:
+        api_token (str): Telegram bot API token.
+        offset (int, optional): ID of the first update to return; earlier ones are confirmed.
+        timeout (int): Seconds the API may hold the request open while no update arrives.
+        api_base (str, optional): Base URL of the Bot API, e.g. a local stand-in server.
+    Returns:
+        dict: The response from the Telegram API as a dictionary.
+    """
+    url = f"{api_base}/bot{api_token}/getUpdates"
+    params = {"timeout": timeout, "allowed_updates": '["message"]'}
+    if offset is not None:
+        params["offset"] = offset
+    # The read timeout must outlast the time the API holds the request open
+    response = http_transport.get(url, params=params, timeout=timeout + 10)
     return response.json()
 
 
 if __name__ == "__main__":
-    config_path = find_config_path()
-    if not config_path:
-        print("Configuration file not found.")
+    config = load_default_config()
+    if not config:
         exit(1)
 
-    config = load_configuration(config_path)
-    if config and "telegram" in config:
-        api_token = config["telegram"]["api_token"]
-        chat_id = config["telegram"]["chat_id"]
-        send_telegram_message(
-            "Congratulations, the message to Telegram has been sent successfully",
-            api_token,
-            chat_id,
-        )
-        print(f"Message sent")
-    else:
-        print(f"Failed to load configuration from {config_path}.")
+    api_token = config["telegram"]["api_token"]
+    chat_id = config["telegram"]["chat_id"]
+    send_telegram_message(
+        "Congratulations, the message to Telegram has been sent successfully",
+        api_token,
+        chat_id,
+        config["telegram"].get("api_base", TELEGRAM_API_BASE),
+    )
+    print(f"Message sent")
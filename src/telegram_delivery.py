@@ -0,0 +1,247 @@
+import logging
+import time
+from collections import deque, namedtuple
+from functools import partial
+
+from metrics import METRICS
+from telegram_bot import TELEGRAM_API_BASE, send_telegram_message
+
+# Telegram Bot API limits
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096  # In UTF-16 code units
+DEFAULT_GLOBAL_RATE = 30  # Messages per second across all chats
+DEFAULT_PER_CHAT_INTERVAL = 1.0  # Seconds between two messages to the same chat
+DEFAULT_MAX_ATTEMPTS = 5  # Attempts per message before giving up on 429 responses
+
+# Separator written after every day by the message formatters
+DAY_SEPARATOR = "----------\n"
+
+DeliveryResult = namedtuple(
+    "DeliveryResult", ["chat_id", "part", "parts", "ok", "attempts", "error"]
+)
+
+
+def message_length(text):
+    """Returns the length of a text as counted by Telegram, in UTF-16 code units."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _hard_split(text, limit):
+    """Splits a single oversized block on line boundaries, and lines on characters."""
+    parts = []
+    current = ""
+    current_length = 0
+    for line in text.splitlines(keepends=True):
+        length = message_length(line)
+        if length > limit:
+            # Cut the line itself in one pass, counting the UTF-16 units of each code point
+            if current:
+                parts.append(current)
+                current = ""
+                current_length = 0
+            start = 0
+            length = 0
+            for i, char in enumerate(line):
+                units = 2 if ord(char) > 0xFFFF else 1
+                if length + units > limit:
+                    parts.append(line[start:i])
+                    start = i
+                    length = 0
+                length += units
+            line = line[start:]
+        if current and current_length + length > limit:
+            parts.append(current)
+            current = ""
+            current_length = 0
+        current += line
+        current_length += length
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_message(text, limit=TELEGRAM_MAX_MESSAGE_LENGTH):
+    """
+    Splits a digest into parts that fit in a Telegram message, cutting on day boundaries.
+
+    Args:
+        text (str): The message to split.
+        limit (int): Maximum length of a part, in UTF-16 code units.
+
+    Returns:
+        list: The parts, in order. Days longer than the limit are cut on line boundaries.
+    """
+    if message_length(text) <= limit:
+        return [text] if text else []
+
+    blocks = [block + DAY_SEPARATOR for block in text.split(DAY_SEPARATOR)]
+    blocks[-1] = blocks[-1][: -len(DAY_SEPARATOR)]
+
+    parts = []
+    current = ""
+    for block in blocks:
+        if not block:
+            continue
+        if message_length(block) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.extend(_hard_split(block, limit))
+        elif current and message_length(current) + message_length(block) > limit:
+            parts.append(current)
+            current = block
+        else:
+            current += block
+    if current:
+        parts.append(current)
+    return parts
+
+
+def telegram_chat_ids(config):
+    """
+    Returns the chat IDs to deliver to; "chat_id" may be a single ID or a list of IDs.
+
+    Args:
+        config (dict): Configuration dictionary with a "telegram" section.
+
+    Returns:
+        list: The chat IDs.
+    """
+    chat_id = config["telegram"]["chat_id"]
+    return list(chat_id) if isinstance(chat_id, list) else [chat_id]
+
+
+def telegram_api_base(config):
+    """
+    Returns the Bot API base URL; "api_base" points the bot at a local stand-in server.
+
+    Args:
+        config (dict): Configuration dictionary with a "telegram" section.
+
+    Returns:
+        str: The configured base URL, or TELEGRAM_API_BASE.
+    """
+    return config["telegram"].get("api_base", TELEGRAM_API_BASE)
+
+
+class TelegramDeliveryQueue:
+    """
+    Queue of outgoing Telegram messages that respects the global and per-chat rate limits.
+
+    Long messages are split on day boundaries. Parts sent to the same chat keep their order,
+    while different chats are interleaved. A 429 response delays its chat for the retry_after
+    returned by Telegram before the part is sent again. Every part gets a DeliveryResult.
+    """
+
+    def __init__(
+        self,
+        api_token,
+        global_rate=DEFAULT_GLOBAL_RATE,
+        per_chat_interval=DEFAULT_PER_CHAT_INTERVAL,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        send=send_telegram_message,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.api_token = api_token
+        self.global_interval = 1.0 / global_rate
+        self.per_chat_interval = per_chat_interval
+        self.max_attempts = max_attempts
+        self._send = send
+        self._clock = clock
+        self._sleep = sleep
+        self._queues = {}  # chat_id -> deque of [part, parts, text, attempts]
+        self._ready_at = {}  # chat_id -> earliest time of the next message to that chat
+
+    def put(self, chat_id, text):
+        """
+        Queues a message for a chat, split into parts that fit Telegram's size limit.
+
+        Args:
+            chat_id (str): Telegram chat ID.
+            text (str): The message content.
+        """
+        parts = split_message(text)
+        queue = self._queues.setdefault(chat_id, deque())
+        self._ready_at.setdefault(chat_id, 0.0)
+        for i, part in enumerate(parts, start=1):
+            queue.append([i, len(parts), part, 0])
+
+    def _next_chat(self):
+        pending = [chat_id for chat_id, queue in self._queues.items() if queue]
+        if not pending:
+            return None
+        return min(pending, key=lambda chat_id: self._ready_at[chat_id])
+
+    def run(self):
+        """
+        Sends every queued part, waiting as required by the rate limits.
+
+        Returns:
+            list: DeliveryResult records in the order the parts completed.
+        """
+        results = []
+        next_global = 0.0
+        while True:
+            chat_id = self._next_chat()
+            if chat_id is None:
+                return results
+
+            wait = max(self._ready_at[chat_id], next_global) - self._clock()
+            if wait > 0:
+                self._sleep(wait)
+
+            entry = self._queues[chat_id][0]
+            entry[3] += 1
+            try:
+                with METRICS.timer("telegram_send"):
+                    response = self._send(entry[2], self.api_token, chat_id)
+            except Exception as e:
+                response = {"ok": False, "description": str(e)}
+
+            now = self._clock()
+            next_global = now + self.global_interval
+            self._ready_at[chat_id] = now + self.per_chat_interval
+
+            retry_after = (response.get("parameters") or {}).get("retry_after")
+            if (
+                not response.get("ok")
+                and response.get("error_code") == 429
+                and entry[3] < self.max_attempts
+            ):
+                logging.warning(f"Rate limited by Telegram, retrying in {retry_after}s")
+                METRICS.incr("telegram_retries")
+                self._ready_at[chat_id] = now + (retry_after or 1)
+                continue
+
+            self._queues[chat_id].popleft()
+            ok = bool(response.get("ok"))
+            error = None if ok else response.get("description", "Unknown error")
+            METRICS.incr("messages_sent" if ok else "messages_failed")
+            if not ok:
+                logging.error(
+                    f"Failed to deliver part {entry[0]} to {chat_id}: {error}"
+                )
+            results.append(
+                DeliveryResult(chat_id, entry[0], entry[1], ok, entry[3], error)
+            )
+
+
+def deliver_message(text, api_token, chat_ids, api_base=TELEGRAM_API_BASE):
+    """
+    Delivers a possibly long message to one or more chats within Telegram's limits.
+
+    Args:
+        text (str): The message content.
+        api_token (str): Telegram bot API token.
+        chat_ids (list): Telegram chat IDs.
+        api_base (str, optional): Base URL of the Bot API.
+
+    Returns:
+        list: One DeliveryResult per sent part.
+    """
+    queue = TelegramDeliveryQueue(
+        api_token, send=partial(send_telegram_message, api_base=api_base)
+    )
+    for chat_id in chat_ids:
+        queue.put(chat_id, text)
+    return queue.run()
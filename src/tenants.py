@@ -0,0 +1,234 @@
+import argparse
+import logging
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from change_tracker import DEFAULT_SNAPSHOT_PATH
+from config_utils import AppConfig, ConfigError, load_app_config
+from http_transport import configure_transport
+from main import build_changes_message, build_digest
+from reservation_cache import DEFAULT_RESERVATIONS_PATH
+from reservation_store import DEFAULT_STORE_PATH
+from telegram_delivery import deliver_message, telegram_api_base, telegram_chat_ids
+
+# Directory holding the per-tenant caches, unless a tenant configures its own paths
+TENANT_CACHE_DIR = ".cache/tenants"
+
+TenantResult = namedtuple("TenantResult", ["tenant", "ok", "parts_sent", "error"])
+
+
+def _isolate_caches(name, config):
+    """Gives a tenant its own snapshot, stored reservations and caches unless configured."""
+    cache_dir = Path(TENANT_CACHE_DIR) / name
+    config["changes"] = {
+        "snapshot": str(cache_dir / Path(DEFAULT_SNAPSHOT_PATH).name),
+        **config.get("changes", {}),
+    }
+    config["reservation_cache"] = {
+        "path": str(cache_dir / Path(DEFAULT_RESERVATIONS_PATH).name),
+        **config.get("reservation_cache", {}),
+    }
+    if config.get("reservation_store") is not None:
+        config["reservation_store"] = {
+            "path": str(cache_dir / Path(DEFAULT_STORE_PATH).name),
+            **config["reservation_store"],
+        }
+    for section, directory in (("http_cache", "http"), ("event_cache", "events")):
+        if config.get(section) is not None:
+            config[section] = {
+                "directory": str(cache_dir / directory),
+                **config[section],
+            }
+    return config
+
+
+def expand_tenants(config, default_name):
+    """
+    Lists the tenants described by a configuration.
+
+    A configuration with a "tenants" section describes one tenant per entry; the entries are
+    merged over the other top-level keys, which act as shared defaults. Any other
+    configuration is a single tenant.
+
+    Args:
+        config (dict): Configuration dictionary.
+        default_name (str): Tenant name used for a configuration without a "tenants" section.
+
+    Returns:
+        list: (name, config) tuples. Every tenant gets its own cache paths under
+              TENANT_CACHE_DIR unless its configuration sets them.
+    """
+    if "tenants" not in config:
+        return [(default_name, _isolate_caches(default_name, dict(config)))]
+
+    shared = {key: value for key, value in config.items() if key != "tenants"}
+    return [
+        (name, _isolate_caches(name, {**shared, **section}))
+        for name, section in config["tenants"].items()
+    ]
+
+
+def load_tenants(config_paths):
+    """
+    Loads the tenants of several configuration files.
+
+    Args:
+        config_paths (list): Paths of configuration files, each describing one tenant or a
+                             "tenants" section. Files that cannot be loaded or are invalid
+                             are skipped.
+
+    Returns:
+        list: (name, config) tuples; a single-tenant file is named after the file.
+    """
+    tenants = []
+    for config_path in config_paths:
+        try:
+            config = load_app_config(config_path)
+        except ConfigError as e:
+            logging.error(f"{e}. Skipping its tenants.")
+            continue
+        tenants.extend(expand_tenants(config, Path(config_path).stem))
+
+    counts = Counter(name for name, _ in tenants)
+    duplicates = [name for name, count in counts.items() if count > 1]
+    if duplicates:
+        logging.error(f"Duplicate tenant names share their caches: {duplicates}")
+    return tenants
+
+
+def render_tenant(config, days, changes_only=False, use_mock=False):
+    """
+    Fetches, parses and renders the message of one tenant. Runs in a worker process.
+
+    Args:
+        config (dict): The tenant configuration.
+        days (int): The number of days covered by the digest.
+        changes_only (bool, optional): Whether to render the reservation changes since the
+                                       previous run instead of the digest. Defaults to False.
+        use_mock (bool, optional): Whether to use the tenant's mock calendars. Defaults to False.
+
+    Returns:
+        str: The message to send, or None if there is nothing to send.
+
+    Raises:
+        ConfigError: If use_mock is set and the tenant has no "mock_airbnb_urls".
+    """
+    if use_mock:
+        config = AppConfig(config).with_mock_urls()
+    configure_transport(config)
+    if changes_only:
+        return build_changes_message(config)
+    return build_digest(config, days)
+
+
+def run_tenants(
+    tenants,
+    days,
+    use_mock=False,
+    changes_only=False,
+    max_workers=None,
+    deliver=deliver_message,
+):
+    """
+    Runs several tenants at once. Tenants are sharded across a process pool so that parsing
+    uses every core, and each message is delivered to the tenant's own chats as soon as it is
+    rendered. A failing tenant does not affect the others.
+
+    Args:
+        tenants (list): (name, config) tuples, e.g. from load_tenants().
+        days (int): The number of days covered by the digests.
+        use_mock (bool, optional): Whether to use the mock calendars. Defaults to False.
+        changes_only (bool, optional): Whether to send the reservation changes instead of the
+                                       digests. Defaults to False.
+        max_workers (int, optional): Number of worker processes, defaults to the CPU count.
+        deliver (callable, optional): Delivery function, see deliver_message().
+
+    Returns:
+        list: One TenantResult per tenant, in completion order.
+    """
+    if not tenants:
+        return []
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(tenants)))
+    results = []
+
+    def send(name, config, message):
+        configure_transport(config)
+        parts = deliver(
+            message,
+            config["telegram"]["api_token"],
+            telegram_chat_ids(config),
+            telegram_api_base(config),
+        )
+        failures = [part.error for part in parts if not part.ok]
+        return TenantResult(
+            name, not failures, len(parts) - len(failures), "; ".join(failures) or None
+        )
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(
+        max_workers=workers
+    ) as senders:
+        rendering = {
+            pool.submit(render_tenant, config, days, changes_only, use_mock): (
+                name,
+                config,
+            )
+            for name, config in tenants
+        }
+        sending = {}
+        for future in as_completed(rendering):
+            name, config = rendering[future]
+            try:
+                message = future.result()
+            except ConfigError as e:
+                error = "; ".join(e.problems)
+                logging.error(f"Tenant {name} skipped: {error}")
+                results.append(TenantResult(name, False, 0, error))
+                continue
+            except Exception as e:
+                logging.error(f"Tenant {name} failed: {e!r}")
+                results.append(TenantResult(name, False, 0, repr(e)))
+                continue
+            if message is None:
+                results.append(TenantResult(name, True, 0, None))
+            else:
+                sending[senders.submit(send, name, config, message)] = name
+
+        for future in as_completed(sending):
+            name = sending[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"Delivery for tenant {name} failed: {e!r}")
+                results.append(TenantResult(name, False, 0, repr(e)))
+
+    for result in results:
+        if result.ok:
+            print(f"Tenant {result.tenant}: {result.parts_sent} message(s) sent.")
+        else:
+            print(f"Tenant {result.tenant} failed: {result.error}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run several owners (tenants) in parallel."
+    )
+    parser.add_argument("configs", nargs="+", help="Configuration files of the tenants")
+    parser.add_argument("--days", type=int, default=7, help="Days covered by digests")
+    parser.add_argument("--mock", action="store_true", help="Use the mock calendars")
+    parser.add_argument(
+        "--changes", action="store_true", help="Only send reservation changes"
+    )
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args()
+
+    run_tenants(
+        load_tenants(args.configs),
+        args.days,
+        use_mock=args.mock,
+        changes_only=args.changes,
+        max_workers=args.workers,
+    )
@@ -1,12 +1,28 @@
+import random
 import sys
+import tempfile
 import unittest
+from unittest.mock import patch
+from collections import Counter
+from datetime import date, timedelta
 from pathlib import Path
 
-# Add the src directory to the Python path
+# Add the src and data directories to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
 
-from airbnb_data import get_airbnb_reservations
+from airbnb_data import (
+    fetch_all_calendars,
+    fetch_calendar_data,
+    get_airbnb_reservations,
+    get_airbnb_reservations_for_horizons,
+    load_apartment_events,
+)
+import ics_parser
 from config_utils import find_config_path, load_configuration
+from ics_parser import KIND_RESERVED, EventFilter
+from mock_server import generate_calendar
+from reservation_cache import load_reservations
 
 
 class TestAirbnbData(unittest.TestCase):
@@ -29,6 +45,100 @@ class TestAirbnbData(unittest.TestCase):
                 f"Date: {date}, Check-ins: {res['checkins']}, Check-outs: {res['checkouts']}"
             )
 
+    def test_fetch_all_calendars_matches_sequential_fetch(self):
+        data_dir = Path(__file__).resolve().parents[1] / "data"
+        urls = {str(i): str(data_dir / f"apartment_{i}.ics") for i in (5, 3, 1, 4, 2)}
+
+        calendars = fetch_all_calendars(urls, max_workers=4, per_host_limit=2)
+
+        self.assertEqual(list(calendars), list(urls))
+        for apt_number, url_or_path in urls.items():
+            self.assertEqual(calendars[apt_number], fetch_calendar_data(url_or_path))
+
+    def test_blocked_dates_and_far_stays_are_skipped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "apartment.ics"
+            path.write_text(generate_calendar(random.Random(2), 120, 60))
+            config = {
+                "airbnb_urls": {"1": str(path)},
+                "reservation_cache": {"path": str(Path(directory) / "cache.json")},
+            }
+            events = load_apartment_events(config)["1"]
+            reserved = [e for e in events if e.kind == KIND_RESERVED]
+            start, end = date.today(), date.today() + timedelta(days=14)
+
+            skipped = Counter()
+            window = EventFilter(start, end, (KIND_RESERVED,))
+            filtered = load_apartment_events(config, window, skipped)["1"]
+            self.assertEqual(sum(skipped.values()), len(events) - len(filtered))
+            self.assertTrue(all(e.kind == KIND_RESERVED for e in filtered))
+            # The stored events do not depend on the window of the last run
+            stored, _ = load_reservations(config["reservation_cache"]["path"])
+            self.assertEqual(
+                [(e.uid, e.begin, e.end, e.kind) for e in stored["1"]],
+                [(e.uid, e.begin, e.end, e.kind) for e in reserved],
+            )
+
+            reservations = get_airbnb_reservations(config, 14)
+            expected = Counter()
+            for event in filtered:
+                for day, kind in ((event.begin, "checkins"), (event.end, "checkouts")):
+                    if start <= day <= end:
+                        expected[day, kind] += 1
+            actual = Counter()
+            for day, movements in reservations.items():
+                for kind in ("checkins", "checkouts"):
+                    actual[day, kind] += len(movements[kind])
+            self.assertEqual(actual, expected)
+
+    def test_skipped_events_are_never_built(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "apartment.ics"
+            path.write_text(generate_calendar(random.Random(3), 1000, 600))
+            config = {
+                "airbnb_urls": {"1": str(path)},
+                "reservation_cache": {"path": str(Path(directory) / "cache.json")},
+            }
+            reserved = load_apartment_events(
+                config, EventFilter(kinds=(KIND_RESERVED,))
+            )
+            window = EventFilter(
+                date.today(), date.today() + timedelta(days=7), (KIND_RESERVED,)
+            )
+
+            for streaming in (True, False):
+                config["fetch"] = {"streaming": streaming}
+                with patch(
+                    "ics_parser._parse_date", wraps=ics_parser._parse_date
+                ) as built:
+                    filtered = load_apartment_events(config, window)["1"]
+                # Two dates per returned event, plus the kind-only parse of the stored
+                # events when the bodies are kept
+                stored = 0 if streaming else len(reserved["1"])
+                self.assertEqual(built.call_count, 2 * (len(filtered) + stored))
+                self.assertLess(len(filtered), len(reserved["1"]) // 10)
+
+    def test_horizons_match_separate_fetches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            urls = {}
+            for i in range(1, 4):
+                path = Path(directory) / f"apartment_{i}.ics"
+                path.write_text(generate_calendar(random.Random(i), 60, 60))
+                urls[str(i)] = str(path)
+            config = {
+                "airbnb_urls": urls,
+                "reservation_cache": {"path": str(Path(directory) / "cache.json")},
+            }
+
+            horizons = get_airbnb_reservations_for_horizons(config, (30, 1, 7))
+            self.assertEqual(list(horizons), [1, 7, 30])
+            for days, reservations in horizons.items():
+                self.assertEqual(
+                    reservations.to_dict(),
+                    get_airbnb_reservations(config, days).to_dict(),
+                )
+            self.assertTrue(horizons[30])
+
 
 if __name__ == "__main__":
     unittest.main()
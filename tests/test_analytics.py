@@ -0,0 +1,109 @@
+import csv
+import importlib.util
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from analytics import DAILY_COLUMNS, OccupancyReport, export_report
+from ics_parser import KIND_RESERVED, CalendarEvent
+from reservation_index import ReservationIndex
+
+START = date(2024, 6, 1)
+
+
+def stay(begin, end):
+    return CalendarEvent(
+        f"{begin}-{end}",
+        START + timedelta(days=begin),
+        START + timedelta(days=end),
+        KIND_RESERVED,
+    )
+
+
+class TestOccupancyReport(unittest.TestCase):
+    def setUp(self):
+        self.events = {
+            # Starts before the window, then a back-to-back turnover on day 3
+            "1": [stay(-2, 3), stay(3, 5)],
+            # Ends after the window
+            "2": [stay(3, 9)],
+            # Entirely outside the window
+            "3": [stay(-5, -1), stay(8, 10)],
+        }
+        self.report = OccupancyReport(self.events, START, START + timedelta(days=6))
+
+    def test_occupancy_matrix(self):
+        self.assertEqual(
+            self.report.matrix.astype(int).tolist(),
+            [
+                [1, 1, 1, 1, 1, 0, 0],
+                [0, 0, 0, 1, 1, 1, 1],
+                [0, 0, 0, 0, 0, 0, 0],
+            ],
+        )
+        self.assertEqual(self.report.occupied.tolist(), [1, 1, 1, 2, 2, 1, 1])
+
+    def test_movements_and_turnovers(self):
+        self.assertEqual(self.report.checkins.tolist(), [0, 0, 0, 2, 0, 0, 0])
+        self.assertEqual(self.report.checkouts.tolist(), [0, 0, 0, 1, 0, 1, 0])
+        self.assertEqual(self.report.turnovers.tolist(), [0, 0, 0, 1, 0, 0, 0])
+        self.assertEqual(
+            self.report.summary(),
+            {
+                "occupancy_rate": 9 / 21,
+                "turnovers": 1,
+                "peak_checkins": 2,
+                "peak_checkins_date": "2024-06-04",
+            },
+        )
+
+    def test_window_matches_the_reservation_index(self):
+        end = START + timedelta(days=6)
+        table = ReservationIndex(self.events).table_between(START, end)
+        for day, checkins, checkouts in table.iter_days():
+            i = (day - START).days
+            self.assertEqual(self.report.checkins[i], len(checkins))
+            self.assertEqual(self.report.checkouts[i], len(checkouts))
+        self.assertEqual(
+            int(self.report.checkins.sum()),
+            sum(len(checkins) for _, checkins, _ in table.iter_days()),
+        )
+
+    def test_apartment_rows(self):
+        self.assertEqual(
+            self.report.apartment_rows(),
+            [("1", 5, 0.7143, 1, 1), ("2", 4, 0.5714, 1, 0), ("3", 0, 0.0, 0, 0)],
+        )
+
+    def test_export_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            written = export_report(self.report, tmp)
+            self.assertIn(Path(tmp) / "daily.csv", written)
+
+            with open(Path(tmp) / "daily.csv", newline="") as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(tuple(rows[0]), DAILY_COLUMNS)
+            self.assertEqual(rows[4], ["2024-06-04", "2", "0.6667", "2", "1", "1"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_export_parquet(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp:
+            export_report(self.report, tmp)
+            table = pq.read_table(Path(tmp) / "apartments.parquet")
+            self.assertEqual(table.column("nights").to_pylist(), [5, 4, 0])
+
+    def test_empty_portfolio(self):
+        report = OccupancyReport({}, START, START + timedelta(days=2))
+        self.assertEqual(report.occupancy_rate.tolist(), [0.0, 0.0, 0.0])
+        self.assertEqual(report.summary()["turnovers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+from airbnb_data import (
+    fetch_calendar_data,
+    load_apartment_events,
+    parse_calendar_events,
+    stream_all_calendars,
+    stream_calendar_events,
+)
+from calendar_stream import iter_text_lines
+from mock_server import MockServer, generate_calendar
+
+
+class TestCalendarStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = random.Random(11)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = Path(self.tmp.name) / name
+        path.write_bytes(text.encode("utf-8"))
+        return str(path)
+
+    def test_lines_split_across_chunks(self):
+        text = "BEGIN:VCALENDAR\r\nSUMMARY:Café\r\n folded\rbare\nEND:VCALENDAR"
+        data = text.encode("utf-8")
+        for size in (1, 2, 3, 7, len(data)):
+            chunks = [data[i : i + size] for i in range(0, len(data), size)]
+            self.assertEqual(
+                list(iter_text_lines(chunks)), text.splitlines(keepends=True)
+            )
+
+    def test_streamed_file_matches_full_parse(self):
+        body = generate_calendar(self.rng, num_events=200)
+        path = self.write("apartment.ics", body)
+        self.assertEqual(
+            stream_calendar_events(path, chunk_size=100), parse_calendar_events(body)
+        )
+        self.assertEqual(stream_calendar_events(self.write("empty.ics", "")), [])
+        self.assertIsNone(stream_calendar_events("/missing/apartment.ics"))
+
+    def test_unsupported_calendar_falls_back_to_ics(self):
+        body = (
+            "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:test\r\nBEGIN:VEVENT\r\n"
+            "DTSTART;VALUE=DATE:20240601\r\nDTEND;VALUE=DATE:20240603\r\n"
+            "RRULE:FREQ=WEEKLY;COUNT=2\r\nUID:a\r\nSUMMARY:Reserved\r\nEND:VEVENT\r\n"
+            "END:VCALENDAR\r\n"
+        )
+        path = self.write("recurring.ics", body)
+        self.assertEqual(stream_calendar_events(path), parse_calendar_events(body))
+
+    def test_streamed_downloads_match_full_downloads(self):
+        with MockServer(apartments=3, events=40) as server:
+            urls = server.calendar_urls()
+            streamed = stream_all_calendars(urls, chunk_size=256)
+            for apt_number, url in urls.items():
+                self.assertEqual(
+                    streamed[apt_number],
+                    parse_calendar_events(fetch_calendar_data(url)),
+                )
+
+    def test_streaming_config(self):
+        paths = {
+            str(i): self.write(f"{i}.ics", generate_calendar(self.rng, num_events=20))
+            for i in range(1, 4)
+        }
+        config = {
+            "airbnb_urls": paths,
+            "reservation_cache": {"path": str(Path(self.tmp.name) / "cache.json")},
+        }
+        expected = load_apartment_events(config)
+        config["fetch"] = {"streaming": True, "chunk_size": 512}
+        self.assertEqual(load_apartment_events(config), expected)
+
+    def test_memory_stays_bounded(self):
+        # A few events padded with long descriptions, as in aggregated channel-manager feeds
+        description = "DESCRIPTION:" + "x" * 70 + "\r\n" + " " + "y" * 70 + "\r\n"
+        body = generate_calendar(self.rng, num_events=20).replace(
+            "SUMMARY:", description * 2000 + "SUMMARY:"
+        )
+        path = self.write("large.ics", body)
+        self.assertGreater(len(body), 5_000_000)
+
+        tracemalloc.start()
+        try:
+            events = stream_calendar_events(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(events), 20)
+        self.assertLess(peak, len(body) // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
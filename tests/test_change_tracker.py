@@ -0,0 +1,67 @@
+import sys
+import unittest
+from datetime import date
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from change_tracker import build_snapshot, diff_snapshots, has_changes
+from ics_parser import KIND_RESERVED, CalendarEvent
+from message_format import format_changes_message
+
+TODAY = date(2024, 6, 10)
+
+
+def stay(uid, begin_day, end_day):
+    return CalendarEvent(
+        uid, date(2024, 6, begin_day), date(2024, 6, end_day), KIND_RESERVED
+    )
+
+
+class TestChangeTracker(unittest.TestCase):
+    def setUp(self):
+        self.previous = build_snapshot(
+            {
+                "1": [stay("a", 12, 14), stay("b", 15, 18), stay("past", 1, 5)],
+                "2": [stay("c", 20, 22)],
+            }
+        )
+
+    def test_new_cancelled_and_moved_stays(self):
+        current = build_snapshot(
+            {
+                "1": [stay("a", 12, 14), stay("b", 16, 18), stay("d", 25, 27)],
+                "2": [],
+            }
+        )
+
+        changes = diff_snapshots(self.previous, current, today=TODAY)
+
+        self.assertEqual([(c.apt_number, c.uid) for c in changes.new], [("1", "d")])
+        self.assertEqual(
+            [(c.apt_number, c.uid) for c in changes.cancelled], [("2", "c")]
+        )
+        self.assertEqual(
+            [(c.uid, c.begin, c.previous_begin) for c in changes.moved],
+            [("b", date(2024, 6, 16), date(2024, 6, 15))],
+        )
+        message = format_changes_message(changes)
+        self.assertIn("🆕 New: 1", message)
+        self.assertIn("(was 15/06/2024 → 18/06/2024)", message)
+
+    def test_unfetched_apartments_keep_their_stays(self):
+        current = build_snapshot(
+            {"1": [stay("a", 12, 14), stay("b", 15, 18)]},
+            previous=self.previous,
+            apartments=["1", "2"],
+        )
+
+        changes = diff_snapshots(self.previous, current, today=TODAY)
+
+        self.assertFalse(has_changes(changes))
+        self.assertEqual(format_changes_message(changes), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+import command_bot
+from command_bot import (
+    HELP_TEXT,
+    LOADING_TEXT,
+    CommandBot,
+    answer_command,
+    parse_command,
+)
+from ics_parser import KIND_RESERVED, CalendarEvent
+from mock_server import MockServer
+from reservation_index import ReservationIndex
+
+TODAY = date(2024, 6, 10)
+CONFIG = {
+    "mailboxes": ["A", "B"],
+    "special_mailboxes": {},
+    "message_format": "detailed",
+}
+
+
+def stay(begin_offset, end_offset):
+    return CalendarEvent(
+        None,
+        TODAY + timedelta(days=begin_offset),
+        TODAY + timedelta(days=end_offset),
+        KIND_RESERVED,
+    )
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.index = ReservationIndex(
+            {"1": [stay(-2, 0), stay(0, 3)], "2": [stay(1, 4)], "3": []}
+        )
+
+    def answer(self, text):
+        return answer_command(text, self.index, CONFIG, TODAY)
+
+    def test_parse_command(self):
+        self.assertEqual(parse_command("/Apt@CleaningBot 4"), ("/apt", ["4"]))
+        self.assertEqual(parse_command("who checks out?"), (None, []))
+        self.assertEqual(parse_command(None), (None, []))
+
+    def test_day_commands(self):
+        today = self.answer("/today")
+        self.assertIn("Check-ins: 1\n  - Apt 1\n", today)
+        self.assertIn("Check-outs: 1\n  - Apt 1\n", today)
+        self.assertIn("Check-ins: 1\n  - Apt 2\n", self.answer("/tomorrow"))
+        self.assertEqual(self.answer("/week").count("📅"), 4)
+        self.assertIn("📫", self.answer("/mailboxes"))
+
+    def test_apartment_command(self):
+        self.assertEqual(
+            self.answer("/apt 2"),
+            "Apt 2 is free tonight.\n"
+            "🔑 Check-in: 2024-06-11\n"
+            "🚪 Check-out: 2024-06-14\n",
+        )
+        self.assertIn("is occupied tonight", self.answer("/apt 1"))
+        self.assertIn("No check-ins", self.answer("/apt 3"))
+        self.assertEqual(self.answer("/apt 9"), "Unknown apartment 9.")
+        self.assertEqual(self.answer("/help"), HELP_TEXT)
+
+
+class TestCommandBot(unittest.TestCase):
+    def test_answers_allowed_chats_from_the_index(self):
+        with tempfile.TemporaryDirectory() as directory, MockServer(
+            apartments=3, events=30
+        ) as server:
+            config = {
+                **CONFIG,
+                "airbnb_urls": server.calendar_urls(),
+                "telegram": {
+                    "api_token": "TEST",
+                    "chat_id": ["100"],
+                    "api_base": server.url,
+                },
+                "bot": {"refresh_interval": 3600},
+                "reservation_cache": {"path": f"{directory}/reservations.json"},
+            }
+            bot = CommandBot(config, poll_timeout=1)
+            self.assertEqual(bot.answer("/today"), LOADING_TEXT)
+
+            async def run():
+                task = asyncio.create_task(bot.run())
+                # Polling runs while the index loads
+                deadline = time.monotonic() + 10
+                while bot.index is None and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                server.post_update(100, "/apt 1")
+                server.post_update(200, "/apt 1")  # Not a configured chat
+                server.post_update(100, "thanks!")  # Not a command
+                while not server.messages and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                bot.stop()
+                await task
+
+            asyncio.run(run())
+
+        self.assertIsNotNone(bot.index)
+        self.assertEqual(len(server.messages), 1)
+        chat_id, text = server.messages[0]
+        self.assertEqual(chat_id, "100")
+        self.assertTrue(text.startswith("Apt 1 is "))
+
+    def test_failed_first_refresh_is_reported(self):
+        bot = CommandBot({**CONFIG, "telegram": {"api_token": "TEST", "chat_id": "1"}})
+        with patch("command_bot.load_apartment_events", side_effect=OSError("offline")):
+            asyncio.run(bot.refresh())
+        self.assertIn("could not be loaded (offline)", bot.answer("/today"))
+
+    def test_refused_polls_back_off(self):
+        bot = CommandBot({**CONFIG, "telegram": {"api_token": "TEST", "chat_id": "1"}})
+        refused = {"ok": False, "error_code": 409, "description": "Conflict"}
+
+        async def run():
+            task = asyncio.create_task(bot.poll_forever())
+            await asyncio.sleep(0.5)
+            bot.stop()
+            await task
+
+        with patch(
+            "command_bot.get_telegram_updates", return_value=refused
+        ) as get_updates, patch.object(command_bot, "POLL_ERROR_DELAY", 0.2):
+            asyncio.run(run())
+        self.assertLessEqual(get_updates.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
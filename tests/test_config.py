@@ -1,11 +1,30 @@
+import json
+import os
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
 # Add the src directory to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from config_utils import find_config_path, load_configuration, print_pretty_json
+from config_utils import (
+    AppConfig,
+    ConfigError,
+    find_config_path,
+    load_app_config,
+    load_configuration,
+    print_pretty_json,
+    validate_config,
+)
+
+VALID_CONFIG = {
+    "airbnb_urls": {"1": "https://example.com/a.ics", "2": "https://example.com/b.ics"},
+    "mock_airbnb_urls": {"1": "data/apartment_1.ics"},
+    "mailboxes": ["A", "B"],
+    "special_mailboxes": {"2": "S"},
+    "telegram": {"api_token": "TEST", "chat_id": ["1", "2"]},
+}
 
 
 class TestConfigUtils(unittest.TestCase):
@@ -37,5 +56,60 @@ class TestConfigUtils(unittest.TestCase):
             self.fail(f"print_pretty_json raised an exception: {e}")
 
 
+class TestAppConfig(unittest.TestCase):
+    def test_missing_and_invalid_keys_are_reported_together(self):
+        config = dict(VALID_CONFIG, message_format="fancy", fetch=[])
+        del config["mailboxes"]
+        del config["telegram"]
+
+        with self.assertRaises(ConfigError) as raised:
+            AppConfig(config, "config.json")
+        problems = raised.exception.problems
+        self.assertEqual(len(problems), 4)
+        self.assertIn("missing 'mailboxes' (a list of mailboxes)", problems)
+        self.assertIn("missing 'telegram'", problems)
+
+    def test_tenants_are_validated_with_the_shared_keys(self):
+        shared = {
+            key: value for key, value in VALID_CONFIG.items() if key != "mailboxes"
+        }
+        config = {**shared, "tenants": {"a": {"mailboxes": ["A"]}, "b": {}}}
+        self.assertEqual(
+            validate_config(config),
+            ["missing 'tenants.b.mailboxes' (a list of mailboxes)"],
+        )
+
+    def test_derived_lookups(self):
+        config = AppConfig(VALID_CONFIG)
+        self.assertEqual(config.apartments, ("1", "2"))
+        self.assertEqual(config.hosts, {"example.com": ["1", "2"]})
+        self.assertEqual(config.special_mailboxes, {"2": "S"})
+        self.assertEqual(config.message_format, "mailboxes")
+        self.assertEqual(config["telegram"]["api_token"], "TEST")
+
+        mock = config.with_mock_urls()
+        self.assertEqual(mock.apartments, ("1",))
+        self.assertEqual(config.apartments, ("1", "2"))
+
+    def test_load_is_cached_until_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "config.json"
+            path.write_text(json.dumps(VALID_CONFIG))
+
+            first = load_app_config(path)
+            self.assertIs(load_app_config(path), first)
+
+            path.write_text(json.dumps(dict(VALID_CONFIG, message_format="basic")))
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            reloaded = load_app_config(path)
+            self.assertIsNot(reloaded, first)
+            self.assertEqual(reloaded.message_format, "basic")
+
+    def test_unreadable_file(self):
+        with self.assertRaises(ConfigError):
+            load_app_config("/nonexistent/config.json")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,173 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from daemon import PollingDaemon, Scheduler, next_digest_time
+from ics_parser import KIND_BLOCKED, KIND_RESERVED, CalendarEvent
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+class TestDaemon(unittest.TestCase):
+    def test_scheduler_returns_due_tasks_in_time_order(self):
+        scheduler = Scheduler()
+        scheduler.schedule(30, "poll", "2")
+        scheduler.schedule(10, "poll", "1")
+        scheduler.schedule(10, "config")
+
+        self.assertEqual(scheduler.next_due(), 10)
+        self.assertEqual(scheduler.pop_due(20), [("poll", ("1",)), ("config", ())])
+        self.assertEqual(scheduler.next_due(), 30)
+
+    def test_next_digest_time(self):
+        now = datetime(2024, 6, 10, 9, 30)
+        self.assertEqual(
+            next_digest_time("08:00", now), datetime(2024, 6, 11, 8, 0).timestamp()
+        )
+        self.assertEqual(
+            next_digest_time("18:15", now), datetime(2024, 6, 10, 18, 15).timestamp()
+        )
+
+    def test_config_reload_and_poll(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            config = {
+                "airbnb_urls": {"1": str(DATA_DIR / "apartment_1.ics")},
+                "mailboxes": ["1", "2"],
+                "special_mailboxes": {},
+                "telegram": {"api_token": "TEST", "chat_id": "1"},
+                "daemon": {"poll_interval": 600, "jitter": 0},
+            }
+            config_path.write_text(json.dumps(config))
+            daemon = PollingDaemon(config_path, days=7)
+
+            self.assertTrue(daemon.reload_config())
+            self.assertFalse(daemon.reload_config())
+            daemon.poll([args for _, args in daemon.scheduler.pop_due(time.time())])
+
+            self.assertIn("1", daemon.events_by_apartment)
+            self.assertGreater(daemon.scheduler.next_due(), time.time() + 500)
+
+    def test_digest_leaves_out_blocked_dates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            config = {
+                "airbnb_urls": {"1": "unused", "2": "unused"},
+                "mailboxes": ["1"],
+                "special_mailboxes": {},
+                "message_format": "detailed",
+                "telegram": {"api_token": "TEST", "chat_id": "1"},
+            }
+            config_path.write_text(json.dumps(config))
+            daemon = PollingDaemon(config_path, days=7)
+            self.assertTrue(daemon.reload_config())
+            today = date.today()
+            daemon.events_by_apartment = {
+                "1": [
+                    CalendarEvent("a", today, today + timedelta(days=2), KIND_RESERVED)
+                ],
+                "2": [
+                    CalendarEvent("b", today, today + timedelta(days=3), KIND_BLOCKED)
+                ],
+            }
+            sent = []
+            daemon._send = sent.append
+
+            self.assertTrue(daemon.send_digest())
+            self.assertIn("Check-ins: 1\n  - Apt 1\n", sent[0])
+            self.assertNotIn("Apt 2", sent[0])
+
+    def test_unparseable_calendar_does_not_stop_later_polls(self):
+        with tempfile.TemporaryDirectory() as directory:
+            error_page = Path(directory) / "error.ics"
+            error_page.write_text("<html><body>Service unavailable</body></html>\n")
+            config_path = Path(directory) / "config.json"
+            config = {
+                "airbnb_urls": {
+                    "1": str(error_page),
+                    "2": str(DATA_DIR / "apartment_2.ics"),
+                },
+                "mailboxes": ["1"],
+                "special_mailboxes": {},
+                "telegram": {"api_token": "TEST", "chat_id": "1"},
+                "reservation_cache": {"path": str(Path(directory) / "cache.json")},
+                "daemon": {"poll_interval": 600, "jitter": 0},
+            }
+            config_path.write_text(json.dumps(config))
+            daemon = PollingDaemon(config_path, days=7)
+            self.assertTrue(daemon.reload_config())
+
+            daemon.poll(
+                [args for _, args in daemon.scheduler.pop_due(time.time() + 10)]
+            )
+
+            self.assertEqual(list(daemon.events_by_apartment), ["2"])
+            rescheduled = daemon.scheduler.pop_due(time.time() + 1000)
+            self.assertEqual(sorted(args[0] for _, args in rescheduled), ["1", "2"])
+
+    def test_digest_is_sent_without_failing_calendars_after_max_delay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            config = {
+                "airbnb_urls": {"1": "unused", "2": "unused"},
+                "mailboxes": ["1"],
+                "special_mailboxes": {},
+                "message_format": "detailed",
+                "telegram": {"api_token": "TEST", "chat_id": "1"},
+                "daemon": {"digest_max_delay": 3600},
+            }
+            config_path.write_text(json.dumps(config))
+            daemon = PollingDaemon(config_path, days=7)
+            self.assertTrue(daemon.reload_config())
+            today = date.today()
+            daemon.events_by_apartment = {
+                "1": [
+                    CalendarEvent("a", today, today + timedelta(days=2), KIND_RESERVED)
+                ]
+            }
+            sent = []
+            daemon._send = sent.append
+
+            daemon.run_task("digest", ())
+            self.assertEqual(sent, [])
+            retries = daemon.scheduler.pop_due(time.time() + 120)
+            self.assertIn(("digest", ()), retries)
+
+            daemon._digest_postponed_at -= 3600
+            daemon.run_task("digest", ())
+            self.assertEqual(len(sent), 1)
+            self.assertTrue(sent[0].startswith("⚠️"))
+            self.assertIn("Apt 2", sent[0].splitlines()[0])
+            self.assertIn("  - Apt 1\n", sent[0])
+            self.assertIsNone(daemon._digest_postponed_at)
+
+    def test_invalid_config_keeps_the_previous_one(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            config = {
+                "airbnb_urls": {"1": str(DATA_DIR / "apartment_1.ics")},
+                "mailboxes": ["1"],
+                "special_mailboxes": {},
+                "telegram": {"api_token": "TEST", "chat_id": "1"},
+            }
+            config_path.write_text(json.dumps(config))
+            daemon = PollingDaemon(config_path, days=7)
+            self.assertTrue(daemon.reload_config())
+
+            del config["mailboxes"]
+            config_path.write_text(json.dumps(config) + " ")
+            os.utime(config_path, (time.time() + 5, time.time() + 5))
+            self.assertFalse(daemon.reload_config())
+            self.assertEqual(daemon.config["mailboxes"], ["1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
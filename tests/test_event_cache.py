@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from airbnb_data import parse_calendar_events
+from event_cache import ParsedEventCache
+from http_cache import content_hash
+from ics_parser import KIND_RESERVED, CalendarEvent
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+class TestParsedEventCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_cached_events_equal_parsed_events(self):
+        cache = ParsedEventCache(self.cache_dir.name)
+        calendar_data = (DATA_DIR / "apartment_1.ics").read_text()
+
+        events = parse_calendar_events(calendar_data, cache=cache)
+
+        self.assertEqual(cache.get(calendar_data), events)
+        self.assertEqual(parse_calendar_events(calendar_data), events)
+        self.assertTrue(all(e.summary for e in events))
+
+    def test_entries_without_summaries_are_parsed_again(self):
+        cache = ParsedEventCache(self.cache_dir.name)
+        path = cache._entry_path(content_hash("calendar body"))
+        path.write_text('[["1@test", 738886, 738888, "reserved"]]')
+
+        self.assertIsNone(cache.get("calendar body"))
+
+    def test_unchanged_calendars_are_not_parsed_again(self):
+        cache = ParsedEventCache(self.cache_dir.name)
+        sentinel = [
+            CalendarEvent("1@test", date(2024, 1, 1), date(2024, 1, 3), KIND_RESERVED)
+        ]
+        cache.put("calendar body", sentinel)
+
+        self.assertEqual(parse_calendar_events("calendar body", cache=cache), sentinel)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ParsedEventCache(self.cache_dir.name, max_entries=2)
+        for i, body in enumerate(["a", "b"]):
+            cache.put(body, [])
+            # Give each entry a distinct, increasing last-use time
+            os.utime(cache._entry_path(content_hash(body)), (i, i))
+        cache.get("a")
+        cache.put("c", [])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import random
+import sys
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from fragment_cache import FragmentCache
+from ics_parser import KIND_RESERVED, CalendarEvent
+from mailbox_allocator import MailboxAllocator
+from message_format import FORMAT_MAILBOXES, render_messages
+from reservation_index import ReservationIndex
+
+START = date(2024, 6, 1)
+MAILBOXES = ["A", "B", "C"]
+SPECIAL_MAILBOXES = {"2": "S"}
+
+
+def random_stays(rng, apartments=8, stays=10, days=90):
+    events = {}
+    for apt_number in range(1, apartments + 1):
+        day = rng.randint(0, 5)
+        events[str(apt_number)] = []
+        for _ in range(stays):
+            begin = START + timedelta(days=day)
+            end = begin + timedelta(days=rng.randint(1, 6))
+            events[str(apt_number)].append(
+                CalendarEvent(None, begin, end, KIND_RESERVED)
+            )
+            day = (end - START).days + rng.randint(0, 4)
+    return events
+
+
+def table(events, start=START, days=90):
+    return ReservationIndex(events).table_between(start, start + timedelta(days=days))
+
+
+def full_render(reservations, mailboxes=MAILBOXES):
+    return render_messages(
+        reservations, (FORMAT_MAILBOXES,), mailboxes, SPECIAL_MAILBOXES
+    )[FORMAT_MAILBOXES]
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(4)
+        self.events = random_stays(self.rng)
+        self.cache = FragmentCache()
+
+    def render(self, reservations, mailboxes=MAILBOXES):
+        return self.cache.render(reservations, mailboxes, SPECIAL_MAILBOXES)
+
+    def test_unchanged_digest_is_reassembled_from_the_cache(self):
+        reservations = table(self.events)
+        self.assertEqual(self.render(reservations), full_render(reservations))
+        days = self.cache.misses
+
+        self.assertEqual(self.render(reservations), full_render(reservations))
+        self.assertEqual(self.cache.misses, days)
+        self.assertEqual(self.cache.hits, days)
+
+    def test_changed_days_match_a_full_render(self):
+        self.render(table(self.events))
+        for _ in range(20):
+            apt_number = self.rng.choice(list(self.events))
+            stays = self.events[apt_number]
+            i = self.rng.randrange(len(stays))
+            shift = timedelta(days=self.rng.choice((-1, 1)))
+            stays[i] = stays[i]._replace(end=stays[i].end + shift)
+            if stays[i].end <= stays[i].begin:
+                del stays[i]
+
+            reservations = table(self.events)
+            misses = self.cache.misses
+            self.assertEqual(self.render(reservations), full_render(reservations))
+            self.assertLess(self.cache.misses - misses, len(reservations))
+
+    def test_mailbox_configuration_change_resets_the_cache(self):
+        reservations = table(self.events)
+        self.render(reservations)
+        self.assertEqual(
+            self.render(reservations, ["C", "B"]), full_render(reservations, ["C", "B"])
+        )
+
+    def test_past_days_are_evicted_and_size_is_bounded(self):
+        self.render(table(self.events))
+        later = START + timedelta(days=30)
+        reservations = table(self.events, start=later, days=60)
+        self.assertEqual(self.render(reservations), full_render(reservations))
+        self.assertTrue(all(key[1] >= later.toordinal() for key in self.cache._entries))
+
+        small = FragmentCache(max_entries=5)
+        small.render(reservations, MAILBOXES, SPECIAL_MAILBOXES)
+        self.assertEqual(len(small), 5)
+
+    def test_allocator_state_round_trip(self):
+        allocator = MailboxAllocator(MAILBOXES, SPECIAL_MAILBOXES)
+        allocator.allocate_day(["1", "2", "3"], [])
+        allocator.allocate_day(["4"], ["1"])
+        resumed = MailboxAllocator(MAILBOXES, SPECIAL_MAILBOXES)
+        resumed.restore(allocator.state())
+        for checkins, checkouts in ((["5", "6"], ["3"]), (["7"], ["2", "4"])):
+            self.assertEqual(
+                resumed.allocate_day(checkins, checkouts),
+                allocator.allocate_day(checkins, checkouts),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
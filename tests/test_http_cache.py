@@ -0,0 +1,83 @@
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from airbnb_data import fetch_calendar_data
+from http_cache import HTTPCache
+
+CALENDAR_BODY = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n"
+CALENDAR_ETAG = '"v1"'
+
+
+class CalendarHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == CALENDAR_ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = CALENDAR_BODY.encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", CALENDAR_ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        CalendarHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CalendarHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/calendar.ics"
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_dir.cleanup()
+
+    def test_conditional_get_serves_cached_body_on_304(self):
+        first = fetch_calendar_data(self.url, cache=HTTPCache(self.cache_dir.name))
+        # A new cache instance reads the entry persisted by the previous run
+        second = fetch_calendar_data(self.url, cache=HTTPCache(self.cache_dir.name))
+
+        self.assertEqual(first, CALENDAR_BODY)
+        self.assertEqual(second, CALENDAR_BODY)
+        self.assertNotIn("If-None-Match", CalendarHandler.requests_seen[0])
+        self.assertEqual(
+            CalendarHandler.requests_seen[1]["If-None-Match"], CALENDAR_ETAG
+        )
+
+    def test_expired_entries_are_not_revalidated(self):
+        cache = HTTPCache(self.cache_dir.name, max_age=-1)
+        cache.store(self.url, CALENDAR_BODY, etag=CALENDAR_ETAG)
+
+        self.assertEqual(cache.conditional_headers(self.url), {})
+        self.assertIsNone(cache.get(self.url))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = HTTPCache(self.cache_dir.name, max_bytes=2 * len(CALENDAR_BODY))
+        cache.store("http://example.com/1.ics", CALENDAR_BODY)
+        cache.store("http://example.com/2.ics", CALENDAR_BODY)
+        cache.get("http://example.com/1.ics")
+        cache.store("http://example.com/3.ics", CALENDAR_BODY)
+
+        self.assertIsNotNone(cache.get("http://example.com/1.ics"))
+        self.assertIsNone(cache.get("http://example.com/2.ics"))
+        self.assertIsNotNone(cache.get("http://example.com/3.ics"))
+
+
+if __name__ == "__main__":
+    unittest.main()
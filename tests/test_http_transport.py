@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import http_transport
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    failures_left = 0
+    connections = set()
+    posts = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        FlakyHandler.posts += 1
+        self.do_GET()
+
+    def do_GET(self):
+        FlakyHandler.connections.add(self.client_address)
+        if self.path == "/slow":
+            time.sleep(0.5)
+        if FlakyHandler.failures_left > 0:
+            FlakyHandler.failures_left -= 1
+            status, body = 503, b"unavailable"
+        else:
+            status, body = 200, b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        FlakyHandler.failures_left = 0
+        FlakyHandler.connections = set()
+        FlakyHandler.posts = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        http_transport.configure_transport(
+            {"http": {"backoff_factor": 0, "backoff_jitter": 0, "read_timeout": 0.2}}
+        )
+
+    def tearDown(self):
+        http_transport.configure_transport({})
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_server_errors_are_retried(self):
+        FlakyHandler.failures_left = 2
+
+        response = http_transport.get(f"{self.base_url}/calendar.ics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FlakyHandler.failures_left, 0)
+
+    def test_server_errors_are_not_retried_for_post(self):
+        FlakyHandler.failures_left = 2
+
+        response = http_transport.post(f"{self.base_url}/sendMessage", data={"a": 1})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(FlakyHandler.posts, 1)
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            http_transport.get(f"{self.base_url}/calendar.ics")
+
+        self.assertEqual(len(FlakyHandler.connections), 1)
+
+    def test_read_timeout(self):
+        http_transport.configure_transport(
+            {"http": {"retries": 0, "read_timeout": 0.1}}
+        )
+
+        with self.assertRaises(requests.RequestException):
+            http_transport.get(f"{self.base_url}/slow")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import sys
+import unittest
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from ics_parser import (
+    KIND_BLOCKED,
+    KIND_RESERVED,
+    SKIPPED_KIND,
+    SKIPPED_WINDOW,
+    EventFilter,
+    UnsupportedCalendarError,
+    iter_vevents,
+    parse_events,
+    parse_with_ics,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+def calendar(*event_lines):
+    return "\r\n".join(
+        [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:test",
+            *event_lines,
+            "END:VCALENDAR",
+            "",
+        ]
+    )
+
+
+class TestICSParser(unittest.TestCase):
+    def test_all_day_event_with_folded_summary(self):
+        data = calendar(
+            "BEGIN:VEVENT",
+            "DTSTART;VALUE=DATE:20240606",
+            "DTEND;VALUE=DATE:20240608",
+            "SUMMARY:Airbnb (Not",
+            "  available)",
+            "UID:807925675@airbnb.com",
+            "END:VEVENT",
+        )
+
+        (event,) = iter_vevents(data.splitlines())
+
+        self.assertEqual(event.uid, "807925675@airbnb.com")
+        self.assertEqual(event.begin, date(2024, 6, 6))
+        self.assertEqual(event.end, date(2024, 6, 8))
+        self.assertEqual(event.summary, "Airbnb (Not available)")
+        self.assertEqual(event.kind, KIND_BLOCKED)
+
+    def test_date_time_values_and_nested_alarms(self):
+        data = calendar(
+            "BEGIN:VEVENT",
+            'DTSTART;TZID="Europe/Madrid":20240606T150000',
+            "DTEND:20240608T100000Z",
+            "SUMMARY:Reserved",
+            "BEGIN:VALARM",
+            "SUMMARY:Reminder",
+            "END:VALARM",
+            "END:VEVENT",
+        )
+
+        (event,) = iter_vevents(data.splitlines())
+
+        self.assertEqual((event.begin, event.end), (date(2024, 6, 6), date(2024, 6, 8)))
+        self.assertEqual(event.summary, "Reserved")
+        self.assertEqual(event.kind, KIND_RESERVED)
+
+    def test_recurring_events_fall_back_to_ics(self):
+        data = calendar(
+            "BEGIN:VEVENT",
+            "DTSTART;VALUE=DATE:20240606",
+            "DTEND;VALUE=DATE:20240607",
+            "RRULE:FREQ=WEEKLY;COUNT=2",
+            "SUMMARY:Reserved",
+            "UID:1@airbnb.com",
+            "END:VEVENT",
+        )
+
+        with self.assertRaises(UnsupportedCalendarError):
+            list(iter_vevents(data.splitlines()))
+        self.assertEqual(parse_events(data), parse_with_ics(data))
+
+    def test_fast_path_matches_ics_on_mock_calendars(self):
+        for path in sorted(DATA_DIR.glob("apartment_*.ics")):
+            data = path.read_text()
+            self.assertEqual(
+                sorted(iter_vevents(data.splitlines())),
+                sorted(parse_with_ics(data)),
+                path.name,
+            )
+
+    def test_filter_skips_events_outside_the_window_and_of_other_kinds(self):
+        def event(begin, end, summary="Reserved"):
+            return [
+                "BEGIN:VEVENT",
+                f"DTSTART;VALUE=DATE:{begin}",
+                f"DTEND:{end}",
+                f"SUMMARY:{summary}",
+                "END:VEVENT",
+            ]
+
+        data = calendar(
+            *event("20240601", "20240603"),  # Checks out before the window
+            *event("20240608", "20240612"),  # In-house over the whole window
+            *event("20240609", "20240610T110000Z"),
+            *event("20240609", "20240610", "Airbnb (Not available)"),
+            *event("20240611", "20240613"),  # Checks in after the window
+        )
+        window = EventFilter(date(2024, 6, 9), date(2024, 6, 10), (KIND_RESERVED,))
+        skipped = Counter()
+
+        events = parse_events(data, window, skipped)
+
+        self.assertEqual([(e.begin.day, e.end.day) for e in events], [(8, 12), (9, 10)])
+        self.assertEqual(skipped, {SKIPPED_WINDOW: 2, SKIPPED_KIND: 1})
+        self.assertEqual(window.select(parse_events(data)), events)
+
+    def test_filter_leaves_malformed_dates_to_the_parser(self):
+        data = calendar(
+            "BEGIN:VEVENT",
+            "DTSTART:2024-06-09",
+            "DTEND:20240610",
+            "END:VEVENT",
+        )
+        with self.assertRaises(UnsupportedCalendarError):
+            list(iter_vevents(data.splitlines(), EventFilter(date(2024, 7, 1))))
+
+
+if __name__ == "__main__":
+    unittest.main()
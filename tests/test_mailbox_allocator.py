@@ -0,0 +1,59 @@
+import sys
+import unittest
+from datetime import date
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from mailbox_allocator import (
+    UNASSIGNED_MAILBOX,
+    MailboxAllocator,
+    MailboxAssignment,
+    assign_mailboxes,
+)
+
+
+def day(checkins=(), checkouts=()):
+    return {
+        "checkins": [{"apt_number": apt} for apt in checkins],
+        "checkouts": [{"apt_number": apt} for apt in checkouts],
+    }
+
+
+class TestMailboxAllocator(unittest.TestCase):
+    def test_mailboxes_stay_busy_until_checkout(self):
+        reservations = {
+            date(2024, 6, 1): day(checkins=["3"]),
+            date(2024, 6, 2): day(checkins=["4"]),
+            date(2024, 6, 3): day(checkins=["5"], checkouts=["3"]),
+        }
+
+        assignments = assign_mailboxes(reservations, ["1", "2"], {})
+
+        self.assertEqual(
+            assignments,
+            [
+                MailboxAssignment(date(2024, 6, 1), "3", "1"),
+                MailboxAssignment(date(2024, 6, 2), "4", "2"),
+                MailboxAssignment(date(2024, 6, 3), "5", "1"),
+            ],
+        )
+
+    def test_special_mailboxes_are_served_first(self):
+        allocator = MailboxAllocator(["1", "2", "3"], {"2": "1"})
+
+        self.assertEqual(allocator.allocate_day(["1", "2"], []), ["2", "1"])
+        self.assertEqual(
+            allocator.allocate_day(["3", "4"], []), ["3", UNASSIGNED_MAILBOX]
+        )
+        self.assertEqual(allocator.allocate_day(["5"], ["2"]), ["1"])
+
+    def test_busy_special_mailbox_falls_back_to_general(self):
+        allocator = MailboxAllocator(["1", "2"], {"1": "2", "3": "2"})
+
+        self.assertEqual(allocator.allocate_day(["1", "3"], []), ["2", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
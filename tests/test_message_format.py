@@ -1,5 +1,6 @@
 import sys
 import unittest
+from datetime import date
 from pathlib import Path
 
 # Add the src directory to the Python path
@@ -8,9 +9,14 @@ sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 from airbnb_data import get_airbnb_reservations
 from config_utils import find_config_path, load_configuration
 from message_format import (
+    ALL_FORMATS,
+    FORMAT_BASIC,
+    FORMAT_DETAILED,
+    FORMAT_MAILBOXES,
     format_basic_message,
     format_detailed_message,
     format_detailed_message_assign_mailboxes,
+    render_messages,
 )
 
 
@@ -40,6 +46,49 @@ class TestMessageFormat(unittest.TestCase):
             )
         )
 
+    def test_render_messages_single_pass(self):
+        reservations = {
+            date(2024, 6, 7): {
+                "checkins": [{"apt_number": "3"}],
+                "checkouts": [{"apt_number": "4"}],
+            },
+            date(2024, 6, 6): {
+                "checkins": [{"apt_number": "1"}, {"apt_number": "3"}],
+                "checkouts": [],
+            },
+        }
+
+        messages = render_messages(reservations, ALL_FORMATS, ["1", "2"], {"1": "2"})
+
+        self.assertEqual(
+            messages[FORMAT_BASIC],
+            "Reservations Summary:\n"
+            "Fecha: 2024-06-06 - Check-ins: 2, Check-outs: 0\n"
+            "Fecha: 2024-06-07 - Check-ins: 1, Check-outs: 1\n",
+        )
+        self.assertEqual(
+            messages[FORMAT_MAILBOXES],
+            "📅 Thursday, 06 de June 2024\n"
+            "🔑 Check-ins: 2\n"
+            "  - Apt 1 - 📫 2\n"
+            "  - Apt 3 - 📫 1\n"
+            "🚪 Check-outs: 0\n"
+            "----------\n"
+            "📅 Friday, 07 de June 2024\n"
+            "🔑 Check-ins: 1\n"
+            "  - Apt 3 - 📫 1\n"
+            "🚪 Check-outs: 1\n"
+            "  - Apt 4\n"
+            "----------\n",
+        )
+        self.assertEqual(
+            messages[FORMAT_DETAILED], format_detailed_message(reservations)
+        )
+        self.assertEqual(
+            render_messages(reservations, (FORMAT_BASIC,)),
+            {FORMAT_BASIC: messages[FORMAT_BASIC]},
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from airbnb_data import fetch_all_calendars, parse_apartment_events
+from metrics import METRICS, Metrics, timed
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_disabled_registry_records_nothing(self):
+        metrics = Metrics()
+        with metrics.timer("fetch", apartment="1"):
+            pass
+        metrics.incr("bytes_fetched", 100)
+        self.assertEqual(metrics.summary(), {"counters": [], "timers": []})
+
+    def test_counters_and_timers_are_labelled(self):
+        metrics = Metrics()
+        metrics.enable()
+        metrics.incr("bytes_fetched", 100, apartment="1")
+        metrics.incr("bytes_fetched", 50, apartment="1")
+        metrics.incr("bytes_fetched", 10, apartment="2")
+        for _ in range(3):
+            with metrics.timer("parse", apartment="1"):
+                pass
+
+        summary = metrics.summary()
+        self.assertEqual(
+            summary["counters"],
+            [
+                {"name": "bytes_fetched", "labels": {"apartment": "1"}, "value": 150},
+                {"name": "bytes_fetched", "labels": {"apartment": "2"}, "value": 10},
+            ],
+        )
+        self.assertEqual(len(summary["timers"]), 1)
+        self.assertEqual(summary["timers"][0]["count"], 3)
+        self.assertEqual(summary["timers"][0]["labels"], {"apartment": "1"})
+
+    def test_prometheus_export(self):
+        metrics = Metrics()
+        metrics.enable()
+        metrics.incr("messages_sent", 2)
+        metrics.incr("bytes_fetched", 7, apartment='a"b')
+        with metrics.timer("render"):
+            pass
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE airbnb_messages_sent_total counter\n", text)
+        self.assertIn("airbnb_messages_sent_total 2\n", text)
+        self.assertIn('airbnb_bytes_fetched_total{apartment="a\\"b"} 7\n', text)
+        self.assertIn("# TYPE airbnb_render_seconds summary\n", text)
+        self.assertIn("airbnb_render_seconds_count 1\n", text)
+
+    def test_export_writes_json_and_prometheus_files(self):
+        metrics = Metrics()
+        metrics.enable()
+        metrics.incr("events_parsed", 4)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "run.json"
+            prometheus_path = Path(tmp) / "textfile" / "airbnb.prom"
+            metrics.export(json_path, prometheus_path)
+
+            with open(json_path) as f:
+                self.assertEqual(json.load(f)["counters"][0]["value"], 4)
+            self.assertIn("airbnb_events_parsed_total 4", prometheus_path.read_text())
+
+    def test_timed_decorator(self):
+        @timed("double")
+        def double(value):
+            return value * 2
+
+        METRICS.enable()
+        self.assertEqual(double(2), 4)
+        self.assertEqual(METRICS.summary()["timers"][0]["name"], "double")
+
+    def test_fetch_and_parse_are_instrumented_per_apartment(self):
+        METRICS.enable()
+        path = str(DATA_DIR / "apartment_1.ics")
+        calendars = fetch_all_calendars({"1": path, "2": "/missing.ics"})
+        events = parse_apartment_events("1", calendars["1"])
+
+        counters = {
+            (counter["name"], counter["labels"]["apartment"]): counter["value"]
+            for counter in METRICS.summary()["counters"]
+        }
+        self.assertEqual(counters[("bytes_fetched", "1")], len(calendars["1"].encode()))
+        self.assertEqual(counters[("fetch_errors", "2")], 1)
+        self.assertEqual(counters[("events_parsed", "1")], len(events))
+        timers = {
+            (timer["name"], timer["labels"]["apartment"])
+            for timer in METRICS.summary()["timers"]
+        }
+        self.assertIn(("fetch", "1"), timers)
+        self.assertIn(("parse", "1"), timers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+import http_transport
+from airbnb_data import fetch_all_calendars, fetch_calendar_data, parse_calendar_events
+from http_cache import HTTPCache
+from mock_server import MockServer
+from telegram_bot import send_telegram_message
+from telegram_delivery import TelegramDeliveryQueue, deliver_message
+
+
+class TestMockServer(unittest.TestCase):
+    def setUp(self):
+        http_transport.configure_transport(
+            {"http": {"backoff_factor": 0, "backoff_jitter": 0, "retries": 2}}
+        )
+
+    def tearDown(self):
+        http_transport.configure_transport({})
+
+    def test_calendars_are_revalidated_with_etags(self):
+        with MockServer(
+            apartments=3, events=20
+        ) as server, tempfile.TemporaryDirectory() as tmp:
+            cache = HTTPCache(tmp)
+            urls = server.calendar_urls()
+
+            first = fetch_all_calendars(urls, cache=cache)
+            second = fetch_all_calendars(urls, cache=cache)
+
+            self.assertEqual(first, second)
+            self.assertEqual(len(parse_calendar_events(first["1"])), 20)
+            self.assertEqual(server.stats["not_modified"], 3)
+
+    def test_server_errors_exhaust_the_retries(self):
+        with MockServer(apartments=1, error_rate=1.0) as server:
+            self.assertIsNone(fetch_calendar_data(server.calendar_urls()["1"]))
+            self.assertEqual(server.stats["calendar_errors"], 3)
+
+    def test_long_messages_are_rejected_unless_split(self):
+        with MockServer(apartments=0) as server:
+            text = "----------\n".join(["x" * 3000 + "\n"] * 3)
+
+            response = send_telegram_message(text, "TOKEN", "1", server.url)
+            self.assertEqual(response["error_code"], 400)
+
+            results = deliver_message(text, "TOKEN", ["1"], server.url)
+            self.assertTrue(all(result.ok for result in results))
+            self.assertEqual(len(server.messages), 3)
+
+    def test_rate_limited_messages_are_retried_after_retry_after(self):
+        with MockServer(apartments=0, per_chat_interval=0.2) as server:
+            queue = TelegramDeliveryQueue(
+                "TOKEN",
+                per_chat_interval=0,
+                send=partial(send_telegram_message, api_base=server.url),
+            )
+            queue.put("1", "first")
+            queue.put("1", "----------\n".join(["a" * 3000 + "\n", "b" * 3000 + "\n"]))
+
+            results = queue.run()
+
+            self.assertTrue(all(result.ok for result in results))
+            self.assertGreaterEqual(server.stats["rate_limited"], 1)
+            self.assertEqual([text[0] for _, text in server.messages], ["f", "a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
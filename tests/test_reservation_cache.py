@@ -0,0 +1,142 @@
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from ics_parser import KIND_BLOCKED, KIND_RESERVED, CalendarEvent
+from config_utils import load_app_config
+from main import show_cached_digests, show_cached_reservations
+from reservation_cache import load_reservations, save_reservations
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+class TestReservationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "reservations.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        events = {
+            "1": [
+                CalendarEvent("a", date(2024, 6, 1), date(2024, 6, 3), KIND_RESERVED),
+                CalendarEvent("b", date(2024, 6, 5), date(2024, 6, 9), KIND_BLOCKED),
+            ]
+        }
+        save_reservations(self.path, events)
+
+        loaded, saved_at = load_reservations(self.path)
+        self.assertEqual(loaded, events)
+        self.assertEqual(saved_at.date(), date.today())
+
+    def test_missing_file(self):
+        self.assertIsNone(load_reservations(self.path))
+
+    def test_failed_apartments_keep_their_stored_events(self):
+        stay = CalendarEvent("a", date(2024, 6, 1), date(2024, 6, 3), KIND_RESERVED)
+        save_reservations(self.path, {"1": [stay], "2": [stay]})
+        save_reservations(self.path, {"1": []}, apartments=["1", "2"])
+
+        loaded, _ = load_reservations(self.path)
+        self.assertEqual(loaded, {"2": [stay], "1": []})
+
+    def test_cached_digest_counts_the_configured_kinds(self):
+        today = date.today()
+        save_reservations(
+            self.path,
+            {
+                "1": [
+                    CalendarEvent("a", today, today + timedelta(days=2), KIND_RESERVED)
+                ],
+                "2": [
+                    CalendarEvent("b", today, today + timedelta(days=3), KIND_BLOCKED)
+                ],
+            },
+        )
+        config = {
+            "mailboxes": ["A"],
+            "special_mailboxes": {},
+            "message_format": "detailed",
+            "reservation_cache": {"path": str(self.path)},
+        }
+        for kinds, apartments in (
+            ((KIND_RESERVED,), 1),
+            ((KIND_RESERVED, KIND_BLOCKED), 2),
+        ):
+            config["fetch"] = {"kinds": kinds}
+            output = io.StringIO()
+            with redirect_stdout(output):
+                show_cached_reservations(config, 7)
+            self.assertIn(f"Check-ins: {apartments}\n", output.getvalue())
+
+    def test_cached_digest_of_every_tenant(self):
+        today = date.today()
+        tenants = {}
+        for name, apt_number in (("alice", "1"), ("bob", "2")):
+            path = Path(self.tmp.name) / name / "reservations.json"
+            stay = CalendarEvent("a", today, today + timedelta(days=2), KIND_RESERVED)
+            save_reservations(path, {apt_number: [stay]})
+            tenants[name] = {
+                "airbnb_urls": {apt_number: f"https://example.com/{apt_number}.ics"},
+                "mock_airbnb_urls": {apt_number: f"{apt_number}.ics"},
+                "telegram": {"api_token": "TEST", "chat_id": name},
+                "reservation_cache": {"path": str(path)},
+            }
+        del tenants["bob"]["mock_airbnb_urls"]
+        config_path = Path(self.tmp.name) / "config.json"
+        config_path.write_text(
+            json.dumps(
+                {
+                    "mailboxes": ["A"],
+                    "special_mailboxes": {},
+                    "message_format": "detailed",
+                    "tenants": tenants,
+                }
+            )
+        )
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            show_cached_digests(load_app_config(config_path), config_path, 7)
+        self.assertIn("Tenant alice:", output.getvalue())
+        self.assertIn("  - Apt 1\n", output.getvalue())
+        self.assertIn("  - Apt 2\n", output.getvalue())
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            show_cached_digests(
+                load_app_config(config_path), config_path, 7, use_mock=True
+            )
+        self.assertIn("  - Apt 1\n", output.getvalue())
+        self.assertIn("missing 'mock_airbnb_urls'", output.getvalue())
+
+    def test_cache_only_run_does_not_import_http_or_ics(self):
+        save_reservations(self.path, {})
+        code = (
+            "import sys; import main; "
+            f"main.show_cached_reservations({{'reservation_cache': {{'path': {str(self.path)!r}}}}}, 7); "
+            "print(sorted(m for m in ('requests', 'urllib3', 'ics', 'arrow') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output.splitlines()[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
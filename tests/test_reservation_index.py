@@ -0,0 +1,90 @@
+import sys
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from airbnb_data import load_apartment_events
+from ics_parser import KIND_RESERVED, CalendarEvent
+from reservation_index import ReservationIndex
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+def naive_reservations(events_by_apartment, start_date, end_date):
+    reservations = {}
+    for apt_number, events in events_by_apartment.items():
+        for event in events:
+            if start_date <= event.begin <= end_date:
+                reservations.setdefault(event.begin, {"checkins": [], "checkouts": []})[
+                    "checkins"
+                ].append({"apt_number": apt_number})
+            if start_date <= event.end <= end_date:
+                reservations.setdefault(event.end, {"checkins": [], "checkouts": []})[
+                    "checkouts"
+                ].append({"apt_number": apt_number})
+    return reservations
+
+
+def stay(begin, end):
+    return CalendarEvent(None, begin, end, KIND_RESERVED)
+
+
+class TestReservationIndex(unittest.TestCase):
+    def setUp(self):
+        config = {
+            "airbnb_urls": {
+                str(i): str(DATA_DIR / f"apartment_{i}.ics") for i in range(1, 6)
+            }
+        }
+        self.events = load_apartment_events(config)
+        self.index = ReservationIndex(self.events)
+
+    def test_windows_match_linear_scan(self):
+        first_day = date(2024, 6, 1)
+        for offset in range(0, 40, 3):
+            for length in (0, 1, 7, 30):
+                start = first_day + timedelta(days=offset)
+                end = start + timedelta(days=length)
+                self.assertEqual(
+                    self.index.table_between(start, end).to_dict(),
+                    naive_reservations(self.events, start, end),
+                )
+
+    def test_single_apartment_queries(self):
+        start, end = date(2024, 6, 1), date(2024, 7, 15)
+        for apt_number, events in self.events.items():
+            self.assertEqual(
+                [day for day, _ in self.index.checkins_between(start, end, apt_number)],
+                sorted(e.begin for e in events if start <= e.begin <= end),
+            )
+            self.assertEqual(
+                [
+                    day
+                    for day, _ in self.index.checkouts_between(start, end, apt_number)
+                ],
+                sorted(e.end for e in events if start <= e.end <= end),
+            )
+
+    def test_in_house_with_overlapping_stays(self):
+        index = ReservationIndex(
+            {
+                "1": [stay(date(2024, 6, 1), date(2024, 6, 20))],
+                "2": [
+                    stay(date(2024, 6, 1), date(2024, 6, 10)),
+                    stay(date(2024, 6, 2), date(2024, 6, 3)),
+                ],
+                "3": [],
+            }
+        )
+
+        self.assertEqual(index.in_house(date(2024, 5, 31)), [])
+        self.assertEqual(index.in_house(date(2024, 6, 5)), ["1", "2"])
+        self.assertEqual(index.in_house(date(2024, 6, 10)), ["1"])
+        self.assertEqual(index.in_house(date(2024, 6, 20)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import random
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+from airbnb_data import get_airbnb_reservations, load_apartment_events
+from ics_parser import parse_events
+from mock_server import generate_calendar
+from reservation_index import ReservationIndex
+from reservation_store import ReservationStore
+
+
+def calendar(*stays):
+    """Builds an ICS body from (uid, begin, end) tuples."""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for uid, begin, end in stays:
+        lines += [
+            "BEGIN:VEVENT",
+            f"DTSTART;VALUE=DATE:{begin:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{end:%Y%m%d}",
+            f"UID:{uid}",
+            "SUMMARY:Reserved",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+class TestReservationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ReservationStore(Path(self.tmp.name) / "reservations.db")
+        self.today = date.today()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def day(self, offset):
+        return self.today + timedelta(days=offset)
+
+    def test_unchanged_calendar_is_not_parsed_again(self):
+        body = calendar(("a", self.day(1), self.day(3)))
+        parsed = []
+
+        def parse(data):
+            parsed.append(data)
+            return parse_events(data)
+
+        self.assertTrue(self.store.sync("1", body, parse=parse))
+        self.assertFalse(self.store.sync("1", body, parse=parse))
+        self.assertEqual(len(parsed), 1)
+        self.assertIsNotNone(self.store.checked_at())
+
+    def test_upserts_keep_history(self):
+        self.store.sync(
+            "1",
+            calendar(("a", self.day(1), self.day(3)), ("b", self.day(5), self.day(7))),
+        )
+        first_seen = self.store.stays_between(self.day(0), self.day(10))[0].first_seen
+        # "a" moves and "b" is cancelled
+        self.store.sync("1", calendar(("a", self.day(2), self.day(4))))
+
+        current = self.store.stays_between(self.day(0), self.day(10))
+        self.assertEqual([(s.uid, s.begin) for s in current], [("a", self.day(2))])
+        self.assertEqual(current[0].first_seen, first_seen)
+
+        history = self.store.stays_between(
+            self.day(0), self.day(10), include_removed=True
+        )
+        removed = [stay for stay in history if stay.removed_at is not None]
+        self.assertEqual([stay.uid for stay in removed], ["b"])
+
+    def test_past_stays_dropped_from_the_calendar_are_kept(self):
+        self.store.sync(
+            "1",
+            calendar(
+                ("old", self.day(-9), self.day(-5)), ("a", self.day(1), self.day(3))
+            ),
+        )
+        self.store.sync("1", calendar(("a", self.day(1), self.day(3))))
+        past = self.store.stays_between(self.day(-10), self.day(-1))
+        self.assertEqual([stay.uid for stay in past], ["old"])
+
+    def test_table_matches_the_in_memory_index(self):
+        rng = random.Random(3)
+        calendars = {
+            apt_number: generate_calendar(rng, days_forward=60, num_events=20)
+            for apt_number in ("1", "2", "3")
+        }
+        for apt_number, body in calendars.items():
+            self.store.sync(apt_number, body)
+        events = {apt: parse_events(body) for apt, body in calendars.items()}
+
+        start, end = self.day(0), self.day(30)
+        expected = ReservationIndex(events).table_between(start, end)
+        actual = self.store.table_between(start, end, ["1", "2", "3"])
+        self.assertEqual(dict(actual), dict(expected))
+        stored = self.store.events_by_apartment(["3", "1", "4"])
+        self.assertEqual(list(stored), ["3", "1"])
+        self.assertEqual(stored["1"], events["1"])
+
+        # Apartments no longer configured are ignored
+        only_two = self.store.table_between(start, end, ["2"])
+        self.assertEqual(only_two.apartments, ["2"])
+
+    def test_get_airbnb_reservations_reads_from_the_store(self):
+        rng = random.Random(5)
+        urls = {}
+        for apt_number in ("1", "2"):
+            path = Path(self.tmp.name) / f"apartment_{apt_number}.ics"
+            path.write_text(generate_calendar(rng, days_forward=20, num_events=8))
+            urls[apt_number] = str(path)
+        config = {
+            "airbnb_urls": urls,
+            "reservation_cache": {"path": str(Path(self.tmp.name) / "cache.json")},
+        }
+        expected = get_airbnb_reservations(config, 10)
+
+        store_path = Path(self.tmp.name) / "store.db"
+        config["reservation_store"] = {"path": str(store_path)}
+        self.assertEqual(dict(get_airbnb_reservations(config, 10)), dict(expected))
+        with ReservationStore(store_path) as store:
+            self.assertEqual(
+                store.events_by_apartment(urls), load_apartment_events(config)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
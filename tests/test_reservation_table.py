@@ -0,0 +1,72 @@
+import sys
+import unittest
+from datetime import date
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from reservation_table import CHECKIN, CHECKOUT, ReservationTable
+
+JUNE_1 = date(2024, 6, 1).toordinal()
+
+
+class TestReservationTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ReservationTable(
+            [
+                (JUNE_1, CHECKIN, 1),
+                (JUNE_1, CHECKIN, 0),
+                (JUNE_1, CHECKOUT, 2),
+                (JUNE_1 + 3, CHECKOUT, 1),
+            ],
+            ["1", "2", "3"],
+        )
+
+    def test_mapping_matches_legacy_dict_shape(self):
+        self.assertEqual(
+            self.table.to_dict(),
+            {
+                date(2024, 6, 1): {
+                    "checkins": [{"apt_number": "2"}, {"apt_number": "1"}],
+                    "checkouts": [{"apt_number": "3"}],
+                },
+                date(2024, 6, 4): {
+                    "checkins": [],
+                    "checkouts": [{"apt_number": "2"}],
+                },
+            },
+        )
+        self.assertEqual(len(self.table), 2)
+        self.assertIn(date(2024, 6, 4), self.table)
+        self.assertNotIn(date(2024, 6, 2), self.table)
+        with self.assertRaises(KeyError):
+            self.table[date(2024, 6, 2)]
+
+    def test_iter_days(self):
+        self.assertEqual(
+            list(self.table.iter_days()),
+            [
+                (date(2024, 6, 1), ["2", "1"], ["3"]),
+                (date(2024, 6, 4), [], ["2"]),
+            ],
+        )
+        self.assertEqual(self.table.movement_count(), 4)
+
+    def test_until_is_a_prefix_view(self):
+        view = self.table.until(date(2024, 6, 3))
+        self.assertEqual(
+            list(view.iter_days()), [(date(2024, 6, 1), ["2", "1"], ["3"])]
+        )
+        self.assertEqual(view.movement_count(), 3)
+        self.assertNotIn(date(2024, 6, 4), view)
+        self.assertEqual(self.table.until(date(2024, 6, 4)), self.table)
+        self.assertFalse(self.table.until(date(2024, 5, 31)))
+        self.assertFalse(view.until(date(2024, 5, 31)))
+
+    def test_empty_table_is_falsy(self):
+        self.assertFalse(ReservationTable([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,13 @@ import sys
 import unittest
 from pathlib import Path
 
-# Add the src directory to the Python path
+# Add the src and data directories to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
 
 from telegram_bot import send_telegram_message
 from config_utils import find_config_path, load_configuration
+from mock_server import MockServer
 
 
 class TestTelegramBot(unittest.TestCase):
@@ -24,6 +26,13 @@ class TestTelegramBot(unittest.TestCase):
         response = send_telegram_message("Test message", api_token, chat_id)
         self.assertEqual(response["ok"], True, "Failed to send message.")
 
+    def test_send_telegram_message_offline(self):
+        with MockServer(apartments=0) as server:
+            response = send_telegram_message("Test message", "TEST", "1", server.url)
+
+        self.assertEqual(response["ok"], True, "Failed to send message.")
+        self.assertEqual(server.messages, [("1", "Test message")])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from telegram_delivery import TelegramDeliveryQueue, message_length, split_message
+
+DAY = "📅 Monday, 10 de June 2024\n🔑 Check-ins: 1\n  - Apt 1 - 📫 1\n🚪 Check-outs: 0\n----------\n"
+
+
+class FakeTelegram:
+    def __init__(self, rate_limited_chats=()):
+        self.now = 0.0
+        self.sent = []
+        self.rate_limited_chats = set(rate_limited_chats)
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def send(self, text, api_token, chat_id):
+        if chat_id in self.rate_limited_chats:
+            self.rate_limited_chats.remove(chat_id)
+            return {"ok": False, "error_code": 429, "parameters": {"retry_after": 7}}
+        self.sent.append((self.now, chat_id, text))
+        return {"ok": True}
+
+
+class TestTelegramDelivery(unittest.TestCase):
+    def test_split_on_day_boundaries(self):
+        text = DAY * 200
+
+        parts = split_message(text)
+
+        self.assertGreater(len(parts), 1)
+        self.assertEqual("".join(parts), text)
+        for part in parts:
+            self.assertLessEqual(message_length(part), 4096)
+            self.assertTrue(part.endswith("----------\n"))
+
+    def test_oversized_day_is_split_on_lines(self):
+        text = "📅 Day\n" + "  - Apt 1\n" * 1000 + "----------\n"
+
+        parts = split_message(text, limit=500)
+
+        self.assertEqual("".join(parts), text)
+        self.assertTrue(all(message_length(part) <= 500 for part in parts))
+
+    def test_long_line_is_cut_on_characters(self):
+        # No newlines, and emoji taking two UTF-16 units each
+        text = "📫 Apt 12 " * 30_000
+        parts = split_message(text, limit=4096)
+
+        self.assertEqual("".join(parts), text)
+        for part, following in zip(parts, parts[1:]):
+            self.assertLessEqual(message_length(part), 4096)
+            self.assertGreater(message_length(part + following[0]), 4096)
+
+    def test_rate_limits_and_retry_after(self):
+        telegram = FakeTelegram(rate_limited_chats=["b"])
+        queue = TelegramDeliveryQueue(
+            "token", send=telegram.send, clock=telegram.clock, sleep=telegram.sleep
+        )
+        queue.put("a", DAY * 200)
+        queue.put("b", "hello")
+
+        results = queue.run()
+
+        self.assertTrue(all(result.ok for result in results))
+        a_times = [when for when, chat_id, _ in telegram.sent if chat_id == "a"]
+        self.assertTrue(all(t2 - t1 >= 1.0 for t1, t2 in zip(a_times, a_times[1:])))
+        self.assertEqual(
+            "".join(text for _, chat_id, text in telegram.sent if chat_id == "a"),
+            DAY * 200,
+        )
+        (b_result,) = [result for result in results if result.chat_id == "b"]
+        self.assertEqual(b_result.attempts, 2)
+        b_time = [when for when, chat_id, _ in telegram.sent if chat_id == "b"][0]
+        self.assertGreaterEqual(b_time, 7)
+
+    def test_failures_are_reported(self):
+        queue = TelegramDeliveryQueue(
+            "token", send=lambda *args: {"ok": False, "description": "Bad Request"}
+        )
+        queue.put("a", "hello")
+
+        (result,) = queue.run()
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "Bad Request")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Add the src and data directories to the Python path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR / "src"))
+sys.path.append(str(ROOT_DIR / "data"))
+
+from mock_data import generate_mock_ics
+from telegram_delivery import DeliveryResult
+from tenants import expand_tenants, run_tenants
+
+
+class TestTenants(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        rng = random.Random(7)
+        for apt_number in ("1", "2", "3"):
+            generate_mock_ics(f"apartment_{apt_number}.ics", num_events=5, rng=rng)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def tenant(self, apartments, chat_id):
+        return {
+            "airbnb_urls": {
+                apt_number: f"apartment_{apt_number}.ics" for apt_number in apartments
+            },
+            "telegram": {"api_token": "TEST", "chat_id": chat_id},
+        }
+
+    def test_tenant_sections_inherit_shared_keys_and_get_their_own_caches(self):
+        config = {
+            "message_format": "basic",
+            "event_cache": {},
+            "tenants": {
+                "alice": self.tenant(["1"], "a"),
+                "bob": {**self.tenant(["2"], "b"), "message_format": "detailed"},
+            },
+        }
+        tenants = dict(expand_tenants(config, "config"))
+
+        self.assertEqual(list(tenants), ["alice", "bob"])
+        self.assertEqual(tenants["alice"]["message_format"], "basic")
+        self.assertEqual(tenants["bob"]["message_format"], "detailed")
+        self.assertNotEqual(
+            tenants["alice"]["changes"]["snapshot"],
+            tenants["bob"]["changes"]["snapshot"],
+        )
+        self.assertNotEqual(
+            tenants["alice"]["event_cache"]["directory"],
+            tenants["bob"]["event_cache"]["directory"],
+        )
+        self.assertNotIn("tenants", tenants["alice"])
+
+    def test_single_config_is_one_tenant(self):
+        config = self.tenant(["1"], "a")
+        self.assertEqual(
+            [name for name, _ in expand_tenants(config, "owner")], ["owner"]
+        )
+        self.assertNotIn("changes", config)  # The original is left untouched
+
+    def test_messages_go_to_each_tenant_and_failures_stay_isolated(self):
+        delivered = []
+        lock = threading.Lock()
+
+        def deliver(text, api_token, chat_ids, api_base):
+            with lock:
+                delivered.append((tuple(chat_ids), text))
+            return [
+                DeliveryResult(chat_id, 1, 1, True, 1, None) for chat_id in chat_ids
+            ]
+
+        shared = {"mailboxes": ["A", "B", "C"], "special_mailboxes": {}}
+        config = {
+            **shared,
+            "message_format": "detailed",
+            "tenants": {
+                "alice": self.tenant(["1", "2"], "a"),
+                "bob": self.tenant(["3"], ["b1", "b2"]),
+                # An unknown message format makes rendering fail in the worker
+                "broken": {**self.tenant(["1"], "x"), "message_format": None},
+            },
+        }
+
+        results = run_tenants(
+            expand_tenants(config, "config"), 30, max_workers=2, deliver=deliver
+        )
+
+        by_tenant = {result.tenant: result for result in results}
+        self.assertEqual(set(by_tenant), {"alice", "bob", "broken"})
+        self.assertTrue(by_tenant["alice"].ok)
+        self.assertTrue(by_tenant["bob"].ok)
+        self.assertFalse(by_tenant["broken"].ok)
+        self.assertEqual(by_tenant["bob"].parts_sent, 2)
+
+        messages = dict(delivered)
+        self.assertIn("Apt 1", messages[("a",)])
+        self.assertNotIn("Apt 3", messages[("a",)])
+        self.assertNotIn("Apt 1", messages[("b1", "b2")])
+
+    def test_tenant_without_mock_calendars_fails_alone(self):
+        delivered = []
+
+        def deliver(text, api_token, chat_ids, api_base):
+            delivered.append(tuple(chat_ids))
+            return [
+                DeliveryResult(chat_id, 1, 1, True, 1, None) for chat_id in chat_ids
+            ]
+
+        mocked = self.tenant(["1"], "a")
+        mocked["mock_airbnb_urls"] = mocked.pop("airbnb_urls")
+        mocked["airbnb_urls"] = {"1": "https://www.airbnb.com/calendar/ical/1.ics"}
+        config = {
+            "mailboxes": ["A"],
+            "special_mailboxes": {},
+            "tenants": {"mocked": mocked, "live_only": self.tenant(["2"], "b")},
+        }
+
+        results = run_tenants(
+            expand_tenants(config, "config"),
+            30,
+            use_mock=True,
+            max_workers=2,
+            deliver=deliver,
+        )
+
+        by_tenant = {result.tenant: result for result in results}
+        self.assertTrue(by_tenant["mocked"].ok)
+        self.assertFalse(by_tenant["live_only"].ok)
+        self.assertIn("mock_airbnb_urls", by_tenant["live_only"].error)
+        self.assertEqual(delivered, [("a",)])
+
+
+if __name__ == "__main__":
+    unittest.main()